@@ -0,0 +1,29 @@
+"""add_ratings_timestamp_index
+
+Revision ID: 7c2e5b9d4a10
+Revises: 3f9a1c7d2e41
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2e5b9d4a10"
+down_revision: Union[str, Sequence[str], None] = "3f9a1c7d2e41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Serves max(timestamp) of the training fingerprint and the
+    # "updated since the snapshot" read without scanning the table
+    op.create_index(op.f("ix_ratings_timestamp"), "ratings", ["timestamp"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_ratings_timestamp"), table_name="ratings")
@@ -0,0 +1,52 @@
+"""add_movie_search_indexes
+
+Revision ID: a4d8e1f6c3b2
+Revises: 7c2e5b9d4a10
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4d8e1f6c3b2"
+down_revision: Union[str, Sequence[str], None] = "7c2e5b9d4a10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Trigram GIN indexes serve ILIKE '%term%' and similarity (%) matches on
+    # titles and genre names; the tsvector index serves full-text title search
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_movies_title_trgm",
+        "movies",
+        ["title"],
+        postgresql_using="gin",
+        postgresql_ops={"title": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_movies_title_tsv",
+        "movies",
+        [sa.text("to_tsvector('simple'::regconfig, title)")],
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_genres_name_trgm",
+        "genres",
+        ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_genres_name_trgm", table_name="genres")
+    op.drop_index("ix_movies_title_tsv", table_name="movies")
+    op.drop_index("ix_movies_title_trgm", table_name="movies")
@@ -0,0 +1,40 @@
+"""add_movie_sort_indexes
+
+Revision ID: e2b7c9a5f813
+Revises: a4d8e1f6c3b2
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e2b7c9a5f813"
+down_revision: Union[str, Sequence[str], None] = "a4d8e1f6c3b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # (sort key, id) indexes let keyset pagination seek to the cursor and
+    # read one page in order. Titles are never null, so (title, id) also
+    # serves the descending sort; years sort nulls last in both directions,
+    # which the descending sort needs its own index for.
+    op.create_index("ix_movies_title_id", "movies", ["title", "id"])
+    op.create_index("ix_movies_release_year_id", "movies", ["release_year", "id"])
+    op.create_index(
+        "ix_movies_release_year_desc_id",
+        "movies",
+        [sa.text("release_year DESC NULLS LAST"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_movies_release_year_desc_id", table_name="movies")
+    op.drop_index("ix_movies_release_year_id", table_name="movies")
+    op.drop_index("ix_movies_title_id", table_name="movies")
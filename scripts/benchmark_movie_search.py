@@ -0,0 +1,177 @@
+"""Latency benchmarks of movie search and listing against the configured PostgreSQL database.
+
+"search" compares the pre-index query (outer join on genres + DISTINCT)
+with the "substring" and "relevance" search modes of get_movies. "paging"
+compares OFFSET and cursor pagination at increasing page depths. "count"
+compares the total count modes, with the count cache cold and warm. Meant to
+run on the full MovieLens catalogue (~87k movies, loaded by
+populate_database.py) before and after the search and sort index migrations.
+
+Usage:
+    python scripts/benchmark_movie_search.py search
+    python scripts/benchmark_movie_search.py search --terms toy "star wars" comedy --repeat 50 --explain
+    python scripts/benchmark_movie_search.py paging --sort-by title_asc year_desc --pages 1 100 1000 8000
+    python scripts/benchmark_movie_search.py count --terms the comedy
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+import numpy as np
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload
+
+sys.path.append(".")
+
+from server.backend.postgres import PostgresSessionManager
+from server.models.genres import GenreModel
+from server.models.movies import MovieModel
+from server.services.movie_count_cache import movie_count_cache
+from server.services.movie_service import (
+    COUNT_MODES,
+    MOVIE_SORT_KEYS,
+    SEARCH_MODES,
+    _build_movie_search_query,
+    get_movies,
+    next_cursor,
+)
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+session_manager = PostgresSessionManager()
+
+DEFAULT_TERMS = ["toy story", "star", "the", "godfather", "comedy", "sci-fi", "amelie", "matrx"]
+
+
+def legacy_get_movies(session, limit: int, search: str):
+    """Search as implemented before the search indexes: join, ILIKE and DISTINCT."""
+    query = session.query(MovieModel).options(joinedload(MovieModel.genres))
+    query = query.join(MovieModel.genres, isouter=True).filter(
+        or_(MovieModel.title.ilike(f"%{search}%"), GenreModel.name.ilike(f"%{search}%"))
+    ).distinct().order_by(MovieModel.id.asc())
+    return query.limit(limit).all(), query.count()
+
+
+def time_search(search, repeat: int) -> np.ndarray:
+    """Run search() repeat times (after one warm-up call), returning milliseconds per call."""
+    search()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        search()
+        timings.append((time.perf_counter() - start) * 1000)
+    return np.array(timings)
+
+
+def explain(session, search: str, search_mode: str):
+    """Log the PostgreSQL plan of one search's page query."""
+    query, relevance = _build_movie_search_query(session, search, search_mode)
+    if relevance is not None:
+        query = query.order_by(relevance.desc())
+    statement = query.limit(10).statement.compile(
+        dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = session.connection().exec_driver_sql(f"EXPLAIN ANALYZE {statement}".replace("%", "%%")).all()
+    logger.info("\n".join(row[0] for row in plan))
+
+
+def benchmark_search(args):
+    """Compare search latency of the legacy query and both search modes."""
+    with session_manager.open_session() as session:
+        logger.info(f"movies={session.query(MovieModel).count()}")
+        for term in args.terms:
+            searches = {"legacy": lambda: legacy_get_movies(session, args.limit, term)}
+            for mode in SEARCH_MODES:
+                searches[mode] = lambda mode=mode: get_movies(
+                    session, args.limit, 1, term, search_mode=mode
+                )
+
+            for name, search in searches.items():
+                timings = time_search(search, args.repeat)
+                total = search()[1]
+                logger.info(
+                    f"{term!r:14s} {name:<9s} p50={np.percentile(timings, 50):7.1f} ms  "
+                    f"p95={np.percentile(timings, 95):7.1f} ms  matches={total}"
+                )
+                if args.explain and name != "legacy":
+                    explain(session, term, name)
+
+
+def cursor_at_page(session, sort_by: str, limit: int, page: int) -> str | None:
+    """Cursor that fetches the given page (the last movie of the page before it)."""
+    if page == 1:
+        return None
+    movies, _ = get_movies(session, 1, (page - 1) * limit, sort_by=sort_by)
+    return next_cursor(movies, 1, sort_by)
+
+
+def benchmark_paging(args):
+    """Compare OFFSET and cursor page latency at increasing depths."""
+    with session_manager.open_session() as session:
+        logger.info(f"movies={session.query(MovieModel).count()} limit={args.limit}")
+        for sort_by in args.sort_by:
+            for page in args.pages:
+                cursor = cursor_at_page(session, sort_by, args.limit, page)
+                offset_ms = time_search(
+                    lambda: get_movies(session, args.limit, page, sort_by=sort_by), args.repeat
+                )
+                cursor_ms = time_search(
+                    lambda: get_movies(session, args.limit, sort_by=sort_by, cursor=cursor), args.repeat
+                )
+                logger.info(
+                    f"{sort_by:<10s} page={page:<6d} offset p50={np.percentile(offset_ms, 50):7.1f} ms  "
+                    f"cursor p50={np.percentile(cursor_ms, 50):7.1f} ms"
+                )
+
+
+def benchmark_count(args):
+    """Compare request latency of the count modes, with the exact count uncached and cached."""
+    with session_manager.open_session() as session:
+        logger.info(f"movies={session.query(MovieModel).count()}")
+        for term in args.terms:
+            searches = {
+                "uncached": lambda: (movie_count_cache.clear(), get_movies(session, args.limit, 1, term))[1],
+            }
+            for mode in COUNT_MODES:
+                searches[mode] = lambda mode=mode: get_movies(session, args.limit, 1, term, count_mode=mode)
+
+            for name, search in searches.items():
+                timings = time_search(search, args.repeat)
+                logger.info(
+                    f"{term!r:14s} {name:<9s} p50={np.percentile(timings, 50):7.1f} ms  total={search()[1]}"
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    search = subparsers.add_parser("search", help="Search latency per term and mode")
+    search.add_argument("--terms", nargs="+", default=DEFAULT_TERMS)
+    search.add_argument("--limit", type=int, default=10)
+    search.add_argument("--repeat", type=int, default=20)
+    search.add_argument("--explain", action="store_true", help="Log the query plan of every term and mode")
+    search.set_defaults(func=benchmark_search)
+
+    paging = subparsers.add_parser("paging", help="OFFSET vs cursor pagination by page depth")
+    paging.add_argument("--sort-by", nargs="+", choices=sorted(MOVIE_SORT_KEYS), default=["id_asc", "title_asc", "year_desc"])
+    paging.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 8000])
+    paging.add_argument("--limit", type=int, default=10)
+    paging.add_argument("--repeat", type=int, default=20)
+    paging.set_defaults(func=benchmark_paging)
+
+    count = subparsers.add_parser("count", help="Listing latency per count mode")
+    count.add_argument("--terms", nargs="+", default=["", "the", "comedy", "star"])
+    count.add_argument("--limit", type=int, default=10)
+    count.add_argument("--repeat", type=int, default=20)
+    count.set_defaults(func=benchmark_count)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Micro-benchmarks for recommendation serving and training.
+
+Runs on synthetic factor and rating matrices, so no database or trained
+model is needed.
+
+Usage:
+    python scripts/benchmark_recommendations.py scoring --users 200000 --movies 87000
+    python scripts/benchmark_recommendations.py topk --users 200000 --movies 87000 --k 100
+    python scripts/benchmark_recommendations.py similar --movies 87000
+    python scripts/benchmark_recommendations.py precision --users 200000 --movies 87000
+    python scripts/benchmark_recommendations.py training --ratings 100000 1000000 10000000
+"""
+
+import argparse
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from scipy import sparse
+
+sys.path.append(".")
+
+from server.services.factor_precision import FACTOR_DTYPES, reduce_precision, top_n_overlap
+from server.services.scoring import prepare_model_data, recommend_for_row, recommend_for_rows
+from server.services.similarity_index import build_similarity_index, find_similar
+from server.services.topk_table import load_top_k, lookup_top_k, materialize_top_k
+from server.services.training_engines import TRAINING_ENGINES, get_training_engine
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def make_model_data(n_users: int, n_movies: int, n_components: int, seed: int = 42) -> dict:
+    """Build synthetic model data shaped like a trained NMF artifact."""
+    rng = np.random.default_rng(seed)
+    return {
+        "version": "benchmark",
+        "user_features": rng.random((n_users, n_components)),
+        "item_features": rng.random((n_components, n_movies)),
+        "user_ids": list(range(1, n_users + 1)),
+        "movie_ids": list(range(1, n_movies + 1)),
+    }
+
+
+def legacy_recommend(model_data: dict, user_id: int, n: int) -> dict:
+    """Scoring path as implemented before the vectorized top-N selection."""
+    user_features = model_data["user_features"]
+    item_features = model_data["item_features"]
+    user_ids = model_data["user_ids"]
+    movie_ids = model_data["movie_ids"]
+
+    user_idx = user_ids.index(user_id)
+    user_vector = user_features[user_idx].reshape(1, -1)
+    predictions = np.dot(user_vector, item_features).flatten()
+
+    movie_predictions = list(zip(movie_ids, predictions))
+    movie_predictions.sort(key=lambda x: x[1], reverse=True)
+    top_recommendations = movie_predictions[:n]
+
+    recommended_movie_ids = [int(movie_id) for movie_id, _ in top_recommendations]
+    raw_scores = [float(score) for _, score in top_recommendations]
+    total_score = sum(raw_scores)
+    probabilities = [score / total_score for score in raw_scores]
+
+    return {"movie_ids": recommended_movie_ids, "probabilities": probabilities}
+
+
+def time_calls(fn, user_ids: list[int], repeat: int) -> float:
+    """Return mean milliseconds per call of fn over user_ids, repeated."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for user_id in user_ids:
+            fn(user_id)
+    elapsed = time.perf_counter() - start
+    return elapsed * 1000 / (repeat * len(user_ids))
+
+
+def benchmark_scoring(args):
+    """Compare the legacy scan-and-sort path with the vectorized top-N path."""
+    model_data = make_model_data(args.users, args.movies, args.components)
+    prepared = prepare_model_data(model_data)
+
+    rng = np.random.default_rng(0)
+    # Sample users across the whole id range so the linear scan is representative
+    user_ids = rng.integers(1, args.users + 1, size=args.samples).tolist()
+
+    legacy_ms = time_calls(
+        lambda uid: legacy_recommend(model_data, uid, args.n), user_ids, args.repeat
+    )
+    vectorized_ms = time_calls(
+        lambda uid: recommend_for_row(prepared, prepared["user_index"][uid], args.n),
+        user_ids,
+        args.repeat,
+    )
+
+    # Both paths must agree on the recommended movies
+    for uid in user_ids[:5]:
+        expected = legacy_recommend(model_data, uid, args.n)["movie_ids"]
+        actual = recommend_for_row(prepared, prepared["user_index"][uid], args.n)["movie_ids"]
+        assert expected == actual, f"Mismatch for user {uid}"
+
+    logger.info(
+        f"users={args.users} movies={args.movies} k={args.components} n={args.n}"
+    )
+    logger.info(f"legacy:     {legacy_ms:.3f} ms/request")
+    logger.info(f"vectorized: {vectorized_ms:.3f} ms/request")
+    logger.info(f"speedup:    {legacy_ms / vectorized_ms:.1f}x")
+
+
+def benchmark_topk(args):
+    """Report materialization time and size of the top-K table, and lookup latency."""
+    model_data = make_model_data(args.users, args.movies, args.components)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = (Path(tmp) / "topk_movies.npy", Path(tmp) / "topk_scores.npy")
+        info = materialize_top_k(model_data, args.k, *paths)
+
+        prepared = prepare_model_data(model_data)
+        prepared["topk_table"] = load_top_k(*paths)
+
+        rng = np.random.default_rng(0)
+        rows = rng.integers(0, args.users, size=1000).tolist()
+        lookup_ms = time_calls(lambda row: lookup_top_k(prepared, row, args.n), rows, 1)
+        live_ms = time_calls(lambda row: recommend_for_row(prepared, row, args.n), rows[:50], 1)
+        del prepared
+
+    logger.info(f"users={args.users} movies={args.movies} k={args.components} top-K={args.k}")
+    logger.info(f"materialization: {info['seconds']:.1f} s, {info['bytes'] / 1024 / 1024:.1f} MB")
+    logger.info(f"lookup:          {lookup_ms:.3f} ms/request")
+    logger.info(f"live scoring:    {live_ms:.3f} ms/request")
+
+
+def clustered_item_features(n_movies: int, n_components: int, n_clusters: int = 500, seed: int = 42):
+    """Non-negative item factors grouped around latent "genres", shaped (k x movies)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.gamma(0.5, size=(n_clusters, n_components))
+    labels = rng.integers(0, n_clusters, size=n_movies)
+    noise = rng.gamma(0.5, 0.5, size=(n_movies, n_components))
+    return (centers[labels] + noise).T
+
+
+def benchmark_similar(args):
+    """Report recall@n and latency of IVF search against exact search."""
+    item_features = clustered_item_features(args.movies, args.components)
+
+    start = time.perf_counter()
+    ivf = build_similarity_index(item_features, exact_max_items=0)
+    build_seconds = time.perf_counter() - start
+    exact = build_similarity_index(item_features, exact_max_items=args.movies)
+
+    rng = np.random.default_rng(0)
+    queries = rng.integers(0, args.movies, size=args.samples).tolist()
+    expected = {q: set(find_similar(exact, q, args.n)[0].tolist()) for q in queries}
+    exact_ms = time_calls(lambda q: find_similar(exact, q, args.n), queries, 1)
+
+    n_lists = ivf["sim_centroids"].shape[0]
+    logger.info(f"movies={args.movies} k={args.components} n={args.n} lists={n_lists}")
+    logger.info(f"IVF build: {build_seconds:.1f} s")
+    logger.info(f"exact:            {exact_ms:.3f} ms/query")
+
+    for n_probe in args.n_probe:
+        recall = np.mean([
+            len(expected[q] & set(find_similar(ivf, q, args.n, n_probe)[0].tolist())) / args.n
+            for q in queries
+        ])
+        ivf_ms = time_calls(lambda q: find_similar(ivf, q, args.n, n_probe), queries, 1)
+        logger.info(f"IVF n_probe={n_probe:<4d} {ivf_ms:.3f} ms/query, recall@{args.n}={recall:.3f}")
+
+
+def benchmark_precision(args):
+    """Report factor memory, per-request and per-batch latency, and top-N overlap per precision."""
+    model_data = make_model_data(args.users, args.movies, args.components)
+    reference = {k: model_data[k] for k in ("user_features", "item_features")}
+
+    rng = np.random.default_rng(0)
+    rows = rng.integers(0, args.users, size=args.samples).tolist()
+    batch = rng.integers(0, args.users, size=args.batch).tolist()
+
+    logger.info(f"users={args.users} movies={args.movies} k={args.components} n={args.n}")
+    for dtype in FACTOR_DTYPES:
+        factors = reduce_precision(reference["user_features"], reference["item_features"], dtype)
+        prepared = prepare_model_data({**model_data, **factors})
+        megabytes = sum(
+            v.nbytes for k, v in factors.items() if isinstance(v, np.ndarray)
+        ) / 1024 / 1024
+
+        request_ms = time_calls(lambda row: recommend_for_row(prepared, row, args.n), rows, 1)
+        start = time.perf_counter()
+        recommend_for_rows(prepared, batch, args.n)
+        batch_ms = (time.perf_counter() - start) * 1000
+        overlap = top_n_overlap(reference, factors, args.n)
+
+        logger.info(
+            f"{dtype:<8s} factors {megabytes:7.1f} MB  {request_ms:.3f} ms/request  "
+            f"{batch_ms:.1f} ms/batch of {args.batch}  overlap@{args.n}={overlap:.3f}"
+        )
+
+
+def make_rating_matrix(n_ratings: int, n_components: int, seed: int = 42) -> sparse.csr_matrix:
+    """
+    Build a synthetic rating matrix with MovieLens-like proportions.
+
+    About 100 ratings per user and up to 1000 per movie, half-star ratings drawn
+    from a low-rank model so the factorization has structure to find.
+    """
+    rng = np.random.default_rng(seed)
+    n_users = max(n_ratings // 100, 100)
+    n_movies = max(n_ratings // 1000, 1000)
+
+    # Duplicate (user, movie) pairs are dropped, so slightly fewer ratings remain
+    cells = np.unique(rng.integers(0, n_users * n_movies, size=n_ratings, dtype=np.int64))
+    rows, cols = np.divmod(cells, n_movies)
+    user_factors = rng.random((n_users, n_components))
+    item_factors = rng.random((n_components, n_movies))
+    affinity = np.einsum("ij,ji->i", user_factors[rows], item_factors[:, cols])
+    ratings = np.round(1 + 8 * affinity / affinity.max()) / 2 + 0.5
+
+    return sparse.csr_matrix((ratings, (rows, cols)), shape=(n_users, n_movies))
+
+
+def benchmark_training(args):
+    """Compare wall time and reconstruction error of the training engines."""
+    for n_ratings in args.ratings:
+        matrix = make_rating_matrix(n_ratings, args.components)
+        logger.info(
+            f"ratings={matrix.nnz} users={matrix.shape[0]} movies={matrix.shape[1]} "
+            f"k={args.components}"
+        )
+        for name in args.engines:
+            engine = get_training_engine(name, memory_budget_mb=args.memory_budget_mb)
+            start = time.perf_counter()
+            fit = engine.fit(matrix, args.components)
+            seconds = time.perf_counter() - start
+            logger.info(
+                f"{name:<7s} {seconds:8.1f} s  {fit['n_iter']:4d} iterations  "
+                f"error={fit['reconstruction_err']:.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    scoring = subparsers.add_parser("scoring", help="Single-user top-N scoring")
+    scoring.add_argument("--users", type=int, default=200_000)
+    scoring.add_argument("--movies", type=int, default=87_000)
+    scoring.add_argument("--components", type=int, default=20)
+    scoring.add_argument("--n", type=int, default=10)
+    scoring.add_argument("--samples", type=int, default=20)
+    scoring.add_argument("--repeat", type=int, default=3)
+    scoring.set_defaults(func=benchmark_scoring)
+
+    topk = subparsers.add_parser("topk", help="Precomputed top-K table")
+    topk.add_argument("--users", type=int, default=200_000)
+    topk.add_argument("--movies", type=int, default=87_000)
+    topk.add_argument("--components", type=int, default=20)
+    topk.add_argument("--k", type=int, default=100)
+    topk.add_argument("--n", type=int, default=10)
+    topk.set_defaults(func=benchmark_topk)
+
+    similar = subparsers.add_parser("similar", help="Similar movies index recall and latency")
+    similar.add_argument("--movies", type=int, default=87_000)
+    similar.add_argument("--components", type=int, default=20)
+    similar.add_argument("--n", type=int, default=10)
+    similar.add_argument("--samples", type=int, default=200)
+    similar.add_argument("--n-probe", type=int, nargs="+", default=[4, 8, 18, 32])
+    similar.set_defaults(func=benchmark_similar)
+
+    precision = subparsers.add_parser("precision", help="float64 vs float32 vs int8 factors")
+    precision.add_argument("--users", type=int, default=200_000)
+    precision.add_argument("--movies", type=int, default=87_000)
+    precision.add_argument("--components", type=int, default=20)
+    precision.add_argument("--n", type=int, default=10)
+    precision.add_argument("--samples", type=int, default=200)
+    precision.add_argument("--batch", type=int, default=1000)
+    precision.set_defaults(func=benchmark_precision)
+
+    training = subparsers.add_parser("training", help="NMF vs ALS training engines")
+    training.add_argument("--ratings", type=int, nargs="+", default=[100_000, 1_000_000, 10_000_000])
+    training.add_argument("--components", type=int, default=20)
+    training.add_argument("--engines", nargs="+", choices=sorted(TRAINING_ENGINES), default=["nmf", "als"])
+    training.add_argument("--memory-budget-mb", type=int, default=None, help="Budget of the out-of-core engine")
+    training.set_defaults(func=benchmark_training)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Convert pickled recommendation models to the memory-mapped .npy layout.
+
+Usage:
+    python scripts/convert_model_artifact.py [models/recommendation_model_XXX.pkl ...] [--set-latest]
+
+With no paths, converts models/recommendation_model_latest.pkl. --set-latest
+publishes the (last) converted version to the model registry as latest,
+which also applies the retention policy.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+sys.path.append(".")
+
+from server.services.model_artifact import convert_pickle_artifact
+from server.services.model_registry import publish_version
+from server.services.recommendation_service import MODELS_DIR
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "paths", nargs="*", type=Path, default=[MODELS_DIR / "recommendation_model_latest.pkl"]
+    )
+    parser.add_argument("--set-latest", action="store_true", help="Serve the converted model")
+    args = parser.parse_args()
+
+    version = None
+    for path in args.paths:
+        target = convert_pickle_artifact(path, MODELS_DIR)
+        version = target.name.removeprefix("recommendation_model_")
+        logger.info(f"Converted {path} -> {target}")
+
+    if args.set_latest and version:
+        removed = publish_version(MODELS_DIR, version)
+        logger.info(f"Latest model now points to version {version}")
+        for name in removed:
+            logger.info(f"Removed {name}")
+
+
+if __name__ == "__main__":
+    main()
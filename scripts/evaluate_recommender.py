@@ -0,0 +1,125 @@
+"""Offline evaluation and hyperparameter sweep for the recommender.
+
+Splits the ratings table by time (the newest ratings are held out), trains
+every candidate configuration in its own worker process, and reports
+precision@k, recall@k, RMSE, training time and peak memory for each.
+
+Usage:
+    python scripts/evaluate_recommender.py --engines nmf als --components 10 20 40 --max-iter 50 200
+    python scripts/evaluate_recommender.py --min-precision 0.05 --output sweep.json
+
+With quality bars (--min-precision, --min-recall, --max-rmse), the fastest
+configuration that meets all of them is reported as the recommendation.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(".")
+
+from server.backend.postgres import PostgresSessionManager
+from server.services.evaluation import (
+    EVALUATION_K,
+    RELEVANCE_THRESHOLD,
+    TEST_FRACTION,
+    evaluate_config,
+    time_split,
+)
+from server.services.training_data import extract_ratings
+from server.services.training_engines import TRAINING_ENGINES
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def meets_bar(result: dict, args) -> bool:
+    """Whether a configuration's metrics satisfy every quality bar given."""
+    checks = [
+        (args.min_precision, result["precision_at_k"], lambda value, bar: value >= bar),
+        (args.min_recall, result["recall_at_k"], lambda value, bar: value >= bar),
+        (args.max_rmse, result["rmse"], lambda value, bar: value <= bar),
+    ]
+    return all(bar is None or (value is not None and ok(value, bar)) for bar, value, ok in checks)
+
+
+def format_result(result: dict) -> str:
+    def fmt(value, spec):
+        return "n/a" if value is None else format(value, spec)
+
+    return (
+        f"{result['engine']:<4s} k={result['n_components']:<3d} max_iter={str(result['max_iter']):<5s} "
+        f"p@k={fmt(result['precision_at_k'], '.4f')} r@k={fmt(result['recall_at_k'], '.4f')} "
+        f"rmse={fmt(result['rmse'], '.4f')} time={result['train_seconds']:.1f}s "
+        f"iters={result['n_iter']} peak={result['peak_rss_mb']:.0f}MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--engines", nargs="+", choices=sorted(TRAINING_ENGINES), default=["nmf", "als"])
+    parser.add_argument("--components", type=int, nargs="+", default=[10, 20, 40])
+    parser.add_argument(
+        "--max-iter", type=int, nargs="+", default=[None],
+        help="Iteration limits to try (default: each engine's full-training limit)",
+    )
+    parser.add_argument("--k", type=int, default=EVALUATION_K)
+    parser.add_argument("--test-fraction", type=float, default=TEST_FRACTION)
+    parser.add_argument("--relevance-threshold", type=float, default=RELEVANCE_THRESHOLD)
+    parser.add_argument("--workers", type=int, default=max(multiprocessing.cpu_count() - 1, 1))
+    parser.add_argument("--min-precision", type=float)
+    parser.add_argument("--min-recall", type=float)
+    parser.add_argument("--max-rmse", type=float)
+    parser.add_argument("--output", help="Write all results to this JSON file")
+    args = parser.parse_args()
+
+    with PostgresSessionManager().open_session() as session:
+        ratings = extract_ratings(session, include_timestamps=True)
+    train, test = time_split(ratings, args.test_fraction)
+    logger.info(
+        f"{len(train['ratings'])} training ratings, {len(test['ratings'])} test ratings "
+        f"(newest {args.test_fraction:.0%} held out)"
+    )
+
+    configs = [
+        {"engine": engine, "n_components": n_components, "max_iter": max_iter}
+        for engine, n_components, max_iter in itertools.product(
+            args.engines, args.components, args.max_iter
+        )
+    ]
+
+    # One fresh process per configuration, so peak memory isn't inherited
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        max_tasks_per_child=1,
+    ) as executor:
+        futures = [
+            executor.submit(evaluate_config, train, test, config, args.k, args.relevance_threshold)
+            for config in configs
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            logger.info(format_result(result))
+
+    results.sort(key=lambda r: r["train_seconds"])
+    passing = [r for r in results if meets_bar(r, args)]
+    if passing:
+        logger.info(f"Cheapest configuration meeting the quality bar: {format_result(passing[0])}")
+    else:
+        logger.info("No configuration meets the quality bar")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        logger.info(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Apply the model retention policy and rebuild the registry index.
+
+Usage:
+    python scripts/prune_models.py [--retain 5] [--rebuild] [--legacy-pickles] [--dry-run]
+
+Keeps the newest --retain versions plus the published latest one and
+deletes every other model directory. --rebuild rescans the models
+directory instead of trusting index.json. --legacy-pickles also deletes
+the pickled models written before the .npy layout (convert the ones you
+need with scripts/convert_model_artifact.py first).
+"""
+
+import argparse
+import logging
+import sys
+
+sys.path.append(".")
+
+from server.services.model_artifact import ARTIFACT_DIR_PREFIX, artifact_dir, save_json
+from server.services.model_registry import (
+    REGISTRY_INDEX_FILE,
+    RETAIN_VERSIONS,
+    apply_retention,
+    collect_garbage,
+    load_index,
+    rebuild_index,
+)
+from server.services.recommendation_service import MODELS_DIR
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--retain", type=int, default=RETAIN_VERSIONS, help="Versions to keep")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from disk")
+    parser.add_argument("--legacy-pickles", action="store_true", help="Delete legacy .pkl models")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be removed")
+    args = parser.parse_args()
+
+    index = rebuild_index(MODELS_DIR) if args.rebuild else load_index(MODELS_DIR)
+    apply_retention(index, args.retain)
+    kept = {entry["path"] for entry in index["versions"]}
+    if index.get("latest"):
+        kept.add(artifact_dir(MODELS_DIR, index["latest"]).name)
+    logger.info(f"Keeping {len(kept)} versions, latest {index.get('latest')}")
+
+    pickles = sorted(MODELS_DIR.glob(f"{ARTIFACT_DIR_PREFIX}*.pkl")) if args.legacy_pickles else []
+    if args.dry_run:
+        for path in sorted(MODELS_DIR.glob(f"{ARTIFACT_DIR_PREFIX}*")):
+            if (path.is_dir() and path.name not in kept) or path in pickles:
+                logger.info(f"Would remove {path.name}")
+        return
+
+    save_json(MODELS_DIR / REGISTRY_INDEX_FILE, index, indent=2)
+    removed = collect_garbage(MODELS_DIR, index)
+    for path in pickles:
+        path.unlink()
+        removed.append(path.name)
+    logger.info(f"Removed {len(removed)} entries")
+
+
+if __name__ == "__main__":
+    main()
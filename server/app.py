@@ -1,15 +1,39 @@
+import logging
 import time
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import SQLAlchemyError
 
 from server.routers import movies, ratings, recommendations
+from server.services.autocomplete_service import warm_autocomplete_index
+from server.services.recommendation_service import get_model_info
+from server.services.training_jobs import shutdown_training_executor
 from server.utils.errors import APIError
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up in-memory state on startup; stop the training process pool on shutdown."""
+    get_model_info()
+    try:
+        with movies.session_manager.open_session() as session:
+            warm_autocomplete_index(session)
+    except SQLAlchemyError:
+        # The index is built on the first autocomplete request instead
+        logger.warning("Could not build the autocomplete index at startup", exc_info=True)
+    yield
+    shutdown_training_executor()
+
+
 app = FastAPI(
     title="Movie Recommendation API",
     description="API for recommending movies based on user preferences using MovieLens dataset.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 
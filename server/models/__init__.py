@@ -4,6 +4,7 @@ from server.models.movies_genres import MovieGenreModel
 from server.models.movies_raw import MoviesRawModel
 from server.models.ratings import RatingModel
 from server.models.ratings_raw import RatingsRawModel
+from server.models.training_jobs import TrainingJobModel
 from server.models.user import UserModel
 
 __all__ = [
@@ -14,4 +15,5 @@ __all__ = [
     "MoviesRawModel",
     "RatingsRawModel",
     "RatingModel",
+    "TrainingJobModel",
 ]
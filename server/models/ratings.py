@@ -41,7 +41,7 @@ class RatingModel(BaseSQLModel):
         Integer, ForeignKey("movies.id"), nullable=False, index=True
     )
     rating: Mapped[float] = mapped_column(Numeric(2, 1), nullable=False)
-    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
 
     # Relationships
     user: Mapped[UserModel] = relationship(back_populates="ratings")
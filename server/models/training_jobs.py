@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Boolean, DateTime, Float, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from server.models.base import BaseSQLModel
+
+
+class TrainingJobModel(BaseSQLModel):
+    __tablename__ = "training_jobs"
+
+    #WHY: Map job_id attribute to the 'id' column in the database
+    job_id: Mapped[int] = mapped_column("id", Integer, primary_key=True, autoincrement=True)
+    # queued, running, completed, failed, cancelled
+    status: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
+    params: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+
+    #WHY: 1 while the job is queued or running, NULL once it has finished. The
+    # unique constraint lets only one active job exist across all API workers.
+    active_slot: Mapped[int | None] = mapped_column(Integer, nullable=True, unique=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+
+    stage: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    progress: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    model_version: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    total_ratings: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
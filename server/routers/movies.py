@@ -1,11 +1,18 @@
 import math
+from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from server.backend.postgres import PostgresSessionManager
-from server.schemas.movie import MovieResponse, MovieListResponse, MovieAverageRatingResponse
-from server.services.movie_service import get_movies, get_movie_avg_rating
+from server.schemas.movie import (
+    AutocompleteResponse,
+    MovieAverageRatingResponse,
+    MovieListResponse,
+    MovieResponse,
+)
+from server.services.autocomplete_service import autocomplete
+from server.services.movie_service import CursorError, get_movie_avg_rating, get_movies, next_cursor
 from server.utils.errors import not_found_error, validation_error
 
 router = APIRouter(prefix="/api/rest/v1", tags=["movies"]) #
@@ -28,6 +35,18 @@ def list_movies(
         default=None,
         description="Sort by: title_asc, title_desc, year_asc, year_desc, id_asc, id_desc"
     ),
+    search_mode: Literal["substring", "relevance"] = Query(
+        default="substring",
+        description="Match the search term anywhere, or rank title word and similar-spelling matches by relevance",
+    ),
+    cursor: str | None = Query(
+        default=None, max_length=500,
+        description="next_cursor of the previous page; fetches the next page by seeking instead of page",
+    ),
+    count_mode: Literal["exact", "estimate", "none"] = Query(
+        default="exact",
+        description="Compute the total exactly (cached), as a planner estimate, or not at all",
+    ),
     session: Session = Depends(get_db),
 ):
 
@@ -38,8 +57,20 @@ def list_movies(
     - **page**: Page number (starts at 1)
     - **search**: Optional search term to filter by title or genre
     - **sort_by**: Optional sorting (title_asc, title_desc, year_asc, year_desc, id_asc, id_desc)
+    - **search_mode**: "substring" (default) or "relevance", which also matches title
+      words and misspellings and orders results best match first unless sort_by is given
+    - **cursor**: Optional next_cursor of the previous page. Cursor paging stays fast at
+      any depth; page numbers are still supported. Not available with relevance ordering.
+      With a cursor, page is ignored (and echoed back as given), total_pages doesn't
+      locate the page, and has_previous is always true
+    - **count_mode**: "exact" (default) counts the matches, cached per search; "estimate"
+      returns a fast approximate total; "none" skips counting and leaves total and
+      total_pages null
     """
-    movies, total = get_movies(session, limit, page, search, sort_by)
+    try:
+        movies, total = get_movies(session, limit, page, search, sort_by, search_mode, cursor, count_mode)
+    except CursorError as e:
+        raise validation_error(e.field, str(e))
 
     movie_responses = [
         MovieResponse(
@@ -51,19 +82,51 @@ def list_movies(
         for m in movies
     ]
 
-    total_pages = math.ceil(total / limit) if total > 0 else 0
+    cursor_of_next = next_cursor(movies, limit, sort_by, search, search_mode)
+    total_pages = None if total is None else math.ceil(total / limit) if total > 0 else 0
+
+    # Page numbers only tell whether there is more with an exact total
+    if cursor is not None:
+        has_next = cursor_of_next is not None
+    elif total is None or count_mode == "estimate":
+        has_next = len(movies) == limit
+    else:
+        has_next = page < total_pages
 
     return MovieListResponse(
         movies=movie_responses,
         total=total,
+        total_estimated=count_mode == "estimate",
         page=page,
         limit=limit,
         total_pages=total_pages,
-        has_next=page < total_pages,
-        has_previous=page > 1
+        has_next=has_next,
+        # A cursor always continues from an earlier page
+        has_previous=cursor is not None or page > 1,
+        next_cursor=cursor_of_next,
     )
 
 
+@router.get("/movies/autocomplete", response_model=AutocompleteResponse)
+def autocomplete_movies(
+    q: str = Query(..., min_length=1, max_length=100, description="Partially typed title or genre"),
+    limit: int = Query(default=10, ge=1, le=20, description="Maximum number of suggestions (1-20)"),
+    session: Session = Depends(get_db),
+):
+    """
+    Suggest movies and genres while the user types.
+
+    Served from an in-memory prefix and trigram index over movie titles and
+    genre names, without a database round trip per request. Words may be
+    typed in any order, the last one partially, and small typos are tolerated.
+
+    - **q**: The search typed so far
+    - **limit**: Maximum number of suggestions (1-20)
+    """
+    result = autocomplete(session, q, limit)
+    return AutocompleteResponse(**result)
+
+
 @router.get("/movies/{movie_id}/avg-rating", response_model=MovieAverageRatingResponse)
 def get_movie_average_rating(
     movie_id: int,
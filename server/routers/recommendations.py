@@ -1,18 +1,36 @@
-from fastapi import APIRouter, Depends, Query, BackgroundTasks
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 
 from server.backend.postgres import PostgresSessionManager
 from server.schemas.recommendation import (
+    BatchRecommendationRequest,
+    BatchRecommendationResponse,
     RecommendationResponse,
+    SimilarMoviesResponse,
     ModelTrainResponse,
     TrainingStatusResponse,
+    TrainingJobResponse,
+    TrainingJobListResponse,
+    ModelInfoResponse,
+    ModelVersionListResponse,
 )
 from server.services.recommendation_service import (
-    train_recommendation_model,
     get_recommendations_for_user,
+    get_recommendations_for_users,
+    get_model_info,
+    get_similar_movies,
+    list_model_versions,
+)
+from server.services.training_jobs import (
+    cancel_training_job,
+    get_training_job,
     get_training_status,
+    list_training_jobs,
+    submit_training_job,
 )
-from server.utils.errors import bad_request_error, not_found_error
+from server.utils.errors import bad_request_error, not_found_error, validation_error
 
 router = APIRouter(prefix="/api/rest/v1", tags=["recommendations"])
 
@@ -25,66 +43,176 @@ def get_db():
         yield session
 
 
-def train_model_background(session: Session):
-    """Background task wrapper for model training."""
-    try:
-        train_recommendation_model(session)
-    except Exception as e:
-        # Error is already logged in training_status by the service
-        print(f"Background training error: {e}")
-
-
 @router.post("/recommendation-engine", response_model=ModelTrainResponse)
-def train_model(background_tasks: BackgroundTasks, session: Session = Depends(get_db)):
+def train_model(
+    precompute_top_k: int | None = Query(
+        default=None, ge=1, le=1000,
+        description="Precompute the top K recommendations of every user after training (1-1000)",
+    ),
+    factor_dtype: Literal["float64", "float32", "int8"] = Query(
+        default="float64",
+        description="Precision the user and movie factors are stored and served in",
+    ),
+    mode: Literal["auto", "full", "incremental"] = Query(
+        default="auto",
+        description="Retrain from scratch, warm-start from the latest model, or let the policy decide",
+    ),
+    engine: Literal["nmf", "als", "als_ooc"] = Query(
+        default="nmf",
+        description="Factorization engine: sklearn NMF, multithreaded or out-of-core alternating least squares",
+    ),
+    memory_budget_mb: int | None = Query(
+        default=None, ge=64,
+        description="Memory budget of the out-of-core engine's workers in MB (default 1024)",
+    ),
+    session: Session = Depends(get_db),
+):
     """
     Train the recommendation model based on current ratings data (async).
 
-    Uses Non-Negative Matrix Factorization (NMF) to learn user and movie features.
-    Training runs in the background to avoid blocking the API.
+    Uses non-negative matrix factorization to learn user and movie features,
+    either with sklearn's NMF or with the block-parallel ALS engine.
+    Training runs as a job in a separate process, so it doesn't compete with
+    request handling. Only one job can be queued or running at a time across
+    all API workers.
 
-    Returns immediately with training status. Use GET /recommendation-engine/status
-    to check training progress.
+    Returns immediately with the job ID. Use GET /recommendation-engine/status
+    or GET /recommendation-engine/jobs/{job_id} to check training progress.
 
-    **Bonus Feature:** Implements async workload using FastAPI background tasks.
+    - **precompute_top_k**: Optionally materialize each user's top K movies after
+      training, so recommendation requests with n <= K become point lookups
+    - **factor_dtype**: Serve factors as float64, float32, or int8 with per-row
+      scales; reduced precisions report their top-N overlap with float64
+    - **mode**: "incremental" warm-starts from the latest model and runs a few
+      iterations; "auto" (default) falls back to a full retrain when there is
+      no previous model, many ratings are new, or after several incremental runs
+    - **engine**: "nmf" (default) or "als", which solves user and movie blocks
+      in parallel threads and scales better with many ratings; switching
+      engines always retrains from scratch; "als_ooc" streams the ratings
+      snapshot into blocks on disk without building the matrix in memory and
+      solves them in worker processes
+    - **memory_budget_mb**: Memory the "als_ooc" workers may use together; blocks
+      are sized to fit it
     """
-    current_status = get_training_status()
+    params = {
+        "precompute_top_k": precompute_top_k,
+        "factor_dtype": factor_dtype,
+        "mode": mode,
+        "engine": engine,
+        "memory_budget_mb": memory_budget_mb,
+    }
+    job = submit_training_job(session, params)
 
-    if current_status["status"] == "training":
+    if job is None:
         return ModelTrainResponse(
             message="Model training already in progress",
             status="training",
         )
-
-    # Start training in background
-    background_tasks.add_task(train_model_background, session)
+    if job["status"] == "failed":
+        return ModelTrainResponse(
+            message=f"Model training could not start: {job['error']}",
+            status="failed",
+            job_id=job["job_id"],
+        )
 
     return ModelTrainResponse(
         message="Model training started in background",
         status="training",
+        job_id=job["job_id"],
     )
 
 
 @router.get("/recommendation-engine/status", response_model=TrainingStatusResponse)
-def get_model_training_status():
+def get_model_training_status(session: Session = Depends(get_db)):
     """
     Check the status of model training.
 
-    Returns current training status including:
+    Returns the status of the most recent training job:
     - idle: No training has been started
-    - training: Model is currently being trained
+    - training: Model is currently being trained (queued or running)
     - completed: Training finished successfully
     - failed: Training encountered an error
+    - cancelled: Training was cancelled
 
     Use this endpoint to poll training progress after calling POST /recommendation-engine.
     """
-    status = get_training_status()
+    status = get_training_status(session)
     return TrainingStatusResponse(**status)
 
 
+@router.get("/recommendation-engine/jobs", response_model=TrainingJobListResponse)
+def get_training_jobs(
+    limit: int = Query(default=20, ge=1, le=100, description="Number of jobs to return (1-100)"),
+    session: Session = Depends(get_db),
+):
+    """
+    List the most recent training jobs, newest first.
+
+    - **limit**: Number of jobs to return (default: 20, max: 100)
+    """
+    return TrainingJobListResponse(jobs=list_training_jobs(session, limit))
+
+
+@router.get("/recommendation-engine/jobs/{job_id}", response_model=TrainingJobResponse)
+def get_training_job_details(job_id: int, session: Session = Depends(get_db)):
+    """
+    Get one training job, including its current stage and progress.
+
+    - **job_id**: ID of the training job
+    """
+    try:
+        return TrainingJobResponse(**get_training_job(session, job_id))
+    except ValueError:
+        raise not_found_error("training job", job_id)
+
+
+@router.post("/recommendation-engine/jobs/{job_id}/cancel", response_model=TrainingJobResponse)
+def cancel_training(job_id: int, session: Session = Depends(get_db)):
+    """
+    Cancel a queued or running training job.
+
+    A queued job is cancelled immediately. A running job stops at the start
+    of its next training stage; poll the job to see it become cancelled.
+
+    - **job_id**: ID of the training job
+    """
+    try:
+        return TrainingJobResponse(**cancel_training_job(session, job_id))
+    except ValueError as e:
+        error_msg = str(e)
+        if "not found" in error_msg.lower():
+            raise not_found_error("training job", job_id)
+        raise bad_request_error("JOB_NOT_CANCELLABLE", error_msg)
+
+
+@router.get("/recommendation-engine/model", response_model=ModelInfoResponse)
+def get_served_model_info():
+    """
+    Get the recommendation model currently served from memory.
+
+    Returns the loaded model version, when it was trained and when this
+    API process loaded it. A newly trained model is swapped in automatically.
+    """
+    return ModelInfoResponse(**get_model_info())
+
+
+@router.get("/recommendation-engine/models", response_model=ModelVersionListResponse)
+def get_model_versions():
+    """
+    List the model versions kept on disk, newest first.
+
+    Each version carries its training metadata, disk size and training
+    metrics. Only the most recent versions are retained; older ones are
+    garbage collected when a new version is published.
+    """
+    return ModelVersionListResponse(**list_model_versions())
+
+
 @router.get("/user/{user_id}/recommended-movies", response_model=RecommendationResponse)
 def get_user_recommendations(
     user_id: int,
     n: int = Query(default=10, ge=1, le=100, description="Number of recommendations (1-100)"),
+    exclude_rated: bool = Query(default=True, description="Skip movies the user has already rated"),
     session: Session = Depends(get_db),
 ):
     """
@@ -95,6 +223,7 @@ def get_user_recommendations(
 
     - **user_id**: ID of the user to get recommendations for
     - **n**: Number of movie recommendations to return (default: 10, max: 100)
+    - **exclude_rated**: Skip movies the user has already rated (default: true)
 
     Returns list of movie IDs sorted by predicted preference (highest first)
     along with probability scores.
@@ -103,7 +232,7 @@ def get_user_recommendations(
         raise bad_request_error("INVALID_USER_ID", "User ID must be a positive integer")
 
     try:
-        result = get_recommendations_for_user(session, user_id, n)
+        result = get_recommendations_for_user(session, user_id, n, exclude_rated=exclude_rated)
         return RecommendationResponse(
             movie_ids=result["movie_ids"], probabilities=result["probabilities"]
         )
@@ -118,3 +247,71 @@ def get_user_recommendations(
             )
         else:
             raise bad_request_error("RECOMMENDATION_ERROR", error_msg)
+
+
+@router.post("/users/recommended-movies", response_model=BatchRecommendationResponse)
+def get_batch_user_recommendations(
+    request: BatchRecommendationRequest,
+    session: Session = Depends(get_db),
+):
+    """
+    Get movie recommendations for many users in one request.
+
+    Scores all requested users with a single matrix product instead of one
+    request per user. Users not in the trained model get the same popular
+    movies fallback as the single-user endpoint.
+
+    - **user_ids**: IDs of the users to get recommendations for (max 1000)
+    - **n**: Number of movie recommendations per user (default: 10, max: 100)
+    - **exclude_rated**: Skip movies each user has already rated (default: true)
+
+    Returns recommendations in request order. IDs of users that do not
+    exist are listed in not_found_user_ids instead of failing the batch.
+    """
+    try:
+        result = get_recommendations_for_users(
+            session, request.user_ids, request.n, exclude_rated=request.exclude_rated
+        )
+        return BatchRecommendationResponse(**result)
+    except ValueError as e:
+        error_msg = str(e)
+        if "no trained model" in error_msg.lower():
+            raise bad_request_error(
+                "MODEL_NOT_TRAINED",
+                "No recommendation model available. Please train the model first using POST /recommendation-engine",
+            )
+        raise bad_request_error("RECOMMENDATION_ERROR", error_msg)
+
+
+@router.get("/movies/{movie_id}/similar", response_model=SimilarMoviesResponse)
+def get_movie_similar_movies(
+    movie_id: int,
+    n: int = Query(default=10, ge=1, le=100, description="Number of similar movies (1-100)"),
+):
+    """
+    Get movies similar to a given movie.
+
+    Uses a nearest-neighbour index over the movie embeddings learned by the
+    latest recommendation model (cosine similarity). The index is built at
+    training time and versioned with the model.
+
+    - **movie_id**: ID of the movie to find similar movies for
+    - **n**: Number of similar movies to return (default: 10, max: 100)
+    """
+    if movie_id < 1:
+        raise validation_error("movie_id", "Must be a positive integer")
+
+    try:
+        result = get_similar_movies(movie_id, n)
+        return SimilarMoviesResponse(movie_id=movie_id, **result)
+    except ValueError as e:
+        error_msg = str(e)
+        if "not found" in error_msg.lower():
+            raise not_found_error("movie", movie_id)
+        elif "no trained model" in error_msg.lower():
+            raise bad_request_error(
+                "MODEL_NOT_TRAINED",
+                "No recommendation model available. Please train the model first using POST /recommendation-engine",
+            )
+        else:
+            raise bad_request_error("RECOMMENDATION_ERROR", error_msg)
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -14,12 +16,20 @@ class MovieListResponse(BaseModel):
     """Schema for paginated movie list response."""
 
     movies: list[MovieResponse] = Field(..., description="List of movies")
-    total: int = Field(..., ge=0, description="Total number of movies matching the query")
-    page: int = Field(..., ge=1, description="Current page number")
+    total: int | None = Field(
+        ..., ge=0, description="Total number of movies matching the query; null with count_mode=none"
+    )
+    total_estimated: bool = Field(False, description="Whether total was requested as an estimate (count_mode=estimate)")
+    page: int = Field(..., ge=1, description="Current page number; not meaningful when paging by cursor")
     limit: int = Field(..., ge=1, le=100, description="Number of movies per page")
-    total_pages: int = Field(..., ge=0, description="Total number of pages")
+    total_pages: int | None = Field(
+        ..., ge=0, description="Total number of pages; null with count_mode=none. Doesn't locate cursor pages"
+    )
     has_next: bool = Field(..., description="Whether there is a next page available")
-    has_previous: bool = Field(..., description="Whether there is a previous page available")
+    has_previous: bool = Field(..., description="Whether there is a previous page available; always true for cursor pages")
+    next_cursor: str | None = Field(
+        None, description="Cursor of the next page (pass as cursor); null on the last page or with relevance ordering"
+    )
 
 
 class MovieAverageRatingResponse(BaseModel):
@@ -29,3 +39,18 @@ class MovieAverageRatingResponse(BaseModel):
     title: str = Field(..., description="Movie title")
     avg_rating: float = Field(..., ge=0.0, le=5.0, description="Average rating (0.0-5.0)")
     total_ratings: int = Field(..., ge=0, description="Total number of ratings")
+
+
+class AutocompleteSuggestion(BaseModel):
+    """Schema for a single autocomplete suggestion."""
+
+    type: Literal["movie", "genre"] = Field(..., description="Whether the suggestion is a movie or a genre")
+    id: int = Field(..., description="Movie or genre ID")
+    label: str = Field(..., description="Movie title or genre name")
+
+
+class AutocompleteResponse(BaseModel):
+    """Schema for autocomplete suggestions response."""
+
+    query: str = Field(..., description="The partially typed search")
+    suggestions: list[AutocompleteSuggestion] = Field(..., description="Suggestions, best match first")
@@ -1,3 +1,5 @@
+from typing import Annotated
+
 from pydantic import BaseModel, Field
 
 
@@ -8,19 +10,150 @@ class RecommendationResponse(BaseModel):
     probabilities: list[float] = Field(..., description="Probability scores for each recommendation")
 
 
+class BatchRecommendationRequest(BaseModel):
+    """Schema for requesting recommendations for many users at once."""
+
+    user_ids: list[Annotated[int, Field(gt=0)]] = Field(
+        ..., min_length=1, max_length=1000, description="User IDs to recommend for (1-1000, positive)"
+    )
+    n: int = Field(10, ge=1, le=100, description="Number of recommendations per user (1-100)")
+    exclude_rated: bool = Field(True, description="Skip movies each user has already rated")
+
+
+class UserRecommendation(BaseModel):
+    """Schema for one user's recommendations within a batch response."""
+
+    user_id: int = Field(..., description="User ID")
+    movie_ids: list[int] = Field(..., description="List of recommended movie IDs")
+    probabilities: list[float] = Field(..., description="Probability scores for each recommendation")
+
+
+class BatchRecommendationResponse(BaseModel):
+    """Schema for batch movie recommendations response."""
+
+    recommendations: list[UserRecommendation] = Field(..., description="Recommendations per existing user")
+    not_found_user_ids: list[int] = Field(default_factory=list, description="Requested user IDs that do not exist")
+
+
+class SimilarMoviesResponse(BaseModel):
+    """Schema for movies similar to a given movie."""
+
+    movie_id: int = Field(..., description="Movie ID the similar movies are for")
+    movie_ids: list[int] = Field(..., description="List of similar movie IDs, most similar first")
+    similarities: list[float] = Field(..., description="Cosine similarity for each movie")
+    model_version: str = Field(..., description="Version of the model the index belongs to")
+
+
 class ModelTrainResponse(BaseModel):
     """Schema for model training response (async)."""
 
     message: str = Field(..., description="Status message")
     status: str = Field(..., description="Training status: training, completed, failed")
+    job_id: int | None = Field(None, description="ID of the started training job")
+
+
+class TrainingStageMetrics(BaseModel):
+    """Schema for the timing and memory of one training stage."""
+
+    stage: str = Field(..., description="Training stage")
+    seconds: float = Field(..., description="Wall time of the stage")
+    peak_rss_mb: float = Field(..., description="Peak memory of the training process at the end of the stage (MB)")
+
+
+class TrainingMatrixMetrics(BaseModel):
+    """Schema for the shape of the rating matrix a model was trained on."""
+
+    n_users: int = Field(..., description="Rows (users) of the rating matrix")
+    n_movies: int = Field(..., description="Columns (movies) of the rating matrix")
+    n_ratings: int = Field(..., description="Stored ratings")
+    density: float = Field(..., description="Fraction of user/movie cells that have a rating")
+    size_mb: float = Field(..., description="Memory of the sparse matrix (MB)")
+
+
+class TrainingIterationMetrics(BaseModel):
+    """Schema for the reconstruction error after one factorization iteration."""
+
+    iteration: int = Field(..., description="Iteration number, from 1")
+    error: float | None = Field(None, description="Reconstruction error (Frobenius norm)")
+
+
+class TrainingMetricsResponse(BaseModel):
+    """Schema for the instrumentation of one training run."""
+
+    total_seconds: float = Field(..., description="Wall time of the whole training run")
+    peak_rss_mb: float = Field(..., description="Peak memory of the training process (MB)")
+    stages: list[TrainingStageMetrics] = Field(default_factory=list, description="Stages in execution order")
+    matrix: TrainingMatrixMetrics | None = Field(None, description="Rating matrix shape and density")
+    iterations: list[TrainingIterationMetrics] = Field(
+        default_factory=list, description="Error per iteration (NMF reports its final iteration only)"
+    )
 
 
 class TrainingStatusResponse(BaseModel):
     """Schema for training status check response."""
 
-    status: str = Field(..., description="Current status: idle, training, completed, failed")
+    status: str = Field(..., description="Current status: idle, training, completed, failed, cancelled")
+    job_id: int | None = Field(None, description="ID of the most recent training job")
+    stage: str | None = Field(None, description="Training stage in progress (if training)")
+    progress: float | None = Field(None, description="Fraction of training completed (0-1)")
     started_at: str | None = Field(None, description="When training started")
     completed_at: str | None = Field(None, description="When training completed")
     model_version: str | None = Field(None, description="Version of trained model (if completed)")
     total_ratings: int | None = Field(None, description="Number of ratings used (if completed)")
+    metrics: TrainingMetricsResponse | None = Field(None, description="Training instrumentation (if completed)")
+    error: str | None = Field(None, description="Error message (if failed)")
+
+
+class TrainingJobResponse(BaseModel):
+    """Schema for one training job."""
+
+    job_id: int = Field(..., description="Training job ID")
+    status: str = Field(..., description="Job status: queued, running, completed, failed, cancelled")
+    params: dict = Field(default_factory=dict, description="Training parameters")
+    stage: str | None = Field(None, description="Training stage last started")
+    progress: float = Field(0.0, description="Fraction of training completed (0-1)")
+    cancel_requested: bool = Field(False, description="Whether cancellation was requested")
+    created_at: str | None = Field(None, description="When the job was submitted")
+    started_at: str | None = Field(None, description="When training started")
+    completed_at: str | None = Field(None, description="When the job finished")
+    model_version: str | None = Field(None, description="Version of trained model (if completed)")
+    total_ratings: int | None = Field(None, description="Number of ratings used (if completed)")
+    result: dict | None = Field(None, description="Training result details (if completed)")
     error: str | None = Field(None, description="Error message (if failed)")
+
+
+class TrainingJobListResponse(BaseModel):
+    """Schema for a list of training jobs."""
+
+    jobs: list[TrainingJobResponse] = Field(..., description="Training jobs, newest first")
+
+
+class ModelInfoResponse(BaseModel):
+    """Schema for the model currently served by the API."""
+
+    loaded: bool = Field(..., description="Whether a trained model is loaded in memory")
+    model_version: str | None = Field(None, description="Version of the loaded model")
+    trained_at: str | None = Field(None, description="When the loaded model was trained")
+    loaded_at: str | None = Field(None, description="When this process loaded the model")
+
+
+class ModelVersionResponse(BaseModel):
+    """Schema for one registered model version."""
+
+    version: str = Field(..., description="Model version")
+    trained_at: str | None = Field(None, description="When the version was trained")
+    training_engine: str | None = Field(None, description="Factorization engine used")
+    training_mode: str | None = Field(None, description="full or incremental")
+    factor_dtype: str | None = Field(None, description="Precision the factors are served in")
+    n_components: int | None = Field(None, description="Number of latent factors")
+    total_ratings: int | None = Field(None, description="Number of ratings trained on")
+    reconstruction_err: float | None = Field(None, description="Final reconstruction error")
+    size_bytes: int = Field(..., description="Disk space used by the version")
+    metrics: dict | None = Field(None, description="Training stage timings, memory and matrix shape")
+
+
+class ModelVersionListResponse(BaseModel):
+    """Schema for the model registry."""
+
+    latest: str | None = Field(None, description="Version currently published as latest")
+    versions: list[ModelVersionResponse] = Field(..., description="Retained versions, newest first")
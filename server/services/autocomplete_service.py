@@ -0,0 +1,375 @@
+import bisect
+import heapq
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from server.models.genres import GenreModel
+from server.models.movies import MovieModel
+
+logger = logging.getLogger(__name__)
+
+# Word prefixes longer than this share the posting list of their first
+# AUTOCOMPLETE_PREFIX_LENGTH characters and are verified against the words
+AUTOCOMPLETE_PREFIX_LENGTH = 8
+
+# Matching entries ranked per query; bounds the latency of very short queries
+AUTOCOMPLETE_MAX_CANDIDATES = 1000
+
+# A mistyped word is replaced by vocabulary words sharing at least this
+# fraction of trigrams with it (Jaccard), at most AUTOCOMPLETE_FUZZY_WORDS of them
+AUTOCOMPLETE_MIN_SIMILARITY = 0.4
+AUTOCOMPLETE_FUZZY_WORDS = 5
+
+# Seconds between checks of the database for movies and genres added since
+AUTOCOMPLETE_REFRESH_SECONDS = 60
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def normalize_words(text: str) -> list[str]:
+    """Split text into lowercase words without accents ("Amélie!" -> ["amelie"])."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return _WORD_RE.findall(stripped.lower())
+
+
+def _trigrams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AutocompleteIndex:
+    """
+    In-memory prefix and trigram index over movie titles and genre names.
+
+    Every word of every entry is indexed under each of its prefixes (up to
+    AUTOCOMPLETE_PREFIX_LENGTH characters), so a query matches entries
+    whose words start with the query's words, in any order. A query word
+    that is no word prefix at all (a typo) is replaced by the vocabulary
+    words most similar to it by trigrams.
+
+    Entries whose whole label starts with the query outrank all other
+    movies, so the best of them are found separately, in a sorted list of
+    labels, rather than through the capped scan of the posting lists.
+
+    Entries are added incrementally and removed by tombstoning, so
+    searches never wait for a rebuild. Writers hold a lock; readers don't,
+    and at worst miss an entry being added concurrently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: list[dict | None] = []
+        self._positions: dict[tuple[str, int], int] = {}
+        self._prefixes: dict[str, list[int]] = {}
+        self._word_trigrams: dict[str, set[str]] = {}
+        self._trigram_counts: dict[str, int] = {}
+        # Normalized labels in order, with positions and rank keys; rebuilt
+        # after entries changed
+        self._sorted_keys: tuple[list[str], np.ndarray, np.ndarray] | None = None
+        self.max_movie_id = 0
+        self.max_genre_id = 0
+        self.n_movies = 0
+        self.refreshed_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _add(self, kind: str, entry_id: int, label: str):
+        if (kind, entry_id) in self._positions:
+            self._remove(kind, entry_id)
+
+        words = normalize_words(label)
+        position = len(self._entries)
+        self._entries.append(
+            {"type": kind, "id": entry_id, "label": label, "words": words, "key": " ".join(words)}
+        )
+        self._positions[(kind, entry_id)] = position
+        self._sorted_keys = None
+
+        prefixes = {word[:n] for word in words for n in range(1, min(len(word), AUTOCOMPLETE_PREFIX_LENGTH) + 1)}
+        for prefix in prefixes:
+            self._prefixes.setdefault(prefix, []).append(position)
+        for word in words:
+            if word not in self._trigram_counts:
+                trigrams = _trigrams(word)
+                self._trigram_counts[word] = len(trigrams)
+                for trigram in trigrams:
+                    self._word_trigrams.setdefault(trigram, set()).add(word)
+
+        if kind == "movie":
+            self.max_movie_id = max(self.max_movie_id, entry_id)
+            self.n_movies += 1
+        else:
+            self.max_genre_id = max(self.max_genre_id, entry_id)
+
+    def _remove(self, kind: str, entry_id: int):
+        position = self._positions.pop((kind, entry_id), None)
+        if position is not None:
+            self._entries[position] = None
+            self._sorted_keys = None
+            if kind == "movie":
+                self.n_movies -= 1
+
+    def add_movie(self, movie_id: int, title: str):
+        """Add or replace a movie's title."""
+        with self._lock:
+            self._add("movie", movie_id, title)
+
+    def add_genre(self, genre_id: int, name: str):
+        """Add or replace a genre's name."""
+        with self._lock:
+            self._add("genre", genre_id, name)
+
+    def remove_movie(self, movie_id: int):
+        """Remove a movie from suggestions."""
+        with self._lock:
+            self._remove("movie", movie_id)
+
+    def refresh(self, session: Session) -> bool:
+        """
+        Add genres and movies created since the index was built or refreshed.
+
+        New rows are found by id, so only they are read. Returns False,
+        without changing the index, if the movie count shows that movies
+        were deleted; the index must then be rebuilt.
+        """
+        genres = session.query(GenreModel.id, GenreModel.name).filter(GenreModel.id > self.max_genre_id).all()
+        movies = session.query(MovieModel.id, MovieModel.title).filter(MovieModel.id > self.max_movie_id).all()
+        total_movies = session.query(func.count(MovieModel.id)).scalar()
+        if total_movies != self.n_movies + len(movies):
+            return False
+
+        with self._lock:
+            for genre_id, name in genres:
+                self._add("genre", genre_id, name)
+            for movie_id, title in movies:
+                self._add("movie", movie_id, title)
+        self._sort_keys()
+        self.refreshed_at = time.monotonic()
+        if genres or movies:
+            logger.info("Added %d genres and %d movies to the autocomplete index", len(genres), len(movies))
+        return True
+
+    def _sort_keys(self) -> tuple[list[str], np.ndarray, np.ndarray]:
+        """
+        Sort the entries by normalized label, if they changed since last time.
+
+        Every entry also gets an integer rank key ordering genres before
+        movies, then shorter labels and lower ids first, as search ranks
+        entries of the same kind of match.
+        """
+        sorted_keys = self._sorted_keys
+        if sorted_keys is None:
+            entries = self._entries
+            rows = sorted(
+                (entry["key"], position, entry)
+                for position in list(self._positions.values())
+                if (entry := entries[position]) is not None
+            )
+            rank_keys = np.array(
+                [(int(entry["type"] != "genre") << 62) | (min(len(entry["label"]), 1 << 20) << 32) | entry["id"]
+                 for _, _, entry in rows],
+                dtype=np.int64,
+            )
+            positions = np.array([position for _, position, _ in rows], dtype=np.int64)
+            sorted_keys = self._sorted_keys = ([key for key, _, _ in rows], positions, rank_keys)
+        return sorted_keys
+
+    def _leading_matches(self, normalized_query: str, limit: int) -> list[int]:
+        """
+        Positions of the best-ranked entries whose normalized label starts
+        with the normalized query: up to limit exact matches, and up to
+        limit others.
+        """
+        keys, positions, rank_keys = self._sort_keys()
+        start = bisect.bisect_left(keys, normalized_query)
+        exact_end = bisect.bisect_right(keys, normalized_query, lo=start)
+        end = bisect.bisect_left(keys, normalized_query + "\U0010ffff", lo=exact_end)
+
+        def best(lo: int, hi: int) -> list[int]:
+            if hi - lo > limit:
+                return positions[lo + np.argpartition(rank_keys[lo:hi], limit)[:limit]].tolist()
+            return positions[lo:hi].tolist()
+
+        return best(start, exact_end) + best(exact_end, end)
+
+    def _similar_words(self, token: str) -> set[str]:
+        """Vocabulary words sharing the most trigrams with a (mistyped) token."""
+        token_trigrams = _trigrams(token)
+        shared = Counter()
+        for trigram in token_trigrams:
+            shared.update(self._word_trigrams.get(trigram, ()))
+
+        scored = []
+        for word, count in shared.items():
+            similarity = count / (len(token_trigrams) + self._trigram_counts[word] - count)
+            if similarity >= AUTOCOMPLETE_MIN_SIMILARITY:
+                scored.append((similarity, word))
+        return {word for _, word in heapq.nlargest(AUTOCOMPLETE_FUZZY_WORDS, scored)}
+
+    def search(self, query: str, limit: int = 10) -> list[dict]:
+        """
+        Return up to limit suggestions for a partially typed query.
+
+        Every query word must be the start of one of the entry's words or,
+        if it starts no word at all (a typo), one of the vocabulary words
+        most similar to it. Suggestions are ranked exact matches first, then
+        genres, labels starting with the query, matches without typos,
+        shorter labels, and id.
+
+        Returns list of dicts with type ("movie" or "genre"), id and label.
+        """
+        tokens = normalize_words(query)
+        if not tokens:
+            return []
+
+        # Candidate positions per token, and the words a mistyped token stands for
+        postings, corrections = [], []
+        for token in tokens:
+            found = self._prefixes.get(token[:AUTOCOMPLETE_PREFIX_LENGTH])
+            # Tokens longer than the indexed prefixes may still be mistyped further on
+            if found and len(token) > AUTOCOMPLETE_PREFIX_LENGTH:
+                found = found if any(
+                    self._entries[position] is not None
+                    and any(word.startswith(token) for word in self._entries[position]["words"])
+                    for position in found
+                ) else None
+            if found:
+                postings.append(found)
+                corrections.append(None)
+                continue
+            similar = self._similar_words(token)
+            if not similar:
+                return []
+            positions = set()
+            for word in similar:
+                positions.update(self._prefixes.get(word[:AUTOCOMPLETE_PREFIX_LENGTH], ()))
+            postings.append(sorted(positions))
+            corrections.append(similar)
+
+        def token_matches(words: list[str], token: str, correction: set[str] | None) -> bool:
+            if correction is not None:
+                return any(word in correction for word in words)
+            return any(word.startswith(token) for word in words)
+
+        normalized_query = " ".join(tokens)
+        fuzzy = any(correction is not None for correction in corrections)
+        # Scan the shortest posting list; the token it belongs to needs no check
+        driving = min(range(len(tokens)), key=lambda i: len(postings[i]))
+        checks = [
+            (token, correction)
+            for i, (token, correction) in enumerate(zip(tokens, corrections))
+            if i != driving or correction is not None or len(token) > AUTOCOMPLETE_PREFIX_LENGTH
+        ]
+
+        def rank(entry: dict) -> tuple:
+            return (
+                entry["key"] != normalized_query,
+                entry["type"] != "genre",
+                not entry["key"].startswith(normalized_query),
+                fuzzy,
+                len(entry["label"]),
+                entry["id"],
+            )
+
+        # Labels starting with the query (exact matches included) outrank
+        # every other movie, so the best of them are looked up apart from
+        # the capped scan below
+        leading = self._leading_matches(normalized_query, limit)
+        ranked = [
+            (rank(entry), entry) for position in leading if (entry := self._entries[position]) is not None
+        ]
+
+        leading = set(leading)
+        scanned = 0
+        for position in postings[driving]:
+            entry = self._entries[position]
+            if entry is None or position in leading or not all(
+                token_matches(entry["words"], token, correction) for token, correction in checks
+            ):
+                continue
+            ranked.append((rank(entry), entry))
+            scanned += 1
+            if scanned >= AUTOCOMPLETE_MAX_CANDIDATES:
+                break
+
+        return [
+            {"type": entry["type"], "id": entry["id"], "label": entry["label"]}
+            for _, entry in heapq.nsmallest(limit, ranked, key=lambda item: item[0])
+        ]
+
+
+def build_autocomplete_index(session: Session) -> AutocompleteIndex:
+    """Build an index of every genre and movie in the database."""
+    genres = session.query(GenreModel.id, GenreModel.name).order_by(GenreModel.id).all()
+    movies = session.query(MovieModel.id, MovieModel.title).order_by(MovieModel.id).all()
+
+    index = AutocompleteIndex()
+    for genre_id, name in genres:
+        index._add("genre", genre_id, name)
+    for movie_id, title in movies:
+        index._add("movie", movie_id, title)
+    index._sort_keys()
+    logger.info("Built autocomplete index: %d genres, %d movies", len(genres), len(movies))
+    return index
+
+
+# Process-wide index, built on first use (or at startup) and refreshed periodically.
+# Rebuilds replace the reference, so searches in flight keep the index they started with.
+_index: AutocompleteIndex | None = None
+_index_lock = threading.Lock()
+
+
+def warm_autocomplete_index(session: Session):
+    """(Re)build the process-wide index, e.g. at startup."""
+    global _index
+    _index = build_autocomplete_index(session)
+
+
+def get_autocomplete_index(session: Session) -> AutocompleteIndex:
+    """
+    Return the process-wide index, building or refreshing it when due.
+
+    Only one request refreshes at a time; the others keep searching the
+    index as it is meanwhile.
+    """
+    global _index
+    index = _index
+    if index is not None and time.monotonic() - index.refreshed_at <= AUTOCOMPLETE_REFRESH_SECONDS:
+        return index
+
+    if not _index_lock.acquire(blocking=index is None):
+        return index
+    try:
+        if _index is None:
+            _index = build_autocomplete_index(session)
+        elif time.monotonic() - _index.refreshed_at > AUTOCOMPLETE_REFRESH_SECONDS:
+            if not _index.refresh(session):
+                _index = build_autocomplete_index(session)
+        return _index
+    finally:
+        _index_lock.release()
+
+
+def autocomplete(session: Session, query: str, limit: int = 10) -> dict:
+    """
+    Suggest movies and genres for a partially typed search.
+
+    Served from the in-memory index. The database is only queried to build
+    the index the first time, and at most every AUTOCOMPLETE_REFRESH_SECONDS
+    to pick up new movies and genres.
+
+    Returns dict with query and suggestions.
+    """
+    index = get_autocomplete_index(session)
+    return {"query": query, "suggestions": index.search(query, limit)}
@@ -0,0 +1,147 @@
+import time
+
+import numpy as np
+
+from server.services.training_data import build_rating_matrix
+from server.services.training_engines import get_training_engine
+from server.services.training_metrics import peak_rss_mb
+
+# Newest fraction of the ratings held out for testing
+TEST_FRACTION = 0.2
+
+# Cutoff of precision@k / recall@k, and the rating a held-out movie needs
+# to count as relevant
+EVALUATION_K = 10
+RELEVANCE_THRESHOLD = 4.0
+
+# Test users scored per matrix product
+EVALUATION_BLOCK_USERS = 256
+
+
+def time_split(ratings: dict, test_fraction: float = TEST_FRACTION) -> tuple[dict, dict]:
+    """
+    Split ratings by time: the newest test_fraction of them become the test set.
+
+    ratings is the output of extract_ratings(include_timestamps=True).
+    Splitting on time instead of at random mirrors production, where the
+    model only ever sees the past. Returns (train, test) dicts with
+    user_ids, movie_ids and ratings.
+    """
+    order = np.argsort(ratings["timestamps"], kind="stable")
+    n_train = len(order) - int(round(len(order) * test_fraction))
+    keys = ("user_ids", "movie_ids", "ratings")
+    train = {key: np.asarray(ratings[key])[order[:n_train]] for key in keys}
+    test = {key: np.asarray(ratings[key])[order[n_train:]] for key in keys}
+    return train, test
+
+
+def _positions(ids: np.ndarray, values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Index of every value in the sorted ids array, and which values were found."""
+    positions = np.searchsorted(ids, values).clip(max=len(ids) - 1)
+    return positions, ids[positions] == values
+
+
+def evaluate_factors(
+    rating_matrix: dict,
+    user_features: np.ndarray,
+    item_features: np.ndarray,
+    test: dict,
+    k: int = EVALUATION_K,
+    relevance_threshold: float = RELEVANCE_THRESHOLD,
+) -> dict:
+    """
+    Score trained factors against held-out ratings.
+
+    rating_matrix is the build_rating_matrix output the factors were
+    trained on. RMSE covers test ratings whose user and movie are both in
+    the training data. precision@k and recall@k rank each test user's
+    movies (excluding those rated in training) and compare the top k with
+    the test movies they rated at least relevance_threshold; movies absent
+    from the training data can't be recommended and are not counted.
+
+    Returns dict with precision_at_k, recall_at_k, rmse, and the number
+    of rmse_ratings and ranking_users they were computed over.
+    """
+    rows, known_users = _positions(rating_matrix["user_ids"], test["user_ids"])
+    cols, known_movies = _positions(rating_matrix["movie_ids"], test["movie_ids"])
+    known = known_users & known_movies
+    rows, cols, test_ratings = rows[known], cols[known], np.asarray(test["ratings"])[known]
+
+    rmse = None
+    if len(rows):
+        predictions = np.einsum("ij,ji->i", user_features[rows], item_features[:, cols])
+        rmse = float(np.sqrt(np.mean((predictions - test_ratings) ** 2)))
+
+    relevant = test_ratings >= relevance_threshold
+    relevant_rows, relevant_cols = rows[relevant], cols[relevant]
+    users = np.unique(relevant_rows)
+    k = min(k, item_features.shape[1])
+    precision = recall = 0.0
+    seen = rating_matrix["matrix"]
+
+    for start in range(0, len(users), EVALUATION_BLOCK_USERS):
+        block = users[start:start + EVALUATION_BLOCK_USERS]
+        scores = user_features[block] @ item_features
+        block_seen = seen[block].tocoo()
+        scores[block_seen.row, block_seen.col] = -np.inf
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+        # One boolean row per user marking the movies they rated relevant in the test set
+        in_block = np.isin(relevant_rows, block)
+        relevant_mask = np.zeros(scores.shape, dtype=bool)
+        relevant_mask[np.searchsorted(block, relevant_rows[in_block]), relevant_cols[in_block]] = True
+
+        hits = np.take_along_axis(relevant_mask, top, axis=1).sum(axis=1)
+        precision += float(np.sum(hits / k))
+        recall += float(np.sum(hits / relevant_mask.sum(axis=1)))
+
+    n_users = len(users)
+    return {
+        "precision_at_k": precision / n_users if n_users else None,
+        "recall_at_k": recall / n_users if n_users else None,
+        "rmse": rmse,
+        "rmse_ratings": int(len(rows)),
+        "ranking_users": int(n_users),
+    }
+
+
+def evaluate_config(
+    train: dict,
+    test: dict,
+    config: dict,
+    k: int = EVALUATION_K,
+    relevance_threshold: float = RELEVANCE_THRESHOLD,
+) -> dict:
+    """
+    Train one candidate configuration and evaluate it on the test set.
+
+    config holds engine, n_components and max_iter (None for the engine's
+    default). n_components is capped like in training (below the smaller
+    matrix dimension). Meant to run in a fresh worker process, so
+    peak_rss_mb reflects this configuration alone.
+
+    Returns the config with the metrics of evaluate_factors plus
+    train_seconds, n_iter, reconstruction_err and peak_rss_mb.
+    """
+    rating_matrix = build_rating_matrix(train["user_ids"], train["movie_ids"], train["ratings"])
+    matrix = rating_matrix["matrix"]
+    n_components = min(config["n_components"], min(matrix.shape) - 1)
+
+    start = time.perf_counter()
+    fit = get_training_engine(config["engine"]).fit(
+        matrix, n_components, max_iter=config.get("max_iter")
+    )
+    train_seconds = time.perf_counter() - start
+
+    scores = evaluate_factors(
+        rating_matrix, fit["user_features"], fit["item_features"], test, k, relevance_threshold
+    )
+    return {
+        **config,
+        "n_components": n_components,
+        **scores,
+        "train_seconds": round(train_seconds, 3),
+        "n_iter": fit["n_iter"],
+        "reconstruction_err": fit["reconstruction_err"],
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
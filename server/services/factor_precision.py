@@ -0,0 +1,101 @@
+import numpy as np
+
+from server.services.scoring import score_rows, top_n_indices
+
+# Storage precisions the factor matrices can be served in
+FACTOR_DTYPES = ("float64", "float32", "int8")
+
+# Users sampled, and list length compared, by the accuracy check
+ACCURACY_SAMPLE_USERS = 1000
+ACCURACY_TOP_N = 10
+
+
+def quantize_rows(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize each row of a matrix to int8 with its own scale.
+
+    Symmetric quantization: row r is stored as round(row / scale[r]) with
+    scale[r] = max(|row|) / 127, so values dequantize as q * scale.
+    All-zero rows get a scale of 1. Returns (int8 values, float32 scales).
+    """
+    max_abs = np.abs(matrix).max(axis=1)
+    scales = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    values = np.rint(matrix / scales[:, np.newaxis]).clip(-127, 127).astype(np.int8)
+    return values, scales
+
+
+def reduce_precision(user_features: np.ndarray, item_features: np.ndarray, dtype: str) -> dict:
+    """
+    Convert float64 factor matrices to the given serving precision.
+
+    float32 halves the factors. int8 quantizes every user row and every
+    movie (column of the k x movies item matrix) separately, storing an
+    int8 matrix plus a float32 scale per user and per movie.
+
+    Returns dict with user_features, item_features and factor_dtype, plus
+    user_scales and item_scales for int8, to store with the model.
+    """
+    if dtype not in FACTOR_DTYPES:
+        raise ValueError(f"Unsupported factor dtype: {dtype}")
+
+    if dtype == "int8":
+        user_values, user_scales = quantize_rows(user_features)
+        item_values, item_scales = quantize_rows(item_features.T)
+        return {
+            "factor_dtype": dtype,
+            "user_features": user_values,
+            "item_features": np.ascontiguousarray(item_values.T),
+            "user_scales": user_scales,
+            "item_scales": item_scales,
+        }
+
+    return {
+        "factor_dtype": dtype,
+        "user_features": user_features.astype(dtype),
+        "item_features": item_features.astype(dtype),
+    }
+
+
+def restore_precision(model_data: dict) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return a model's (user, item) factors as float64, dequantizing int8.
+
+    Used to warm-start training from a stored model whatever precision it
+    is served in.
+    """
+    user_features = np.asarray(model_data["user_features"], dtype=np.float64)
+    item_features = np.asarray(model_data["item_features"], dtype=np.float64)
+
+    if "user_scales" in model_data:
+        user_features *= model_data["user_scales"][:, np.newaxis]
+        item_features *= model_data["item_scales"]
+
+    return user_features, item_features
+
+
+def top_n_overlap(
+    reference: dict,
+    candidate: dict,
+    n: int = ACCURACY_TOP_N,
+    sample_users: int = ACCURACY_SAMPLE_USERS,
+    seed: int = 0,
+) -> float:
+    """
+    Measure how well reduced-precision factors preserve recommendations.
+
+    Scores a sample of users with both factor sets (already-rated movies
+    are not masked) and returns the mean fraction of the reference top N
+    that the candidate top N also contains (1.0 = identical lists).
+    """
+    n_users = reference["user_features"].shape[0]
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(n_users, size=min(sample_users, n_users), replace=False))
+
+    expected = top_n_indices(score_rows(reference, rows), n)
+    actual = top_n_indices(score_rows(candidate, rows), n)
+
+    overlap = [
+        len(np.intersect1d(expected_row, actual_row)) / expected_row.size
+        for expected_row, actual_row in zip(expected, actual)
+    ]
+    return float(np.mean(overlap))
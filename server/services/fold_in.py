@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy.linalg import cholesky, solve_triangular
+from scipy.optimize import nnls
+
+from server.services.scoring import DEQUANTIZE_BLOCK_SIZE
+
+# Folded-in users kept per process
+FOLD_IN_CACHE_SIZE = 10_000
+
+# Relative ridge added to the Gram matrix so its Cholesky factor exists
+# even when some latent components are (nearly) unused
+GRAM_RIDGE = 1e-10
+
+
+def item_columns(model_data: dict, columns: np.ndarray) -> np.ndarray:
+    """Return the (k x len(columns)) item factors of some movies as float64."""
+    block = model_data["item_features"][:, columns].astype(np.float64)
+    item_scales = model_data.get("item_scales")
+    if item_scales is not None:
+        block *= item_scales[columns]
+    return block
+
+
+def build_fold_in_factor(model_data: dict) -> np.ndarray:
+    """
+    Precompute the Cholesky factor L of the item Gram matrix H H^T.
+
+    NMF is fit on the user x movie matrix with unrated movies as 0, so
+    the user vector consistent with training solves
+    min ||H^T w - r||, w >= 0, over all movies. Expanding the norm gives
+    w^T (H H^T) w - 2 w^T (H r), which only needs the (k x k) Gram matrix
+    and the columns of the movies the user rated. With H H^T = L L^T this
+    is the small NNLS problem min ||L^T w - L^-1 H r||.
+    """
+    n_movies = model_data["item_features"].shape[1]
+    gram = np.zeros((model_data["item_features"].shape[0],) * 2)
+    for start in range(0, n_movies, DEQUANTIZE_BLOCK_SIZE):
+        block = item_columns(model_data, np.arange(start, min(start + DEQUANTIZE_BLOCK_SIZE, n_movies)))
+        gram += block @ block.T
+
+    gram[np.diag_indices_from(gram)] += GRAM_RIDGE * max(np.trace(gram), 1.0)
+    return cholesky(gram, lower=True)
+
+
+def fold_in_user(model_data: dict, movie_ids: list[int], ratings: list[float]) -> np.ndarray | None:
+    """
+    Project a user's ratings onto the fixed item factors (non-negative).
+
+    Movies the model doesn't know are ignored. Returns the user factor
+    vector, or None if none of the rated movies are in the model or the
+    projection is all zeros (nothing to personalize with).
+    model_data must hold the fold_in_factor from build_fold_in_factor.
+    """
+    movie_index = model_data["movie_index"]
+    known = [(movie_index[m], r) for m, r in zip(movie_ids, ratings) if m in movie_index]
+    if not known:
+        return None
+
+    columns, values = zip(*known)
+    target = item_columns(model_data, np.array(columns)) @ np.array(values, dtype=np.float64)
+
+    factor = model_data["fold_in_factor"]
+    vector, _ = nnls(factor.T, solve_triangular(factor, target, lower=True))
+    return vector if vector.any() else None
+
+
+class FoldInCache:
+    """
+    LRU cache of folded-in user vectors, keyed by user id.
+
+    Entries remember the model version and the freshness of the user's
+    ratings (their count and latest timestamp, read with one cheap query)
+    they were computed against, and are ignored once either changed. A
+    rating written through any API worker therefore misses the cache in
+    every worker; the ratings service additionally drops the entry in its
+    own process right away.
+    """
+
+    def __init__(self, max_size: int = FOLD_IN_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, tuple] = OrderedDict()
+
+    def get(self, user_id: int, version: str, freshness: tuple) -> tuple[np.ndarray | None, list[int]] | None:
+        """Return (vector, rated movie ids) cached for this model version and ratings freshness, or None."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != (version, freshness):
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1], entry[2]
+
+    def put(
+        self, user_id: int, version: str, freshness: tuple, vector: np.ndarray | None, movie_ids: list[int]
+    ):
+        """Cache a folded-in vector (None for users that can't be personalized)."""
+        with self._lock:
+            self._entries[user_id] = ((version, freshness), vector, movie_ids)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        """Drop the cached vector of a user."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide cache, invalidated by the ratings service
+fold_in_cache = FoldInCache()
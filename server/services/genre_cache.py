@@ -0,0 +1,61 @@
+import threading
+from typing import NamedTuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from server.models.genres import GenreModel
+
+
+class GenreRow(NamedTuple):
+    """A genre as listed with a movie."""
+
+    id: int
+    name: str
+
+
+class GenreCache:
+    """
+    Process-wide dictionary of genres by id.
+
+    The genres table is tiny and almost never changes, so it is read once
+    and kept in memory. Asking for an id it doesn't know (a genre added by
+    another process) reloads it; genre writes in this process clear it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._genres: dict[int, GenreRow] | None = None
+
+    def _load(self, session: Session) -> dict[int, GenreRow]:
+        genres = {
+            genre_id: GenreRow(genre_id, name)
+            for genre_id, name in session.query(GenreModel.id, GenreModel.name)
+        }
+        with self._lock:
+            self._genres = genres
+        return genres
+
+    def get_many(self, session: Session, genre_ids) -> list[GenreRow]:
+        """Return the genres with the given ids; unknown ids are skipped after a reload."""
+        genres = self._genres
+        if genres is None or any(genre_id not in genres for genre_id in genre_ids):
+            genres = self._load(session)
+        return [genres[genre_id] for genre_id in genre_ids if genre_id in genres]
+
+    def clear(self):
+        """Forget all genres; the next lookup reloads them."""
+        with self._lock:
+            self._genres = None
+
+
+# Process-wide cache, cleared by the ORM event below
+genre_cache = GenreCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session: Session, flush_context):
+    """Forget cached genres when genres are written (e.g. renamed)."""
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(instance, GenreModel) for instance in changed):
+        genre_cache.clear()
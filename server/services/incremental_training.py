@@ -0,0 +1,94 @@
+import numpy as np
+
+from server.services.factor_precision import restore_precision
+
+# Training modes accepted by train_recommendation_model
+TRAINING_MODES = ("auto", "full", "incremental")
+
+# Policy for "auto": retrain from scratch when more than this fraction of
+# the ratings is new, or after this many incremental runs in a row, so
+# warm-start drift never accumulates indefinitely
+INCREMENTAL_MAX_NEW_FRACTION = 0.1
+INCREMENTAL_MAX_RUNS = 5
+
+
+def choose_training_mode(
+    previous: dict | None,
+    total_ratings: int,
+    n_components: int,
+    mode: str = "auto",
+    engine: str = "nmf",
+) -> tuple[str, str]:
+    """
+    Decide whether to retrain from scratch or warm-start from the previous model.
+
+    previous is the latest model's data (None if there is none). "full"
+    always retrains. "incremental" warm-starts whenever it is possible
+    (a previous model with the same number of components, trained by the
+    same engine; models from before engines were recorded count as NMF).
+    "auto" also requires the ratings to have grown by at most
+    INCREMENTAL_MAX_NEW_FRACTION and fewer than INCREMENTAL_MAX_RUNS
+    incremental runs since the last full retrain.
+
+    Returns ("full" or "incremental", reason).
+    """
+    if mode not in TRAINING_MODES:
+        raise ValueError(f"Unsupported training mode: {mode}")
+
+    if mode == "full":
+        return "full", "full retrain requested"
+    if previous is None:
+        return "full", "no previous model"
+    if previous.get("n_components") != n_components:
+        return "full", "number of components changed"
+    if previous.get("training_engine", "nmf") != engine:
+        return "full", "training engine changed"
+    if mode == "incremental":
+        return "incremental", "incremental retrain requested"
+
+    previous_ratings = previous.get("total_ratings") or 0
+    if total_ratings < previous_ratings:
+        return "full", "ratings were removed"
+
+    new_fraction = (total_ratings - previous_ratings) / total_ratings
+    if new_fraction > INCREMENTAL_MAX_NEW_FRACTION:
+        return "full", f"{new_fraction:.1%} of ratings are new"
+
+    if previous.get("incremental_runs", 0) >= INCREMENTAL_MAX_RUNS:
+        return "full", f"{INCREMENTAL_MAX_RUNS} incremental runs since the last full retrain"
+
+    return "incremental", f"{new_fraction:.1%} of ratings are new"
+
+
+def warm_start_factors(
+    previous: dict, user_ids: np.ndarray, movie_ids: np.ndarray, matrix_mean: float, seed: int = 42
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Build initial W (users x k) and H (k x movies) from the previous model.
+
+    Users and movies known to the previous model keep their factors; rows
+    and columns for new ones are drawn like sklearn's random NMF init
+    (|N(0, 1)| scaled by sqrt(mean rating / k)). Users and movies no longer
+    rated are dropped. matrix_mean is the mean of the zero-filled rating
+    matrix.
+    """
+    previous_users, previous_items = restore_precision(previous)
+    n_components = previous_items.shape[0]
+
+    rng = np.random.default_rng(seed)
+    scale = np.sqrt(matrix_mean / n_components)
+    user_init = scale * np.abs(rng.standard_normal((len(user_ids), n_components)))
+    item_init = scale * np.abs(rng.standard_normal((n_components, len(movie_ids))))
+
+    _copy_known(previous["user_ids"], user_ids, previous_users, user_init)
+    _copy_known(previous["movie_ids"], movie_ids, previous_items.T, item_init.T)
+    return user_init, item_init
+
+
+def _copy_known(previous_ids, ids: np.ndarray, previous_rows: np.ndarray, rows: np.ndarray):
+    """Copy the rows of ids that also appear in previous_ids, in place."""
+    previous_ids = np.asarray(previous_ids)
+    order = np.argsort(previous_ids)
+    positions = np.searchsorted(previous_ids, ids, sorter=order).clip(max=len(previous_ids) - 1)
+    known = previous_ids[order[positions]] == ids
+    rows[known] = previous_rows[order[positions[known]]]
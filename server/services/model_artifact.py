@@ -0,0 +1,170 @@
+import json
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+# On-disk layout of a model version:
+#   models/recommendation_model_{version}/manifest.json   metadata + array list
+#   models/recommendation_model_{version}/{name}.npy      one file per array
+#   models/recommendation_model_{version}/training_metrics.json  how training went
+#   models/recommendation_model_latest.json               pointer to the served version
+ARTIFACT_FORMAT = "npy-v1"
+ARTIFACT_DIR_PREFIX = "recommendation_model_"
+MANIFEST_FILE = "manifest.json"
+METRICS_FILE = "training_metrics.json"
+LATEST_POINTER_FILE = "recommendation_model_latest.json"
+
+# Id lists of legacy pickles, stored as int64 arrays in the new layout
+ID_LIST_KEYS = ("user_ids", "movie_ids", "popular_movie_ids", "popular_counts")
+
+
+def artifact_dir(models_dir: Path, version: str) -> Path:
+    """Directory holding the arrays and manifest of a model version."""
+    return models_dir / f"{ARTIFACT_DIR_PREFIX}{version}"
+
+
+def _atomic_write_bytes(path: Path, write):
+    """
+    Write a file through a temporary sibling and rename it into place.
+
+    Readers never see a partial file, and a file that is memory-mapped by
+    a running worker keeps its old contents (the rename creates a new inode).
+    """
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_json(path: Path, data, indent: int | None = None):
+    """Atomically save a JSON document."""
+    _atomic_write_bytes(path, lambda f: f.write(json.dumps(data, indent=indent).encode("utf-8")))
+
+
+def save_array(path: Path, array: np.ndarray):
+    """Atomically save one array as a .npy file."""
+    _atomic_write_bytes(path, lambda f: np.save(f, np.ascontiguousarray(array)))
+
+
+def save_raw_array(path: Path, raw_path: Path, dtype, length: int):
+    """
+    Atomically save length values of dtype, stored back to back in raw_path,
+    as a .npy file.
+
+    The values are copied through a small buffer, so arrays written in
+    chunks (e.g. with ndarray.tofile) never have to be in memory whole.
+    """
+    header = {
+        "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+        "fortran_order": False,
+        "shape": (length,),
+    }
+
+    def write(f):
+        np.lib.format.write_array_header_1_0(f, header)
+        with open(raw_path, "rb") as raw:
+            shutil.copyfileobj(raw, f, 16 * 1024 * 1024)
+
+    _atomic_write_bytes(path, write)
+
+
+def save_artifact(target_dir: Path, model_data: dict, extra_arrays: tuple[str, ...] = ()) -> Path:
+    """
+    Save model data as raw .npy arrays plus a small JSON manifest.
+
+    Every NumPy array in model_data is written to its own .npy file; all
+    other values are stored in the manifest and must be JSON-serializable.
+    extra_arrays names .npy files already written to target_dir (such as
+    a materialized top-K table) that belong to the artifact too.
+    The manifest is written last, so a complete manifest means a complete
+    artifact.
+    """
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    arrays = {k: v for k, v in model_data.items() if isinstance(v, np.ndarray)}
+    metadata = {k: v for k, v in model_data.items() if not isinstance(v, np.ndarray)}
+
+    for name, array in arrays.items():
+        save_array(target_dir / f"{name}.npy", array)
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "metadata": metadata,
+        "arrays": sorted([*arrays, *extra_arrays]),
+    }
+    save_json(target_dir / MANIFEST_FILE, manifest, indent=2)
+    return target_dir
+
+
+def load_artifact(source_dir: Path, mmap_mode: str | None = "r") -> dict:
+    """
+    Load a model artifact saved by save_artifact.
+
+    Arrays are opened memory-mapped (read-only) by default, so workers on the
+    same host share them through the page cache and loading does no copying.
+    Raises FileNotFoundError if the artifact is missing or incomplete.
+    """
+    manifest_path = source_dir / MANIFEST_FILE
+    with open(manifest_path, "rb") as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"Unsupported model artifact format: {manifest.get('format')}")
+
+    model_data = dict(manifest["metadata"])
+    for name in manifest["arrays"]:
+        model_data[name] = np.load(source_dir / f"{name}.npy", mmap_mode=mmap_mode)
+
+    return model_data
+
+
+def save_training_metrics(target_dir: Path, metrics: dict):
+    """
+    Atomically save the instrumentation of the training run that produced a version.
+
+    Kept out of the manifest because it is only complete once the artifact
+    itself has been saved and published.
+    """
+    save_json(target_dir / METRICS_FILE, metrics, indent=2)
+
+
+def write_latest_pointer(models_dir: Path, version: str):
+    """Atomically point "latest" at a saved model version."""
+    pointer = {"version": version, "path": artifact_dir(models_dir, version).name}
+    save_json(models_dir / LATEST_POINTER_FILE, pointer)
+
+
+def load_latest_artifact(pointer_path: Path) -> dict:
+    """Load the model version the "latest" pointer file refers to."""
+    with open(pointer_path, "rb") as f:
+        pointer = json.load(f)
+    return load_artifact(pointer_path.parent / pointer["path"])
+
+
+def convert_pickle_artifact(pickle_path: Path, models_dir: Path) -> Path:
+    """
+    Convert a legacy pickled model to the memory-mappable layout.
+
+    Id lists become int64 arrays and the pickled sklearn estimator is
+    dropped (serving only needs the factor matrices); its number of
+    components and reconstruction error are kept as metadata.
+    Returns the directory of the converted artifact.
+    """
+    with open(pickle_path, "rb") as f:
+        model_data = pickle.load(f)
+
+    model = model_data.pop("model", None)
+    if model is not None:
+        model_data.setdefault("n_components", int(model.n_components_))
+        model_data.setdefault("reconstruction_err", float(model.reconstruction_err_))
+
+    for key in ID_LIST_KEYS:
+        if key in model_data:
+            model_data[key] = np.asarray(model_data[key], dtype=np.int64)
+
+    return save_artifact(artifact_dir(models_dir, model_data["version"]), model_data)
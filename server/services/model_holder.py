@@ -0,0 +1,160 @@
+import logging
+import os
+import pickle
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+def _unpickle(path: Path) -> dict:
+    """Default loader: the artifact is a pickled dict."""
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class ModelHolder:
+    """
+    Process-wide holder for the trained recommendation model.
+
+    Loads the model artifact once and serves every request from memory.
+    Each access compares the artifact's file signature (inode, size, mtime)
+    with the one that was loaded, so a model written by another worker is
+    picked up and swapped in without restarting the process.
+
+    Swapping replaces a single reference, so requests that already hold the
+    previous model keep using it until they finish. An artifact that fails
+    to load is not read again until its signature changes; meanwhile the
+    previous model (if any) keeps being served.
+
+    ``load`` reads the model data from ``path`` (unpickling it by default).
+    ``prepare`` is applied to every model before it is served, to build
+    derived lookup structures once per load instead of once per request.
+    ``on_swap`` is called with every model once it is being served, whether
+    loaded from disk or swapped in after training in this process.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        load: Callable[[Path], dict] | None = None,
+        prepare: Callable[[dict], dict] | None = None,
+        on_swap: Callable[[dict], None] | None = None,
+    ):
+        self.path = path
+        self.load = load or _unpickle
+        self.prepare = prepare
+        self.on_swap = on_swap
+        self._lock = threading.Lock()
+        self._model_data = None
+        self._signature = None
+        self._loaded_at = None
+        # Signature of the artifact that last failed to load, and why
+        self._failed_signature = None
+        self._failed_error = None
+
+    def _file_signature(self) -> tuple | None:
+        """Return a cheap signature of the artifact file, or None if it is missing."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def get(self) -> dict:
+        """
+        Return the current model data, reloading it if the artifact changed.
+
+        Raises ValueError if no trained model is available.
+        """
+        signature = self._file_signature()
+        model_data = self._model_data
+
+        # Unchanged artifact, or one that already failed to load: no reload
+        if model_data is not None and signature is not None and (
+            signature == self._signature or signature == self._failed_signature
+        ):
+            return model_data
+
+        with self._lock:
+            # Another thread may have reloaded while we waited for the lock
+            signature = self._file_signature()
+            if signature is None:
+                self._model_data = None
+                self._signature = None
+                self._loaded_at = None
+                self._failed_signature = None
+                raise ValueError("No trained model found. Please train the model first.")
+
+            if signature == self._failed_signature:
+                if self._model_data is None:
+                    raise ValueError(self._failed_error)
+            elif signature != self._signature or self._model_data is None:
+                self._load(signature)
+
+            return self._model_data
+
+    def _load(self, signature: tuple):
+        """Load the artifact and swap it in. Caller must hold the lock."""
+        try:
+            model_data = self.load(self.path)
+            if self.prepare is not None:
+                model_data = self.prepare(model_data)
+        except Exception as e:
+            self._failed_signature = signature
+            self._failed_error = f"Failed to load trained model: {e}"
+            if self._model_data is None:
+                raise ValueError(self._failed_error) from e
+            # Keep serving the previous model if the new artifact is unreadable
+            logger.warning("Failed to reload model from %s, keeping version %s: %s",
+                           self.path, self._model_data.get("version"), e)
+            return
+
+        self._model_data = model_data
+        self._signature = signature
+        self._loaded_at = datetime.now().isoformat()
+        self._failed_signature = None
+        logger.info("Loaded recommendation model version %s", model_data.get("version"))
+        if self.on_swap is not None:
+            self.on_swap(model_data)
+
+    def swap(self, model_data: dict):
+        """
+        Atomically replace the served model with freshly trained data.
+
+        Called after the artifact has been written, so the stored signature
+        matches the file on disk and the next access does not reload it.
+        """
+        if self.prepare is not None:
+            model_data = self.prepare(model_data)
+
+        with self._lock:
+            self._model_data = model_data
+            self._signature = self._file_signature()
+            self._loaded_at = datetime.now().isoformat()
+            self._failed_signature = None
+            if self.on_swap is not None:
+                self.on_swap(model_data)
+
+    def clear(self):
+        """Drop the loaded model so the next access reloads from disk."""
+        with self._lock:
+            self._model_data = None
+            self._signature = None
+            self._loaded_at = None
+            self._failed_signature = None
+
+    def info(self) -> dict:
+        """Return version and load time of the currently loaded model."""
+        model_data = self._model_data
+        if model_data is None:
+            return {"loaded": False, "model_version": None, "trained_at": None, "loaded_at": None}
+
+        return {
+            "loaded": True,
+            "model_version": model_data.get("version"),
+            "trained_at": model_data.get("trained_at"),
+            "loaded_at": self._loaded_at,
+        }
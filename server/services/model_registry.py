@@ -0,0 +1,173 @@
+import json
+import logging
+import shutil
+from pathlib import Path
+
+from server.services.model_artifact import (
+    ARTIFACT_DIR_PREFIX,
+    LATEST_POINTER_FILE,
+    MANIFEST_FILE,
+    METRICS_FILE,
+    artifact_dir,
+    save_json,
+    write_latest_pointer,
+)
+
+logger = logging.getLogger(__name__)
+
+# Index of the registered versions, next to the "latest" pointer:
+#   models/index.json   {"latest": version, "versions": [entry, ...]} oldest first
+REGISTRY_INDEX_FILE = "index.json"
+
+# Model versions kept on disk; older ones are garbage collected on publish
+RETAIN_VERSIONS = 5
+
+# Manifest metadata copied into each version's index entry
+INDEX_METADATA_KEYS = (
+    "trained_at",
+    "training_engine",
+    "training_mode",
+    "factor_dtype",
+    "n_components",
+    "total_ratings",
+    "reconstruction_err",
+)
+
+
+def _read_json(path: Path):
+    with open(path, "rb") as f:
+        return json.load(f)
+
+
+def describe_version(models_dir: Path, version: str) -> dict:
+    """
+    Build the index entry of a saved version from its manifest and metrics.
+
+    The entry holds the version's metadata, its size on disk, and its
+    training metrics without the per-iteration errors (those stay in the
+    version's own metrics file).
+    Raises FileNotFoundError if the version has no complete artifact.
+    """
+    version_dir = artifact_dir(models_dir, version)
+    metadata = _read_json(version_dir / MANIFEST_FILE)["metadata"]
+
+    try:
+        metrics = _read_json(version_dir / METRICS_FILE)
+        metrics.pop("iterations", None)
+    except FileNotFoundError:
+        metrics = None
+
+    return {
+        "version": version,
+        "path": version_dir.name,
+        **{key: metadata.get(key) for key in INDEX_METADATA_KEYS},
+        "size_bytes": sum(f.stat().st_size for f in version_dir.iterdir() if f.is_file()),
+        "metrics": metrics,
+    }
+
+
+def _latest_version(models_dir: Path) -> str | None:
+    try:
+        return _read_json(models_dir / LATEST_POINTER_FILE)["version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def rebuild_index(models_dir: Path) -> dict:
+    """
+    Rebuild the index by scanning the models directory.
+
+    Used when the index is missing or unreadable (e.g. for models saved
+    before the registry existed). Directories without a complete manifest
+    are left out.
+    """
+    versions = []
+    for version_dir in sorted(models_dir.glob(f"{ARTIFACT_DIR_PREFIX}*")):
+        if not (version_dir / MANIFEST_FILE).is_file():
+            continue
+        version = version_dir.name.removeprefix(ARTIFACT_DIR_PREFIX)
+        try:
+            versions.append(describe_version(models_dir, version))
+        except (OSError, ValueError, KeyError):
+            logger.warning("Skipping unreadable model version %s", version_dir)
+    return {"latest": _latest_version(models_dir), "versions": versions}
+
+
+def load_index(models_dir: Path) -> dict:
+    """Load the version index, rebuilding it from disk if it is missing or corrupt."""
+    try:
+        index = _read_json(models_dir / REGISTRY_INDEX_FILE)
+        if isinstance(index.get("versions"), list):
+            return index
+    except (OSError, ValueError, AttributeError):
+        pass
+    return rebuild_index(models_dir)
+
+
+def list_versions(models_dir: Path) -> dict:
+    """Return the index: the latest version and every retained version, newest first."""
+    index = load_index(models_dir)
+    return {"latest": index.get("latest"), "versions": index["versions"][::-1]}
+
+
+def apply_retention(index: dict, retain: int = RETAIN_VERSIONS):
+    """
+    Drop index entries beyond the retention policy, in place.
+
+    Keeps the newest retain versions plus the latest one (which may be
+    older after a rollback).
+    """
+    latest = index.get("latest")
+    entries = index["versions"]
+    kept = {entry["version"] for entry in entries[-retain:]} if retain > 0 else set()
+    if latest:
+        kept.add(latest)
+    index["versions"] = [entry for entry in entries if entry["version"] in kept]
+
+
+def collect_garbage(models_dir: Path, index: dict) -> list[str]:
+    """
+    Delete every model directory that is not in the index.
+
+    This covers versions dropped by the retention policy and directories
+    left by interrupted training runs. Workers still serving a removed
+    version keep their memory-mapped arrays until they switch, because
+    open files outlive the unlink.
+
+    Returns the removed directory names.
+    """
+    kept = {entry["path"] for entry in index["versions"]}
+    if index.get("latest"):
+        kept.add(artifact_dir(models_dir, index["latest"]).name)
+
+    removed = []
+    for path in models_dir.glob(f"{ARTIFACT_DIR_PREFIX}*"):
+        if path.is_dir() and path.name not in kept:
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path.name)
+
+    if removed:
+        logger.info("Removed %d old model versions: %s", len(removed), ", ".join(sorted(removed)))
+    return sorted(removed)
+
+
+def publish_version(models_dir: Path, version: str, retain: int = RETAIN_VERSIONS) -> list[str]:
+    """
+    Register a saved version, make it "latest" and garbage collect old ones.
+
+    The pointer is switched first, then the trimmed index is written, and
+    only then are retired versions deleted. Both writes are atomic, so a
+    crash at any point leaves a servable latest model and at worst some
+    directories that the next publish removes.
+
+    Returns the removed directory names.
+    """
+    entry = describe_version(models_dir, version)
+    index = load_index(models_dir)
+    index["versions"] = [e for e in index["versions"] if e["version"] != version] + [entry]
+    index["latest"] = version
+
+    write_latest_pointer(models_dir, version)
+    apply_retention(index, retain)
+    save_json(models_dir / REGISTRY_INDEX_FILE, index, indent=2)
+    return collect_garbage(models_dir, index)
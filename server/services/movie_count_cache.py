@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from server.models.genres import GenreModel
+from server.models.movies import MovieModel
+from server.models.movies_genres import MovieGenreModel
+
+# Distinct searches whose totals are kept, least recently used evicted first
+MOVIE_COUNT_CACHE_SIZE = 1024
+
+# Seconds a total is trusted; bounds staleness after writes by other processes,
+# which this process's invalidation can't see
+MOVIE_COUNT_CACHE_SECONDS = 60
+
+# Tables whose writes change listing totals
+_COUNTED_MODELS = (MovieModel, GenreModel, MovieGenreModel)
+
+
+def count_key(search: str | None, search_mode: str) -> tuple[str, str]:
+    """Cache key of a listing: the search lowercased with whitespace collapsed, and the mode."""
+    return " ".join((search or "").lower().split()), search_mode
+
+
+class MovieCountCache:
+    """
+    LRU cache of movie listing totals, keyed by normalized search.
+
+    Searches match case-insensitively, so "Toy  Story" and "toy story" share
+    an entry. Entries expire after MOVIE_COUNT_CACHE_SECONDS and all of them
+    are dropped when this process writes movies, genres or their links.
+    """
+
+    def __init__(self, max_size: int = MOVIE_COUNT_CACHE_SIZE, ttl: float = MOVIE_COUNT_CACHE_SECONDS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[float, int]] = OrderedDict()
+
+    def get(self, key: tuple) -> int | None:
+        """Return the cached total, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: tuple, total: int):
+        """Cache a total."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), total)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+
+# Process-wide cache, invalidated by the ORM events below
+movie_count_cache = MovieCountCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_on_flush(session: Session, flush_context):
+    """Drop cached totals when movies, genres or their links are written."""
+    changed = (*session.new, *session.dirty, *session.deleted)
+    if any(isinstance(instance, _COUNTED_MODELS) for instance in changed):
+        movie_count_cache.clear()
+        # Clear again on commit, in case a concurrent request cached a total
+        # counted before the changes became visible
+        session.info["movie_counts_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session):
+    if session.info.pop("movie_counts_changed", False):
+        movie_count_cache.clear()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_write(orm_execute_state):
+    """Drop cached totals on bulk UPDATE/DELETE statements against counted tables."""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and (
+        orm_execute_state.bind_mapper is not None
+        and orm_execute_state.bind_mapper.class_ in _COUNTED_MODELS
+    ):
+        movie_count_cache.clear()
+        orm_execute_state.session.info["movie_counts_changed"] = True
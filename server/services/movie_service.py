@@ -1,26 +1,218 @@
-from sqlalchemy import func, or_, select
-from sqlalchemy.orm import Session, joinedload
+import base64
+import binascii
+import json
+from typing import NamedTuple
+
+from sqlalchemy import and_, case, func, literal_column, or_
+from sqlalchemy.orm import Session
 
 from server.models.genres import GenreModel
 from server.models.movies import MovieModel
+from server.models.movies_genres import MovieGenreModel
 from server.models.ratings import RatingModel
+from server.services.genre_cache import GenreRow, genre_cache
+from server.services.movie_count_cache import count_key, movie_count_cache
 
+class MovieRow(NamedTuple):
+    """A movie as listed by get_movies, with its genres resolved from the genre cache."""
 
-def _build_movie_search_query(session: Session, search: str | None = None):
-    """Build base query for movies with optional search filter and eager loading."""
-    query = session.query(MovieModel).options(joinedload(MovieModel.genres))
+    id: int
+    title: str
+    release_year: int | None
+    genres: list[GenreRow]
 
-    if search:
-        query = query.join(MovieModel.genres, isouter=True)
-        query = query.filter(
-            or_(
-                MovieModel.title.ilike(f"%{search}%"),
-                GenreModel.name.ilike(f"%{search}%")
-            )
+
+# Search modes of get_movies: "substring" matches the term anywhere in the
+# title or a genre name; "relevance" also matches title words and similar
+# spellings, and orders the results by how well they match
+SEARCH_MODES = ("substring", "relevance")
+
+# Text search configuration of the title tsvector; must match the expression
+# index created by the add_movie_search_indexes migration
+SEARCH_TEXT_CONFIG = literal_column("'simple'::regconfig")
+
+
+# Sort column and direction of every sort_by option. Rows with equal keys
+# are ordered by id in the same direction, and missing release years come
+# last either way, so every row has a unique position a cursor can seek past.
+MOVIE_SORT_KEYS = {
+    "title_asc": (MovieModel.title, False),
+    "title_desc": (MovieModel.title, True),
+    "year_asc": (MovieModel.release_year, False),
+    "year_desc": (MovieModel.release_year, True),
+    "id_asc": (MovieModel.id, False),
+    "id_desc": (MovieModel.id, True),
+}
+DEFAULT_SORT = "id_asc"
+
+# How get_movies computes the total: a cached exact count, the PostgreSQL
+# planner's estimate, or not at all
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+class CursorError(ValueError):
+    """A cursor that can't be used for the requested listing; field names the parameter at fault."""
+
+    def __init__(self, field: str, message: str):
+        super().__init__(message)
+        self.field = field
+
+
+def encode_cursor(sort_by: str, movie: MovieModel) -> str:
+    """Encode the sort key of the last movie on a page as an opaque cursor."""
+    column, _ = MOVIE_SORT_KEYS[sort_by]
+    payload = {"sort": sort_by, "value": getattr(movie, column.key), "id": movie.id}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> dict:
+    """
+    Decode a cursor, checking it was issued for the same sort and that its
+    values have the sort column's type. Raises CursorError if invalid.
+    """
+    column, _ = MOVIE_SORT_KEYS[sort_by]
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value = payload["value"]
+        valid = (
+            payload["sort"] == sort_by
+            and type(payload["id"]) is int
+            and (type(value) is column.type.python_type or (value is None and column.nullable))
         )
-        query = query.distinct()
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+        valid = False
+    if not valid:
+        raise CursorError("cursor", "Invalid cursor")
+    return payload
+
+
+def _seek_filter(sort_by: str, cursor: dict):
+    """
+    Filter for the rows after the cursor in sort_by order.
+
+    Written as "key >= value AND (key > value OR id > last id)" so that a
+    (key, id) index can seek to the cursor; missing release years sort
+    last, after every row with a year.
+    """
+    column, descending = MOVIE_SORT_KEYS[sort_by]
+    value, last_id = cursor["value"], cursor["id"]
+    after_id = MovieModel.id < last_id if descending else MovieModel.id > last_id
+    if column is MovieModel.id:
+        return after_id
+    if value is None:
+        return and_(column.is_(None), after_id)
+
+    at_or_after = column <= value if descending else column >= value
+    after = column < value if descending else column > value
+    seek = and_(at_or_after, or_(after, after_id))
+    if column.nullable:
+        seek = or_(seek, column.is_(None))
+    return seek
+
+
+def _title_relevance(session: Session, search: str):
+    """
+    Build the relevance filter and score of title matches.
+
+    On PostgreSQL, titles match on their words (full-text, served by the
+    tsvector GIN index) or on trigram similarity (served by the pg_trgm
+    GIN index), scored by ts_rank plus similarity. Other databases fall
+    back to substring matches scored exact > prefix > anywhere.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        vector = func.to_tsvector(SEARCH_TEXT_CONFIG, MovieModel.title)
+        query = func.websearch_to_tsquery(SEARCH_TEXT_CONFIG, search)
+        matches = or_(
+            vector.op("@@")(query),
+            MovieModel.title.op("%")(search),
+            MovieModel.title.ilike(f"%{search}%"),
+        )
+        score = func.ts_rank(vector, query) + func.similarity(MovieModel.title, search)
+        return matches, score
+
+    matches = MovieModel.title.ilike(f"%{search}%")
+    score = case(
+        (func.lower(MovieModel.title) == search.lower(), 3),
+        (MovieModel.title.ilike(f"{search}%"), 2),
+        (matches, 1),
+        else_=0,
+    )
+    return matches, score
+
+
+def _build_movie_search_query(session: Session, search: str | None = None, search_mode: str = "substring"):
+    """
+    Build base query for movie columns (without genres) with optional search filter.
 
-    return query
+    Genre matches are an EXISTS over the movie's genres rather than a join,
+    so every movie appears once without DISTINCT and the title condition
+    can use the trigram index. Returns (query, relevance score or None).
+    """
+    if search_mode not in SEARCH_MODES:
+        raise ValueError(f"Unsupported search mode: {search_mode}")
+
+    query = session.query(MovieModel.id, MovieModel.title, MovieModel.release_year)
+    if not search:
+        return query, None
+
+    genre_matches = MovieModel.genres.any(GenreModel.name.ilike(f"%{search}%"))
+    if search_mode == "relevance":
+        title_matches, score = _title_relevance(session, search)
+        return query.filter(or_(title_matches, genre_matches)), score
+
+    query = query.filter(or_(MovieModel.title.ilike(f"%{search}%"), genre_matches))
+    return query, None
+
+
+def _estimate_count(session: Session, query) -> int | None:
+    """
+    Planner estimate of a query's row count, or None if the database has none.
+
+    Runs EXPLAIN, which plans the query without executing it, so the cost
+    doesn't grow with the number of matches.
+    """
+    bind = session.get_bind()
+    if bind.dialect.name != "postgresql":
+        return None
+    compiled = query.with_entities(MovieModel.id).order_by(None).statement.compile(dialect=bind.dialect)
+    plan = session.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def _count_movies(session: Session, query, search: str | None, search_mode: str, count_mode: str) -> int | None:
+    """Total of a listing query according to count_mode; see get_movies."""
+    if count_mode == "none":
+        return None
+    if count_mode == "estimate":
+        estimate = _estimate_count(session, query)
+        if estimate is not None:
+            return estimate
+
+    key = count_key(search, search_mode)
+    total = movie_count_cache.get(key)
+    if total is None:
+        total = query.order_by(None).count()
+        movie_count_cache.put(key, total)
+    return total
+
+
+def _genre_ids_by_movie(session: Session, movie_ids: list[int]) -> dict[int, list[int]]:
+    """Genre ids of each movie, aggregated into one row per movie (array_agg on PostgreSQL)."""
+    if not movie_ids:
+        return {}
+    if session.get_bind().dialect.name == "postgresql":
+        genre_ids = func.array_agg(MovieGenreModel.genre_id)
+    else:
+        genre_ids = func.group_concat(MovieGenreModel.genre_id)
+    rows = (
+        session.query(MovieGenreModel.movie_id, genre_ids)
+        .filter(MovieGenreModel.movie_id.in_(movie_ids))
+        .group_by(MovieGenreModel.movie_id)
+    )
+    return {
+        movie_id: sorted(ids if isinstance(ids, list) else map(int, ids.split(",")))
+        for movie_id, ids in rows
+    }
 
 
 def get_movies(
@@ -28,46 +220,102 @@ def get_movies(
     limit: int = 10,
     page: int = 1,
     search: str | None = None,
-    sort_by: str | None = None
+    sort_by: str | None = None,
+    search_mode: str = "substring",
+    cursor: str | None = None,
+    count_mode: str = "exact",
 ):
     """
     Get paginated list of movies from the database.
 
     Supports sorting by:
     - title_asc, title_desc: Sort by movie title
-    - year_asc, year_desc: Sort by release year
+    - year_asc, year_desc: Sort by release year (movies without one last)
     - id_asc, id_desc: Sort by movie ID
 
+    search_mode "relevance" orders search results best match first
+    (unless sort_by is given) and also matches title words and similar
+    spellings; see _title_relevance. Raises ValueError for unknown modes.
+
+    Pages are selected by page number (OFFSET), or, if cursor is given, by
+    seeking past the last movie of the previous page (see next_cursor), so
+    deep pages cost the same as the first. page is ignored with a cursor.
+    Cursors don't apply to relevance ordering. Raises CursorError for
+    invalid cursors and cursors with relevance ordering, and ValueError for
+    unknown count modes.
+
+    count_mode "exact" counts the matches once per normalized search and
+    caches the total (see movie_count_cache); "estimate" uses the PostgreSQL
+    planner's row estimate instead (other databases count exactly); "none"
+    skips counting and returns None as the total.
+
+    The page is read in two queries: the movies' columns, then their genre
+    ids aggregated per movie, resolved to names by the process-wide genre
+    cache. Returns MovieRow tuples, whose genres have id and name.
+
     Returns tuple of (movies, total_count).
     """
+    if count_mode not in COUNT_MODES:
+        raise ValueError(f"Unsupported count mode: {count_mode}")
     offset = (page - 1) * limit
 
-    base_query = _build_movie_search_query(session, search)
+    base_query, relevance = _build_movie_search_query(session, search, search_mode)
 
     # Apply sorting
-    if sort_by == "title_asc":
-        base_query = base_query.order_by(MovieModel.title.asc())
-    elif sort_by == "title_desc":
-        base_query = base_query.order_by(MovieModel.title.desc())
-    elif sort_by == "year_asc":
-        base_query = base_query.order_by(MovieModel.release_year.asc())
-    elif sort_by == "year_desc":
-        base_query = base_query.order_by(MovieModel.release_year.desc())
-    elif sort_by == "id_asc":
-        base_query = base_query.order_by(MovieModel.id.asc())
-    elif sort_by == "id_desc":
-        base_query = base_query.order_by(MovieModel.id.desc())
+    sort_by = resolve_sort(sort_by, search, search_mode)
+    if sort_by is None:
+        if cursor is not None:
+            raise CursorError(
+                "search_mode",
+                "Cursor pagination is not supported with relevance ordering; pass sort_by or use page numbers",
+            )
+        base_query = base_query.order_by(relevance.desc(), MovieModel.id.asc())
     else:
-        # Default sorting by ID ascending
-        base_query = base_query.order_by(MovieModel.id.asc())
+        column, descending = MOVIE_SORT_KEYS[sort_by]
+        order = column.desc() if descending else column.asc()
+        if column.nullable:
+            order = order.nulls_last()
+        tie_breaker = MovieModel.id.desc() if descending else MovieModel.id.asc()
+        base_query = base_query.order_by(order, tie_breaker)
 
-    movies = base_query.offset(offset).limit(limit).all()
+    if cursor is not None:
+        seek = _seek_filter(sort_by, decode_cursor(cursor, sort_by))
+        rows = base_query.filter(seek).limit(limit).all()
+    else:
+        rows = base_query.offset(offset).limit(limit).all()
+
+    genre_ids = _genre_ids_by_movie(session, [row.id for row in rows])
+    movies = [
+        MovieRow(row.id, row.title, row.release_year, genre_cache.get_many(session, genre_ids.get(row.id, [])))
+        for row in rows
+    ]
 
-    total = base_query.count()
+    total = _count_movies(session, base_query, search, search_mode, count_mode)
 
     return movies, total
 
 
+def resolve_sort(sort_by: str | None, search: str | None = None, search_mode: str = "substring") -> str | None:
+    """The sort_by option a listing is ordered by, or None for relevance ordering."""
+    if sort_by in MOVIE_SORT_KEYS:
+        return sort_by
+    return None if search and search_mode == "relevance" else DEFAULT_SORT
+
+
+def next_cursor(
+    movies: list,
+    limit: int,
+    sort_by: str | None = None,
+    search: str | None = None,
+    search_mode: str = "substring",
+) -> str | None:
+    """Cursor of the page after movies; None after a short page or with relevance ordering."""
+    sort_by = resolve_sort(sort_by, search, search_mode)
+    if sort_by is None or len(movies) < limit:
+        return None
+    return encode_cursor(sort_by, movies[-1])
+
+
 def get_movie_avg_rating(session: Session, movie_id: int):
     """
     Get average rating for a specific movie.
@@ -5,6 +5,8 @@ from sqlalchemy.orm import Session
 from server.models.movies import MovieModel
 from server.models.ratings import RatingModel
 from server.models.user import UserModel
+from server.services.fold_in import fold_in_cache
+from server.services.seen_index import recent_ratings
 
 
 def create_rating(
@@ -45,6 +47,8 @@ def create_rating(
         existing_rating.timestamp = datetime.now()
         session.commit()
         session.refresh(existing_rating)
+        recent_ratings.add(user_id, movie_id)
+        fold_in_cache.invalidate(user_id)
         return existing_rating, False
 
     new_rating = RatingModel(
@@ -58,4 +62,9 @@ def create_rating(
     session.commit()
     session.refresh(new_rating)
 
+    # Exclude the movie from this user's recommendations until the next training
+    recent_ratings.add(user_id, movie_id)
+    # Fold users missing from the model in again with the new rating
+    fold_in_cache.invalidate(user_id)
+
     return new_rating, True
@@ -1,135 +1,480 @@
-import pickle
 from datetime import datetime
 from pathlib import Path
+from typing import Callable
 
 import numpy as np
-import pandas as pd
-from sklearn.decomposition import NMF
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from server.models.movies import MovieModel
 from server.models.ratings import RatingModel
 from server.models.user import UserModel
+from server.services.factor_precision import reduce_precision, top_n_overlap
+from server.services.fold_in import build_fold_in_factor, fold_in_cache, fold_in_user
+from server.services.incremental_training import (
+    choose_training_mode,
+    warm_start_factors,
+)
+from server.services.model_artifact import (
+    LATEST_POINTER_FILE,
+    artifact_dir,
+    load_artifact,
+    load_latest_artifact,
+    save_artifact,
+    save_training_metrics,
+)
+from server.services.model_holder import ModelHolder
+from server.services.model_registry import list_versions, publish_version
+from server.services.scoring import (
+    prepare_model_data,
+    recommend_for_row,
+    recommend_for_rows,
+    recommend_for_vector,
+)
+from server.services.seen_index import build_seen_index, recent_ratings
+from server.services.similarity_index import build_similarity_index, find_similar
+from server.services.topk_table import TOPK_ARRAYS, lookup_top_k, materialize_top_k, topk_paths
+from server.services.training_data import build_rating_matrix, scan_ratings
+from server.services.training_engines import get_training_engine
+from server.services.training_metrics import TrainingMetrics
+from server.services.training_snapshot import load_training_ratings, ratings_fingerprint
 
 
 # Directory to store models (simulating a data lake)
 MODELS_DIR = Path("models")
 MODELS_DIR.mkdir(exist_ok=True)
 
-# In-memory training status tracker
-# In production, this would be in Redis or a database
-training_status = {
-    "status": "idle",  # idle, training, completed, failed
-    "started_at": None,
-    "completed_at": None,
-    "model_version": None,
-    "total_ratings": None,
-    "error": None,
-}
+# Local snapshot of the extracted ratings, refreshed incrementally
+SNAPSHOT_DIR = MODELS_DIR / "ratings_snapshot"
 
+# Scratch space for the blocks of out-of-core training, removed after each run
+TRAINING_SCRATCH_DIR = MODELS_DIR / "training_scratch"
 
-def train_recommendation_model(session: Session) -> dict:
-    """
-    Train a recommendation model using Non-Negative Matrix Factorization.
+# Depth of the popularity ranking stored with each model; covers every n
+# the recommendation endpoints accept (1-100)
+POPULARITY_DEPTH = 100
 
-    Fetches all ratings from the database, creates a user-item matrix,
-    trains an NMF model, and saves it with versioning.
 
-    Updates global training_status throughout the process.
+def _n_components(n_users: int, n_movies: int) -> int:
+    """Adaptive number of factors for a rating matrix of this shape."""
+    return min(20, min(n_users, n_movies) - 1)
 
-    Returns dict with model version and training info.
-    """
-    global training_status
 
-    try:
-        # Update status to training
-        training_status["status"] = "training"
-        training_status["started_at"] = datetime.now().isoformat()
-        training_status["completed_at"] = None
-        training_status["error"] = None
-
-        # Fetch all ratings directly into DataFrame (much faster than ORM)
-        query = session.query(
-            RatingModel.user_id,
-            RatingModel.movie_id,
-            RatingModel.rating
-        )
-        df = pd.read_sql(query.statement, session.bind)
+def _prepare_model(model_data: dict) -> dict:
+    """Build serving lookups and attach the materialized top-K table, if any."""
+    prepared = prepare_model_data(model_data)
+    # Models trained before the similarity index existed get one on load
+    if "sim_kind" not in model_data:
+        prepared.update(build_similarity_index(model_data["item_features"]))
+    if "topk_movies" in model_data:
+        prepared["topk_table"] = (model_data["topk_movies"], model_data["topk_scores"])
+    prepared["fold_in_factor"] = build_fold_in_factor(model_data)
+    return prepared
 
-        if len(df) == 0:
-            raise ValueError("No ratings available to train the model")
 
-        total_ratings = len(df)
+def _prune_recent_ratings(model_data: dict):
+    """Drop recent ratings the newly served model was trained on."""
+    if model_data.get("ratings_as_of") is not None:
+        recent_ratings.prune(before=model_data["ratings_as_of"])
 
-        # Create user-item matrix
-        user_item_matrix = df.pivot_table(
-            index="user_id", columns="movie_id", values="rating", fill_value=0
-        )
 
-        # Train NMF model
-        n_components = min(20, min(user_item_matrix.shape) - 1)  # Adaptive components
-        model = NMF(n_components=n_components, init="random", random_state=42, max_iter=200)
-        user_features = model.fit_transform(user_item_matrix)
-        item_features = model.components_
+# Process-wide holder serving the latest model from memory-mapped arrays
+model_holder = ModelHolder(
+    MODELS_DIR / LATEST_POINTER_FILE,
+    load=load_latest_artifact,
+    prepare=_prepare_model,
+    on_swap=_prune_recent_ratings,
+)
+
+
+def _load_previous_model() -> dict | None:
+    """Load the latest saved model to warm-start from, or None if there is none."""
+    try:
+        return load_latest_artifact(MODELS_DIR / LATEST_POINTER_FILE)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def train_recommendation_model(
+    session: Session,
+    precompute_top_k: int | None = None,
+    popularity_depth: int = POPULARITY_DEPTH,
+    factor_dtype: str = "float64",
+    mode: str = "auto",
+    engine: str = "nmf",
+    memory_budget_mb: int | None = None,
+    progress: Callable[[str, float], None] | None = None,
+) -> dict:
+    """
+    Train a recommendation model using Non-Negative Matrix Factorization.
+
+    Fetches all ratings, creates a user-item matrix, factorizes it with
+    the selected engine, and saves it with versioning.
+
+    Ratings come from a local snapshot keyed by a fingerprint of the
+    ratings table (count, max id, max timestamp); only rows added or
+    updated since the snapshot are read from the database. In "auto"
+    mode, if the fingerprint and training parameters match the latest
+    model, training is skipped and that model is kept.
+
+    The model is saved as raw .npy arrays plus a JSON manifest in its own
+    versioned directory, and the "latest" pointer is switched atomically.
+    Serving processes open the arrays memory-mapped.
+
+    If precompute_top_k is set, the top K unrated movies of every trained
+    user are precomputed into a memory-mapped table inside the model
+    directory, so recommendation requests become point lookups.
+
+    factor_dtype sets the precision the user/movie factors are served in
+    ("float64", "float32" or "int8" with per-row scales). For reduced
+    precisions the top-N overlap with the float64 factors is measured on
+    a sample of users and reported with the model.
+
+    mode chooses between a full retrain from a random init and an
+    incremental one that warm-starts from the latest model's factors
+    (new users and movies get fresh rows/columns) and runs only a few
+    iterations. "auto" picks incremental unless the policy in
+    choose_training_mode calls for a full retrain.
+
+    engine selects the factorization ("nmf" for sklearn's NMF, "als" for
+    the block-parallel alternating least squares engine). Both produce
+    the same non-negative factors and artifact; switching engines always
+    retrains from scratch. "als_ooc" streams the ratings, memory-mapped from
+    the snapshot, into row and column blocks on disk (along with the seen
+    index and rating counts) without building the matrix, and solves them
+    in worker processes whose combined working set stays within
+    memory_budget_mb.
+
+    The most rated movies (popularity_depth deep) are stored with the model
+    and served to users unknown to it without querying the ratings table.
+
+    progress, if given, is called as progress(stage, fraction) when each
+    stage starts. It may raise to abort training (used to cancel jobs).
+
+    Every stage's wall time and peak memory, the rating matrix's shape and
+    density, and the error after each factorization iteration are returned
+    as metrics and saved next to the model version.
+
+    Returns dict with model version, training info and metrics.
+    """
+    training_engine = get_training_engine(
+        engine, memory_budget_mb=memory_budget_mb, scratch_dir=TRAINING_SCRATCH_DIR
+    )
+    metrics = TrainingMetrics()
+
+    def report(stage: str, fraction: float):
+        if progress is not None:
+            progress(stage, fraction)
+        metrics.start_stage(stage)
+
+    # Ratings recorded after this point are not in the model; serving
+    # merges them in from the recent ratings delta
+    ratings_as_of = datetime.now()
+
+    # Skip retraining when neither the data nor the parameters changed
+    report("extracting", 0.0)
+    fingerprint = ratings_fingerprint(session)
+    previous = _load_previous_model()
+    training_params = {
+        "engine": engine,
+        "factor_dtype": factor_dtype,
+        "precompute_top_k": precompute_top_k,
+        "popularity_depth": popularity_depth,
+    }
+    if (
+        mode == "auto"
+        and previous is not None
+        and previous.get("ratings_fingerprint") == fingerprint
+        and previous.get("training_params") == training_params
+    ):
+        return {
+            "model_version": previous["version"],
+            "total_ratings": previous["total_ratings"],
+            "message": "Ratings unchanged since the latest model, training skipped",
+            "training_engine": engine,
+            "training_mode": "skipped",
+            "mode_reason": "ratings unchanged",
+            "metrics": metrics.finish(),
+        }
+
+    # All ratings as compact NumPy arrays, from the snapshot plus new rows;
+    # out-of-core engines get them memory-mapped and never load them whole
+    ratings = load_training_ratings(
+        session, SNAPSHOT_DIR, fingerprint, mmap=training_engine.out_of_core
+    )
+    fingerprint = ratings["fingerprint"]
+    total_ratings = ratings["stats"]["rows"]
+
+    if total_ratings == 0:
+        raise ValueError("No ratings available to train the model")
+
+    report("building_matrix", 0.2)
+    ratings_source = ratings["stats"]["source"]
+    with training_engine.scratch() as scratch_dir:
+        if scratch_dir is None:
+            # Create sparse user-item matrix (memory proportional to ratings)
+            rating_matrix = build_rating_matrix(
+                ratings["user_ids"], ratings["movie_ids"], ratings["ratings"]
+            )
+            metrics.record_matrix(rating_matrix["matrix"])
+            user_ids, movie_ids = rating_matrix["user_ids"], rating_matrix["movie_ids"]
+            matrix_mean = rating_matrix["matrix"].mean()
+        else:
+            # Row and column blocks straight from the memory-mapped snapshot,
+            # along with the seen index; the matrix is never built
+            scan = scan_ratings(ratings["user_ids"], ratings["movie_ids"], ratings["ratings"])
+            user_ids, movie_ids = scan["user_ids"], scan["movie_ids"]
+            blocks = training_engine.partition_ratings(
+                ratings, scan, scratch_dir, _n_components(len(user_ids), len(movie_ids))
+            )
+            metrics.record_matrix_shape(len(user_ids), len(movie_ids), total_ratings, blocks["nbytes"])
+            matrix_mean = blocks["matrix_mean"]
+        del ratings
+        n_users, n_movies = len(user_ids), len(movie_ids)
+
+        # Factorize, warm-started from the previous version when possible
+        n_components = _n_components(n_users, n_movies)
+        training_mode, mode_reason = choose_training_mode(
+            previous, total_ratings, n_components, mode, engine
+        )
+        report("factorizing", 0.3)
+
+        init = None
+        incremental_runs = 0
+        if training_mode == "incremental":
+            init = warm_start_factors(previous, user_ids, movie_ids, matrix_mean)
+            incremental_runs = previous.get("incremental_runs", 0) + 1
+        if scratch_dir is None:
+            fit = training_engine.fit(
+                rating_matrix["matrix"], n_components, init=init, on_iteration=metrics.record_iteration
+            )
+        else:
+            fit = training_engine.fit_blocks(
+                blocks, n_components, init=init, on_iteration=metrics.record_iteration
+            )
+        user_features = fit["user_features"]
+        item_features = fit["item_features"]
+
+        # CSR index of the movies each user rated, used to exclude them when
+        # serving, and the cold-start fallback: most rated movies, ties
+        # broken by movie ID
+        report("indexing", 0.7)
+        if scratch_dir is None:
+            movie_cols = rating_matrix["movie_cols"]
+            seen_index = build_seen_index(
+                rating_matrix["user_rows"], movie_cols, n_users=n_users
+            )
+            rating_counts = np.bincount(movie_cols, minlength=n_movies)
+        else:
+            seen_index = blocks["seen_index"]
+            rating_counts = scan["movie_counts"]
+        popular_cols = np.argsort(-rating_counts, kind="stable")[:popularity_depth]
+
+        # Nearest-neighbour index over item factors for "similar movies"
+        similarity_index = build_similarity_index(item_features)
+
+        # Serving precision of the factors, checked against float64 top-N lists
+        factors = reduce_precision(user_features, item_features, factor_dtype)
+        factor_overlap = None
+        if factor_dtype != "float64":
+            factor_overlap = top_n_overlap(
+                {"user_features": user_features, "item_features": item_features}, factors
+            )
 
         # Create model version (timestamp-based)
         version = datetime.now().strftime("%Y%m%d_%H%M%S")
+        version_dir = artifact_dir(MODELS_DIR, version)
+        version_dir.mkdir(parents=True, exist_ok=True)
+
+        # Optional post-training stage: precomputed top-K per user
+        topk = None
+        if precompute_top_k:
+            report("materializing_top_k", 0.8)
+            topk = materialize_top_k(
+                {**factors, **seen_index},
+                precompute_top_k,
+                *topk_paths(version_dir),
+            )
 
-        # Save model and metadata
+        # Save model and metadata (arrays as .npy, the rest in the manifest)
+        report("saving", 0.9)
         model_data = {
             "version": version,
-            "model": model,
-            "user_features": user_features,
-            "item_features": item_features,
-            "user_ids": user_item_matrix.index.tolist(),
-            "movie_ids": user_item_matrix.columns.tolist(),
+            "n_components": int(n_components),
+            "reconstruction_err": fit["reconstruction_err"],
+            "training_engine": engine,
+            "n_iter": fit["n_iter"],
+            "training_mode": training_mode,
+            "incremental_runs": incremental_runs,
+            "previous_version": previous["version"] if previous else None,
+            "factor_overlap": factor_overlap,
+            **factors,
+            "user_ids": user_ids,
+            "movie_ids": movie_ids,
             "trained_at": datetime.now().isoformat(),
+            "ratings_as_of": ratings_as_of.isoformat(),
             "total_ratings": total_ratings,
+            "ratings_fingerprint": fingerprint,
+            "training_params": training_params,
+            "topk": topk,
+            "popular_movie_ids": movie_ids[popular_cols],
+            "popular_counts": rating_counts[popular_cols].astype(np.int64),
+            "popularity_depth": popularity_depth,
+            **seen_index,
+            **similarity_index,
         }
+        save_artifact(version_dir, model_data, extra_arrays=TOPK_ARRAYS if topk else ())
+    training_metrics = metrics.finish()
+    save_training_metrics(version_dir, training_metrics)
+
+    # Register the version and switch "latest" atomically (retired versions
+    # are garbage collected), then serve the memory-mapped version from this
+    # process without waiting for the pointer to be noticed
+    publish_version(MODELS_DIR, version)
+    model_holder.swap(load_artifact(version_dir))
+
+    result = {
+        "model_version": version,
+        "total_ratings": total_ratings,
+        "message": "Model trained successfully",
+        "training_engine": engine,
+        "training_mode": training_mode,
+        "mode_reason": mode_reason,
+        "ratings_source": ratings_source,
+        "metrics": training_metrics,
+    }
+    if topk:
+        result["topk"] = topk
+    if factor_overlap is not None:
+        result["factor_overlap"] = factor_overlap
+    return result
+
+
+def list_model_versions() -> dict:
+    """
+    List the retained model versions, newest first, with their training metrics.
+
+    Read from the registry index, so no model is loaded.
+    """
+    return list_versions(MODELS_DIR)
+
+
+def get_model_info() -> dict:
+    """
+    Get version and load time of the model served by this process.
+
+    Picks up a newer artifact on disk before reporting, so the result
+    reflects what the next recommendation request will use.
+    """
+    try:
+        model_holder.get()
+    except ValueError:
+        pass
+    return model_holder.info()
 
-        model_path = MODELS_DIR / f"recommendation_model_{version}.pkl"
-        with open(model_path, "wb") as f:
-            pickle.dump(model_data, f)
 
-        # Also save as "latest" for easy access
-        latest_path = MODELS_DIR / "recommendation_model_latest.pkl"
-        with open(latest_path, "wb") as f:
-            pickle.dump(model_data, f)
+def _get_popular_movies(session: Session, model_data: dict, n: int) -> dict:
+    """
+    Get the N most rated movies as a fallback for users unknown to the model.
 
-        # Update status to completed
-        training_status["status"] = "completed"
-        training_status["completed_at"] = datetime.now().isoformat()
-        training_status["model_version"] = version
-        training_status["total_ratings"] = total_ratings
+    Sliced from the popularity ranking stored with the model; only models
+    trained without one (or a shallower one than n) query the ratings table.
 
+    Returns dict with movie_ids and probabilities (rating counts normalized).
+    """
+    popular_movie_ids = model_data.get("popular_movie_ids")
+    if popular_movie_ids is not None and n <= model_data.get("popularity_depth", 0):
+        counts = np.asarray(model_data["popular_counts"][:n], dtype=np.float64)
         return {
-            "model_version": version,
-            "total_ratings": total_ratings,
-            "message": "Model trained successfully",
+            "movie_ids": np.asarray(popular_movie_ids[:n]).tolist(),
+            "probabilities": (counts / counts.sum()).tolist(),
         }
 
-    except Exception as e:
-        # Update status to failed
-        training_status["status"] = "failed"
-        training_status["completed_at"] = datetime.now().isoformat()
-        training_status["error"] = str(e)
-        raise
+    popular_movies = (
+        session.query(
+            RatingModel.movie_id,
+            func.count(RatingModel.rating_id).label("count")
+        )
+        .group_by(RatingModel.movie_id)
+        .order_by(func.count(RatingModel.rating_id).desc())
+        .limit(n)
+        .all()
+    )
+
+    movie_ids_list = [m.movie_id for m in popular_movies]
+    # Normalize counts to probabilities
+    counts = [m.count for m in popular_movies]
+    total = sum(counts)
+    probabilities = [c / total for c in counts]
+
+    return {"movie_ids": movie_ids_list, "probabilities": probabilities}
+
 
+def _recently_rated(model_data: dict, user_id: int) -> list[int]:
+    """Movies the user rated after the served model read its ratings."""
+    return recent_ratings.movie_ids_for(user_id, since=model_data["ratings_as_of"])
 
-def get_training_status() -> dict:
-    """Get the current status of model training."""
-    return training_status.copy()
+
+def _fold_in_users(session: Session, model_data: dict, user_ids: list[int]) -> dict:
+    """
+    Fold users missing from the model in from their current ratings.
+
+    Vectors are served from the fold-in cache when possible, checked
+    against the users' rating counts and latest rating times (one grouped
+    query), so ratings written through other workers are seen. The ratings
+    of all other users are read with one query. Returns dict of
+    user_id -> (vector or None, rated movie ids).
+    """
+    version = model_data["version"]
+    freshness = dict.fromkeys(user_ids, (0, None))
+    rows = session.query(
+        RatingModel.user_id, func.count(RatingModel.rating_id), func.max(RatingModel.timestamp)
+    ).filter(RatingModel.user_id.in_(user_ids)).group_by(RatingModel.user_id)
+    for user_id, count, latest in rows:
+        freshness[user_id] = (count, latest)
+
+    folded = {}
+    for user_id in user_ids:
+        cached = fold_in_cache.get(user_id, version, freshness[user_id])
+        if cached is not None:
+            folded[user_id] = cached
+
+    missing = [uid for uid in user_ids if uid not in folded]
+    if not missing:
+        return folded
+
+    ratings_by_user = {uid: ([], []) for uid in missing}
+    rows = session.query(RatingModel.user_id, RatingModel.movie_id, RatingModel.rating).filter(
+        RatingModel.user_id.in_(missing)
+    )
+    for user_id, movie_id, rating in rows:
+        movie_ids, ratings = ratings_by_user[user_id]
+        movie_ids.append(movie_id)
+        ratings.append(rating)
+
+    for user_id, (movie_ids, ratings) in ratings_by_user.items():
+        vector = fold_in_user(model_data, movie_ids, ratings)
+        fold_in_cache.put(user_id, version, freshness[user_id], vector, movie_ids)
+        folded[user_id] = (vector, movie_ids)
+
+    return folded
 
 
 def get_recommendations_for_user(
-    session: Session, user_id: int, n: int = 10
+    session: Session, user_id: int, n: int = 10, exclude_rated: bool = True
 ) -> dict:
     """
     Get movie recommendations for a specific user.
 
     Uses the latest trained model to predict ratings and returns
-    top N movies with highest predicted scores.
+    top N movies with highest predicted scores. Users rated after the
+    model was trained are folded in from their current ratings (a cached
+    non-negative projection onto the movie factors); users without any
+    usable ratings get the most popular movies.
+
+    With exclude_rated, movies the user already rated are skipped, using
+    the seen index shipped with the model plus ratings recorded since
+    training, without querying the ratings table.
 
     Returns dict with movie_ids and probabilities.
     Raises ValueError if user not found or model not trained.
@@ -139,64 +484,124 @@ def get_recommendations_for_user(
     if not user:
         raise ValueError(f"User with ID {user_id} not found")
 
-    # Load latest model
-    latest_path = MODELS_DIR / "recommendation_model_latest.pkl"
-    if not latest_path.exists():
-        raise ValueError("No trained model found. Please train the model first.")
-
-    with open(latest_path, "rb") as f:
-        model_data = pickle.load(f)
-
-    user_features = model_data["user_features"]
-    item_features = model_data["item_features"]
-    user_ids = model_data["user_ids"]
-    movie_ids = model_data["movie_ids"]
-
-    # Check if user was in training data
-    if user_id not in user_ids:
-        # For new users, return popular movies (most rated)
-        popular_movies = (
-            session.query(
-                RatingModel.movie_id,
-                func.count(RatingModel.rating_id).label("count")
-            )
-            .group_by(RatingModel.movie_id)
-            .order_by(func.count(RatingModel.rating_id).desc())
-            .limit(n)
-            .all()
+    # Latest model, served from memory (reloaded only when the artifact changes)
+    model_data = model_holder.get()
+
+    # Check if user was in training data (O(1) id -> row lookup)
+    user_row = model_data["user_index"].get(user_id)
+    if user_row is None:
+        vector, rated_movie_ids = _fold_in_users(session, model_data, [user_id])[user_id]
+        if vector is None:
+            # For new users without ratings, return popular movies (most rated)
+            return _get_popular_movies(session, model_data, n)
+        return recommend_for_vector(
+            model_data, vector, n, exclude_movie_ids=rated_movie_ids if exclude_rated else None
         )
 
-        movie_ids_list = [m.movie_id for m in popular_movies]
-        # Normalize counts to probabilities
-        counts = [m.count for m in popular_movies]
-        total = sum(counts)
-        probabilities = [c / total for c in counts]
+    if not exclude_rated:
+        return recommend_for_row(model_data, user_row, n, exclude_rated=False)
+
+    recently_rated = _recently_rated(model_data, user_id)
+
+    # Point lookup in the precomputed top-K table, if it can answer
+    result = lookup_top_k(model_data, user_row, n, recently_rated)
+    if result is not None:
+        return result
 
-        return {"movie_ids": movie_ids_list, "probabilities": probabilities}
+    # Score all movies in one dot product and select the top N without a full sort
+    return recommend_for_row(model_data, user_row, n, exclude_movie_ids=recently_rated)
 
-    # Get user index
-    user_idx = user_ids.index(user_id)
 
-    # Predict ratings for all movies
-    user_vector = user_features[user_idx].reshape(1, -1)
-    predictions = np.dot(user_vector, item_features).flatten()
+def get_recommendations_for_users(
+    session: Session, user_ids: list[int], n: int = 10, exclude_rated: bool = True
+) -> dict:
+    """
+    Get movie recommendations for many users in one pass.
+
+    Existence of all users is checked with a single query, and trained
+    users are scored together with one matrix product per block instead
+    of one request and dot product per user. Users missing from the
+    trained model are folded in from their ratings (one query for all of
+    them); those without usable ratings get the popular-movies fallback,
+    computed once.
+
+    Returns dict with per-user recommendations (in request order, without
+    duplicates) and the ids of users that do not exist.
+    Raises ValueError if model not trained.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+
+    existing_ids = {
+        row.user_id
+        for row in session.query(UserModel.user_id).filter(UserModel.user_id.in_(user_ids))
+    }
+    not_found_user_ids = [uid for uid in user_ids if uid not in existing_ids]
+    found_user_ids = [uid for uid in user_ids if uid in existing_ids]
+
+    model_data = model_holder.get()
+    user_index = model_data["user_index"]
+
+    trained_ids = [uid for uid in found_user_ids if uid in user_index]
+    results_by_user = {}
+
+    # Answer from the precomputed top-K table where possible
+    if exclude_rated:
+        for uid in trained_ids:
+            result = lookup_top_k(model_data, user_index[uid], n, _recently_rated(model_data, uid))
+            if result is not None:
+                results_by_user[uid] = result
+
+    live_ids = [uid for uid in trained_ids if uid not in results_by_user]
+    scored = recommend_for_rows(
+        model_data,
+        [user_index[uid] for uid in live_ids],
+        n,
+        exclude_rated=exclude_rated,
+        exclude_movie_ids=(
+            [_recently_rated(model_data, uid) for uid in live_ids] if exclude_rated else None
+        ),
+    )
+    results_by_user.update(zip(live_ids, scored))
+
+    untrained_ids = [uid for uid in found_user_ids if uid not in user_index]
+    for uid, (vector, rated_movie_ids) in _fold_in_users(session, model_data, untrained_ids).items():
+        if vector is not None:
+            results_by_user[uid] = recommend_for_vector(
+                model_data, vector, n, exclude_movie_ids=rated_movie_ids if exclude_rated else None
+            )
 
-    # Create movie_id to prediction mapping
-    movie_predictions = list(zip(movie_ids, predictions))
+    if len(results_by_user) < len(found_user_ids):
+        popular = _get_popular_movies(session, model_data, n)
+        for uid in found_user_ids:
+            results_by_user.setdefault(uid, popular)
 
-    # Sort by prediction score (descending) and get top N
-    movie_predictions.sort(key=lambda x: x[1], reverse=True)
-    top_recommendations = movie_predictions[:n]
+    recommendations = [
+        {"user_id": uid, **results_by_user[uid]} for uid in found_user_ids
+    ]
+
+    return {"recommendations": recommendations, "not_found_user_ids": not_found_user_ids}
+
+
+def get_similar_movies(movie_id: int, n: int = 10) -> dict:
+    """
+    Get the movies most similar to a given movie.
+
+    Similarity is the cosine between NMF item factors, answered by the
+    nearest-neighbour index built with the served model.
+
+    Returns dict with movie_ids, similarities and the model version.
+    Raises ValueError if the movie is not in the model or model not trained.
+    """
+    model_data = model_holder.get()
 
-    # Extract movie_ids and normalize probabilities
-    recommended_movie_ids = [int(movie_id) for movie_id, _ in top_recommendations]
-    raw_scores = [float(score) for _, score in top_recommendations]
+    item = model_data["movie_index"].get(movie_id)
+    if item is None:
+        raise ValueError(f"Movie with ID {movie_id} not found in trained model")
 
-    # Normalize scores to probabilities (sum to 1)
-    total_score = sum(raw_scores)
-    if total_score > 0:
-        probabilities = [score / total_score for score in raw_scores]
-    else:
-        probabilities = [1.0 / len(raw_scores)] * len(raw_scores)
+    items, similarities = find_similar(model_data, item, n)
 
-    return {"movie_ids": recommended_movie_ids, "probabilities": probabilities}
+    return {
+        "movie_ids": model_data["movie_id_array"][items].tolist(),
+        "similarities": similarities.astype(np.float64).tolist(),
+        "model_version": model_data["version"],
+    }
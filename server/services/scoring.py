@@ -0,0 +1,251 @@
+from datetime import datetime
+
+import numpy as np
+
+from server.services.seen_index import seen_positions
+
+# Memory budget for the temporaries of one block of a batch request: the
+# (block x movies) float64 score matrix and argpartition's index array of the
+# same shape. At 87k movies this scores ~24 users per block.
+BATCH_BLOCK_BYTES = 32 * 1024 * 1024
+
+# Movies dequantized per step when scoring int8 factors; bounds the float32
+# copy of the item factors made per request
+DEQUANTIZE_BLOCK_SIZE = 8192
+
+
+def prepare_model_data(model_data: dict) -> dict:
+    """
+    Add lookup structures used by the scoring hot path to loaded model data.
+
+    Builds id -> row/column mappings and an array of movie ids, so a
+    request never scans the id lists or builds per-movie Python objects.
+    Returns a shallow copy; the persisted artifact is left unchanged.
+    """
+    prepared = dict(model_data)
+    prepared["user_index"] = {
+        int(user_id): row for row, user_id in enumerate(model_data["user_ids"])
+    }
+    prepared["movie_index"] = {
+        int(movie_id): col for col, movie_id in enumerate(model_data["movie_ids"])
+    }
+    prepared["movie_id_array"] = np.asarray(model_data["movie_ids"], dtype=np.int64)
+
+    # Older artifacts don't record when ratings were read; treat every
+    # rating recorded since process start as newer than the model
+    ratings_as_of = model_data.get("ratings_as_of")
+    prepared["ratings_as_of"] = datetime.fromisoformat(ratings_as_of) if ratings_as_of else None
+    return prepared
+
+
+def top_n_indices(scores: np.ndarray, n: int) -> np.ndarray:
+    """
+    Return indices of the n highest scores along the last axis, highest first.
+
+    Works on a single score vector or a (users x movies) score matrix.
+    Uses a partial selection (argpartition) so only the n selected scores
+    are sorted instead of the whole row.
+    """
+    n_cols = scores.shape[-1]
+    n = min(n, n_cols)
+    if n <= 0:
+        return np.empty(scores.shape[:-1] + (0,), dtype=np.intp)
+
+    if n < n_cols:
+        candidates = np.argpartition(scores, -n, axis=-1)[..., -n:]
+    else:
+        candidates = np.broadcast_to(np.arange(n_cols), scores.shape).copy()
+
+    candidate_scores = np.take_along_axis(scores, candidates, axis=-1)
+    order = np.argsort(-candidate_scores, axis=-1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=-1)
+
+
+def score_rows(model_data: dict, user_rows) -> np.ndarray:
+    """
+    Predict scores of every movie for one user row or an array of rows.
+
+    Works on factors stored as float64, float32 or int8 with per-row
+    scales (user_scales / item_scales). Returns a (movies,) or
+    (len(user_rows) x movies) array.
+    """
+    user_vectors = model_data["user_features"][user_rows]
+
+    user_scales = model_data.get("user_scales")
+    if user_scales is not None:
+        user_vectors = user_vectors.astype(np.float32)
+        user_vectors *= user_scales[user_rows][..., np.newaxis]
+
+    return score_vectors(model_data, user_vectors)
+
+
+def score_vectors(model_data: dict, user_vectors: np.ndarray) -> np.ndarray:
+    """
+    Predict scores of every movie for one or more user factor vectors.
+
+    int8 item factors are dequantized to float32 one block of movies at a
+    time, so the full item matrix is never copied.
+    """
+    item_features = model_data["item_features"]
+
+    item_scales = model_data.get("item_scales")
+    if item_scales is None:
+        return user_vectors @ item_features
+
+    user_vectors = user_vectors.astype(np.float32)
+    n_movies = item_features.shape[1]
+    predictions = np.empty(user_vectors.shape[:-1] + (n_movies,), dtype=np.float32)
+    for start in range(0, n_movies, DEQUANTIZE_BLOCK_SIZE):
+        end = min(start + DEQUANTIZE_BLOCK_SIZE, n_movies)
+        block = item_features[:, start:end].astype(np.float32)
+        np.multiply(user_vectors @ block, item_scales[start:end], out=predictions[..., start:end])
+    return predictions
+
+
+def normalize_scores(scores: np.ndarray) -> np.ndarray:
+    """
+    Normalize scores along the last axis to probabilities (sum to 1).
+
+    Rows that sum to 0 fall back to a uniform distribution.
+    """
+    if scores.shape[-1] == 0:
+        return scores.astype(np.float64)
+
+    totals = scores.sum(axis=-1, keepdims=True)
+    uniform = np.full(scores.shape, 1.0 / scores.shape[-1])
+    safe_totals = np.where(totals > 0, totals, 1.0)
+    return np.where(totals > 0, scores / safe_totals, uniform)
+
+
+def mask_excluded(
+    predictions: np.ndarray,
+    model_data: dict,
+    user_rows: np.ndarray,
+    exclude_rated: bool = True,
+    exclude_movie_ids: list[list[int]] | None = None,
+):
+    """
+    Set scores of movies that must not be recommended to -inf, in place.
+
+    predictions is a (len(user_rows) x movies) score matrix. Masks the
+    movies each user rated in the training data (seen index) when
+    exclude_rated is set, plus any extra movie ids given per user.
+    """
+    if exclude_rated:
+        positions, columns = seen_positions(model_data, user_rows)
+        predictions[positions, columns] = -np.inf
+
+    if exclude_movie_ids:
+        movie_index = model_data["movie_index"]
+        for position, movie_ids in enumerate(exclude_movie_ids):
+            columns = [movie_index[m] for m in movie_ids if m in movie_index]
+            predictions[position, columns] = -np.inf
+
+
+def recommend_for_row(
+    model_data: dict,
+    user_row: int,
+    n: int,
+    exclude_rated: bool = True,
+    exclude_movie_ids: list[int] | None = None,
+) -> dict:
+    """
+    Score every movie for one trained user and return the top N.
+
+    Movies the user already rated (and exclude_movie_ids) are skipped, so
+    fewer than N movies are returned when not enough unrated ones remain.
+    model_data must have been passed through prepare_model_data.
+    Returns dict with movie_ids and probabilities.
+    """
+    predictions = score_rows(model_data, user_row)
+    mask_excluded(
+        predictions[np.newaxis],
+        model_data,
+        np.array([user_row]),
+        exclude_rated,
+        [exclude_movie_ids] if exclude_movie_ids else None,
+    )
+    return _top_n_result(model_data, predictions, n)
+
+
+def recommend_for_vector(
+    model_data: dict,
+    user_vector: np.ndarray,
+    n: int,
+    exclude_movie_ids: list[int] | None = None,
+) -> dict:
+    """
+    Score every movie for a user factor vector not stored in the model.
+
+    Used for users folded in at request time; exclude_movie_ids holds the
+    movies they rated. Returns dict with movie_ids and probabilities.
+    """
+    predictions = score_vectors(model_data, user_vector)
+    mask_excluded(
+        predictions[np.newaxis],
+        model_data,
+        np.empty(0, dtype=np.intp),
+        exclude_rated=False,
+        exclude_movie_ids=[exclude_movie_ids] if exclude_movie_ids else None,
+    )
+    return _top_n_result(model_data, predictions, n)
+
+
+def _top_n_result(model_data: dict, predictions: np.ndarray, n: int) -> dict:
+    """Select the top N of a masked score vector as movie ids and probabilities."""
+    top = top_n_indices(predictions, n)
+    top = top[np.isfinite(predictions[top])]
+    probabilities = normalize_scores(predictions[top].astype(np.float64))
+
+    return {
+        "movie_ids": model_data["movie_id_array"][top].tolist(),
+        "probabilities": probabilities.tolist(),
+    }
+
+
+def recommend_for_rows(
+    model_data: dict,
+    user_rows: list[int],
+    n: int,
+    exclude_rated: bool = True,
+    exclude_movie_ids: list[list[int]] | None = None,
+    block_bytes: int = BATCH_BLOCK_BYTES,
+) -> list[dict]:
+    """
+    Score every movie for many trained users and return the top N for each.
+
+    Users are scored in blocks with one (block x k) @ (k x movies) product
+    per block, with already-rated movies masked as in recommend_for_row.
+    Blocks are sized to keep the block's scores and top-N selection within
+    block_bytes, however large the catalogue.
+    exclude_movie_ids, if given, holds extra movie ids per user row.
+    model_data must have been passed through prepare_model_data.
+    Returns one dict with movie_ids and probabilities per user row, in order.
+    """
+    movie_id_array = model_data["movie_id_array"]
+    # float64 score + intp index per movie and user
+    block_size = max(1, block_bytes // (len(movie_id_array) * 16))
+
+    results = []
+    for start in range(0, len(user_rows), block_size):
+        block_rows = np.asarray(user_rows[start:start + block_size], dtype=np.intp)
+        predictions = score_rows(model_data, block_rows)
+        mask_excluded(
+            predictions,
+            model_data,
+            block_rows,
+            exclude_rated,
+            exclude_movie_ids[start:start + block_size] if exclude_movie_ids else None,
+        )
+
+        top = top_n_indices(predictions, n)
+        top_scores = np.take_along_axis(predictions, top, axis=-1)
+
+        for movie_rows, row_scores in zip(top, top_scores):
+            keep = np.isfinite(row_scores)
+            results.append({
+                "movie_ids": movie_id_array[movie_rows[keep]].tolist(),
+                "probabilities": normalize_scores(row_scores[keep].astype(np.float64)).tolist(),
+            })
+
+    return results
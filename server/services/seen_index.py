@@ -0,0 +1,110 @@
+import threading
+from datetime import datetime
+
+import numpy as np
+
+
+def build_seen_index(user_rows: np.ndarray, movie_cols: np.ndarray, n_users: int) -> dict:
+    """
+    Build a CSR index of the movie columns each trained user has rated.
+
+    user_rows and movie_cols are the model row/column of every rating.
+    Returns dict with seen_indptr (n_users + 1) and seen_indices, where the
+    columns rated by user row r are seen_indices[seen_indptr[r]:seen_indptr[r + 1]].
+    """
+    order = np.lexsort((movie_cols, user_rows))
+    counts = np.bincount(user_rows, minlength=n_users)
+
+    indptr = np.zeros(n_users + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+
+    return {
+        "seen_indptr": indptr,
+        "seen_indices": np.asarray(movie_cols, dtype=np.int32)[order],
+    }
+
+
+def seen_positions(model_data: dict, user_rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Gather the rated columns of several user rows from the CSR index.
+
+    Returns (positions, columns) so that scores[positions, columns] addresses
+    every already-rated movie of a (len(user_rows) x movies) score matrix.
+    Models trained without a seen index yield empty arrays.
+    """
+    indptr = model_data.get("seen_indptr")
+    if indptr is None:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty
+
+    starts = indptr[user_rows]
+    lengths = indptr[user_rows + 1] - starts
+
+    positions = np.repeat(np.arange(len(user_rows)), lengths)
+    # Offset of every entry within its own row's slice
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    columns = model_data["seen_indices"][np.repeat(starts, lengths) + offsets]
+
+    return positions, columns
+
+
+class RecentRatings:
+    """
+    Small in-process delta of ratings written since the served model was trained.
+
+    Complements the seen index shipped with the model, so a movie rated after
+    training is excluded from recommendations without querying the ratings
+    table. Entries older than the model's ratings snapshot are covered by the
+    seen index and are dropped whenever this process starts serving a new
+    model.
+
+    The delta only holds ratings written through this process. With several
+    API workers, a movie rated through one worker can still be recommended
+    by the others until the next model that includes the rating is served.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ratings: dict[int, dict[int, datetime]] = {}
+
+    def add(self, user_id: int, movie_id: int, rated_at: datetime | None = None):
+        """Record that a user rated a movie."""
+        rated_at = rated_at or datetime.now()
+        with self._lock:
+            self._ratings.setdefault(user_id, {})[movie_id] = rated_at
+
+    def movie_ids_for(self, user_id: int, since: datetime | None = None) -> list[int]:
+        """Return movies the user rated at or after ``since`` (all if None)."""
+        user_ratings = self._ratings.get(user_id)
+        if not user_ratings:
+            return []
+
+        with self._lock:
+            return [
+                movie_id
+                for movie_id, rated_at in user_ratings.items()
+                if since is None or rated_at >= since
+            ]
+
+    def prune(self, before: datetime):
+        """Drop entries recorded before ``before`` (already in the model)."""
+        with self._lock:
+            for user_id in list(self._ratings):
+                user_ratings = {
+                    movie_id: rated_at
+                    for movie_id, rated_at in self._ratings[user_id].items()
+                    if rated_at >= before
+                }
+                if user_ratings:
+                    self._ratings[user_id] = user_ratings
+                else:
+                    del self._ratings[user_id]
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._ratings.clear()
+
+
+# Process-wide delta, fed by the ratings service
+recent_ratings = RecentRatings()
@@ -0,0 +1,135 @@
+import numpy as np
+
+from server.services.scoring import top_n_indices
+
+# Catalogs up to this many movies are searched exactly; larger ones get an
+# IVF (inverted file) index so a query only scans a few clusters
+EXACT_SEARCH_MAX_ITEMS = 20_000
+
+# Movies scored per block in exact search
+EXACT_BLOCK_SIZE = 16_384
+
+# k-means iterations used to build the IVF clusters
+IVF_TRAIN_ITERATIONS = 10
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length; all-zero rows stay zero."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1.0)
+
+
+def _assign_clusters(vectors: np.ndarray, centroids: np.ndarray, block_size: int) -> np.ndarray:
+    """Return the index of the most similar centroid for every vector."""
+    assignments = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], block_size):
+        block = vectors[start:start + block_size]
+        assignments[start:start + block_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+
+def build_similarity_index(
+    item_features: np.ndarray,
+    exact_max_items: int = EXACT_SEARCH_MAX_ITEMS,
+    n_lists: int | None = None,
+    seed: int = 42,
+) -> dict:
+    """
+    Build a cosine nearest-neighbour index over item factors.
+
+    item_features is the (k x movies) NMF components matrix. Small catalogs
+    get an exact index (normalized vectors only). Larger ones get an IVF
+    index: movies are grouped by spherical k-means into n_lists clusters
+    (default ~sqrt(movies)), stored as a CSR-style list per cluster with
+    each cluster's vectors kept contiguous, so a query scans slices.
+
+    Returns dict of arrays and parameters to store with the model.
+    """
+    vectors = _normalize_rows(np.ascontiguousarray(item_features.T, dtype=np.float32))
+    n_items = vectors.shape[0]
+
+    if n_items <= exact_max_items:
+        return {"sim_kind": "exact", "sim_vectors": vectors}
+
+    n_lists = n_lists or max(1, int(np.sqrt(n_items)))
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(n_items, size=n_lists, replace=False)].copy()
+
+    for _ in range(IVF_TRAIN_ITERATIONS):
+        assignments = _assign_clusters(vectors, centroids, EXACT_BLOCK_SIZE)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        # Keep the previous centroid for clusters that ended up empty
+        empty = ~sums.any(axis=1)
+        sums[empty] = centroids[empty]
+        centroids = _normalize_rows(sums)
+
+    assignments = _assign_clusters(vectors, centroids, EXACT_BLOCK_SIZE)
+    list_items = np.argsort(assignments, kind="stable").astype(np.int32)
+    list_indptr = np.zeros(n_lists + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assignments, minlength=n_lists), out=list_indptr[1:])
+
+    return {
+        "sim_kind": "ivf",
+        "sim_vectors": vectors,
+        "sim_centroids": centroids,
+        "sim_list_indptr": list_indptr,
+        "sim_list_items": list_items,
+        "sim_list_vectors": vectors[list_items],
+    }
+
+
+def _exact_search(vectors: np.ndarray, query: np.ndarray, n: int, block_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Scan all vectors block by block, keeping a running top n."""
+    best_items = np.empty(0, dtype=np.intp)
+    best_scores = np.empty(0, dtype=np.float32)
+
+    for start in range(0, vectors.shape[0], block_size):
+        scores = vectors[start:start + block_size] @ query
+        top = top_n_indices(scores, n)
+        best_items = np.concatenate([best_items, top + start])
+        best_scores = np.concatenate([best_scores, scores[top]])
+
+        keep = top_n_indices(best_scores, n)
+        best_items, best_scores = best_items[keep], best_scores[keep]
+
+    return best_items, best_scores
+
+
+def _ivf_search(index: dict, query: np.ndarray, n: int, n_probe: int) -> tuple[np.ndarray, np.ndarray]:
+    """Scan only the movies in the n_probe clusters closest to the query."""
+    indptr = index["sim_list_indptr"]
+    list_items = index["sim_list_items"]
+    list_vectors = index["sim_list_vectors"]
+
+    probe = top_n_indices(index["sim_centroids"] @ query, n_probe)
+    slices = [slice(indptr[c], indptr[c + 1]) for c in probe]
+
+    candidates = np.concatenate([list_items[s] for s in slices])
+    scores = np.concatenate([list_vectors[s] @ query for s in slices])
+    top = top_n_indices(scores, n)
+    return candidates[top], scores[top]
+
+
+def find_similar(
+    index: dict, item: int, n: int, n_probe: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Find the n movies most similar (cosine) to the movie at column ``item``.
+
+    n_probe sets how many IVF clusters are scanned (default ~1/16 of them,
+    at least 8); it is ignored for exact indexes. The movie itself is
+    excluded. Returns (movie columns, similarities), most similar first.
+    """
+    query = index["sim_vectors"][item]
+
+    # Ask for one extra result since the movie is its own best match
+    if index["sim_kind"] == "ivf":
+        n_lists = index["sim_centroids"].shape[0]
+        n_probe = n_probe or min(n_lists, max(8, n_lists // 16))
+        items, scores = _ivf_search(index, query, n + 1, n_probe)
+    else:
+        items, scores = _exact_search(index["sim_vectors"], query, n + 1, EXACT_BLOCK_SIZE)
+
+    keep = items != item
+    return items[keep][:n], scores[keep][:n]
@@ -0,0 +1,133 @@
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from server.services.scoring import mask_excluded, normalize_scores, score_rows, top_n_indices
+
+logger = logging.getLogger(__name__)
+
+# Memory budget for the (block x movies) score matrix while materializing
+TOPK_BLOCK_BYTES = 256 * 1024 * 1024
+
+# Array names of the table inside a model artifact directory
+TOPK_ARRAYS = ("topk_movies", "topk_scores")
+
+
+def topk_paths(version_dir: Path) -> tuple[Path, Path]:
+    """Paths of the top-K movie column and score arrays in a model directory."""
+    return tuple(version_dir / f"{name}.npy" for name in TOPK_ARRAYS)
+
+
+def materialize_top_k(
+    model_data: dict,
+    k: int,
+    movies_path: Path,
+    scores_path: Path,
+    block_bytes: int = TOPK_BLOCK_BYTES,
+) -> dict:
+    """
+    Precompute the top K unrated movies of every trained user.
+
+    Users are scored in blocks sized to keep the score matrix within
+    block_bytes, and results are written straight to two memory-mapped
+    .npy files keyed by user row: movie columns (int32, -1 when fewer than
+    K unrated movies exist) and scores (float32). Files are written under
+    temporary names and renamed into place once complete.
+
+    Returns dict with k, elapsed seconds and the size of the output in bytes.
+    """
+    start = time.perf_counter()
+
+    n_users = model_data["user_features"].shape[0]
+    n_movies = model_data["item_features"].shape[1]
+    k = min(k, n_movies)
+    block_rows = max(1, block_bytes // (n_movies * 8))
+
+    tmp_movies_path = movies_path.with_name(f".{movies_path.name}.tmp")
+    tmp_scores_path = scores_path.with_name(f".{scores_path.name}.tmp")
+    top_movies = np.lib.format.open_memmap(
+        tmp_movies_path, mode="w+", dtype=np.int32, shape=(n_users, k)
+    )
+    top_scores = np.lib.format.open_memmap(
+        tmp_scores_path, mode="w+", dtype=np.float32, shape=(n_users, k)
+    )
+
+    for block_start in range(0, n_users, block_rows):
+        rows = np.arange(block_start, min(block_start + block_rows, n_users))
+        predictions = score_rows(model_data, rows)
+        mask_excluded(predictions, model_data, rows)
+
+        top = top_n_indices(predictions, k)
+        scores = np.take_along_axis(predictions, top, axis=-1)
+        exhausted = ~np.isfinite(scores)
+
+        top_movies[rows] = np.where(exhausted, -1, top)
+        top_scores[rows] = np.where(exhausted, 0.0, scores)
+
+    top_movies.flush()
+    top_scores.flush()
+    del top_movies, top_scores
+    os.replace(tmp_movies_path, movies_path)
+    os.replace(tmp_scores_path, scores_path)
+
+    result = {
+        "k": k,
+        "seconds": round(time.perf_counter() - start, 3),
+        "bytes": movies_path.stat().st_size + scores_path.stat().st_size,
+    }
+    logger.info(
+        "Materialized top-%d for %d users in %.2fs (%.1f MB)",
+        k, n_users, result["seconds"], result["bytes"] / 1024 / 1024,
+    )
+    return result
+
+
+def load_top_k(movies_path: Path, scores_path: Path) -> tuple[np.ndarray, np.ndarray] | None:
+    """Open a materialized top-K table memory-mapped, or None if it is missing."""
+    if not movies_path.exists() or not scores_path.exists():
+        return None
+    return np.load(movies_path, mmap_mode="r"), np.load(scores_path, mmap_mode="r")
+
+
+def lookup_top_k(
+    model_data: dict, user_row: int, n: int, exclude_movie_ids: list[int] | None = None
+) -> dict | None:
+    """
+    Answer a recommendation request from the materialized top-K table.
+
+    Movies rated after training (exclude_movie_ids) are dropped from the
+    stored list. Returns None when the table can't answer the request
+    (no table, n above K, or too few stored movies left after dropping),
+    in which case the caller falls back to live scoring.
+    """
+    table = model_data.get("topk_table")
+    if table is None:
+        return None
+
+    top_movies, top_scores = table
+    if n > top_movies.shape[1]:
+        return None
+
+    columns = np.asarray(top_movies[user_row])
+    scores = np.asarray(top_scores[user_row], dtype=np.float64)
+
+    keep = columns >= 0
+    # A padded row already holds every unrated movie; a full one may have more
+    complete = not keep.all()
+
+    if exclude_movie_ids:
+        movie_index = model_data["movie_index"]
+        excluded = [movie_index[m] for m in exclude_movie_ids if m in movie_index]
+        keep &= ~np.isin(columns, excluded)
+
+    if keep.sum() < n and not complete:
+        return None
+
+    columns, scores = columns[keep][:n], scores[keep][:n]
+    return {
+        "movie_ids": model_data["movie_id_array"][columns].tolist(),
+        "probabilities": normalize_scores(scores).tolist(),
+    }
@@ -0,0 +1,174 @@
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.orm import Session
+
+from server.models.ratings import RatingModel
+from server.services.training_metrics import peak_rss_mb
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched from the server-side cursor per round trip
+EXTRACT_CHUNK_ROWS = 100_000
+
+# Ratings per chunk when streaming (possibly memory-mapped) rating arrays
+SCAN_CHUNK_ROWS = 1_000_000
+
+
+def extract_ratings(
+    session: Session,
+    chunk_rows: int = EXTRACT_CHUNK_ROWS,
+    include_timestamps: bool = False,
+    include_rating_ids: bool = False,
+    where=None,
+) -> dict:
+    """
+    Stream every rating into preallocated NumPy arrays.
+
+    Rows come from a server-side cursor (stream_results) in chunks of
+    chunk_rows, so only one chunk of Python row objects exists at a time,
+    and the rating is cast to a float in SQL instead of arriving as Decimal.
+    Arrays are sized from a count query first and grown if ratings were
+    added in between.
+
+    Returns dict with user_ids and movie_ids (int32), ratings (float32),
+    and stats (rows, seconds, rows_per_second, peak_rss_mb). With
+    include_timestamps, also timestamps (datetime64[us]), e.g. for
+    time-based evaluation splits. With include_rating_ids, also
+    rating_ids (int64). where optionally restricts the rows read (a
+    SQLAlchemy condition on RatingModel).
+    """
+    start = time.perf_counter()
+
+    count_query = session.query(func.count(RatingModel.rating_id))
+    if where is not None:
+        count_query = count_query.filter(where)
+    capacity = count_query.scalar()
+
+    names = ["user_ids", "movie_ids", "ratings"]
+    dtypes = [np.int32, np.int32, np.float32]
+    selected = [RatingModel.user_id, RatingModel.movie_id, cast(RatingModel.rating, Float)]
+    if include_timestamps:
+        names.append("timestamps")
+        dtypes.append("datetime64[us]")
+        selected.append(RatingModel.timestamp)
+    if include_rating_ids:
+        names.append("rating_ids")
+        dtypes.append(np.int64)
+        selected.append(RatingModel.rating_id)
+    columns = [np.empty(capacity, dtype=dtype) for dtype in dtypes]
+
+    # Core execution on the session's connection skips ORM row processing
+    statement = select(*selected)
+    if where is not None:
+        statement = statement.where(where)
+    result = session.connection().execute(
+        statement, execution_options={"stream_results": True, "yield_per": chunk_rows}
+    )
+
+    filled = 0
+    for chunk in result.partitions(chunk_rows):
+        end = filled + len(chunk)
+        if end > capacity:
+            capacity = max(end, capacity * 2)
+            columns = [np.resize(a, capacity) for a in columns]
+        # Converting Row objects one column at a time is far faster than np.array(chunk)
+        for target, column in zip(columns, zip(*chunk)):
+            target[filled:end] = np.fromiter(column, dtype=target.dtype, count=len(chunk))
+        filled = end
+
+    seconds = time.perf_counter() - start
+    stats = {
+        "rows": filled,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(filled / seconds) if seconds > 0 else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+    logger.info(
+        "Extracted %d ratings in %.2fs (%s rows/s, peak RSS %.1f MB)",
+        filled, seconds, stats["rows_per_second"], stats["peak_rss_mb"],
+    )
+
+    return {
+        **{name: column[:filled] for name, column in zip(names, columns)},
+        "stats": stats,
+    }
+
+
+def build_rating_matrix(user_ids, movie_ids, ratings) -> dict:
+    """
+    Build the sparse user x movie rating matrix used for training.
+
+    Ids are factorized into sorted integer codes (the row/column order a
+    pivot table would use) and the ratings go straight into a CSR matrix,
+    so memory grows with the number of ratings, not users x movies.
+
+    Returns dict with matrix (float64 CSR), user_ids and movie_ids (int64,
+    one per row/column), and user_rows and movie_cols (the row/column of
+    every rating, in input order).
+    """
+    user_rows, unique_user_ids = pd.factorize(np.asarray(user_ids), sort=True)
+    movie_cols, unique_movie_ids = pd.factorize(np.asarray(movie_ids), sort=True)
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(ratings, dtype=np.float64), (user_rows, movie_cols)),
+        shape=(len(unique_user_ids), len(unique_movie_ids)),
+    )
+
+    return {
+        "matrix": matrix,
+        "user_ids": np.asarray(unique_user_ids, dtype=np.int64),
+        "movie_ids": np.asarray(unique_movie_ids, dtype=np.int64),
+        "user_rows": user_rows,
+        "movie_cols": movie_cols,
+    }
+
+
+def _merge_counts(counts: tuple[np.ndarray, np.ndarray] | None, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Add the occurrences of ids to (sorted unique ids, counts)."""
+    ids, id_counts = np.unique(ids, return_counts=True)
+    if counts is None:
+        return ids.astype(np.int64), id_counts.astype(np.int64)
+    merged, inverse = np.unique(np.concatenate([counts[0], ids]), return_inverse=True)
+    weights = np.concatenate([counts[1], id_counts])
+    return merged, np.bincount(inverse, weights=weights).astype(np.int64)
+
+
+def scan_ratings(user_ids, movie_ids, ratings, chunk_rows: int = SCAN_CHUNK_ROWS) -> dict:
+    """
+    Summarize the ratings in one streamed pass, without building the matrix.
+
+    The arrays are read chunk_rows at a time, so memory-mapped ones are
+    never loaded whole; memory grows with the number of distinct users
+    and movies only.
+
+    Returns dict with user_ids and movie_ids (sorted int64, the rows and
+    columns build_rating_matrix would produce), user_counts and
+    movie_counts (ratings per row/column), n_ratings, and rating_sum and
+    rating_sq_sum (sum of the ratings and of their squares).
+    """
+    users = movies = None
+    rating_sum = rating_sq_sum = 0.0
+    for start in range(0, len(ratings), chunk_rows):
+        end = start + chunk_rows
+        users = _merge_counts(users, np.asarray(user_ids[start:end]))
+        movies = _merge_counts(movies, np.asarray(movie_ids[start:end]))
+        values = np.asarray(ratings[start:end], dtype=np.float64)
+        rating_sum += float(values.sum())
+        rating_sq_sum += float(np.dot(values, values))
+
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+    users, movies = users or empty, movies or empty
+    return {
+        "user_ids": users[0],
+        "movie_ids": movies[0],
+        "user_counts": users[1],
+        "movie_counts": movies[1],
+        "n_ratings": len(ratings),
+        "rating_sum": rating_sum,
+        "rating_sq_sum": rating_sq_sum,
+    }
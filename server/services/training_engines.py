@@ -0,0 +1,504 @@
+import contextlib
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from scipy import sparse
+from sklearn.decomposition import NMF
+
+# Rows of the rating matrix solved per task by the ALS engine
+ALS_BLOCK_ROWS = 4096
+
+# Ridge added to the k x k Gram matrix of every ALS half-step
+ALS_REGULARIZATION = 1e-3
+
+# ALS stops early once the reconstruction error improves by less than this
+ALS_TOLERANCE = 1e-4
+
+# Memory the out-of-core engine may use across all its worker processes
+OUT_OF_CORE_MEMORY_BUDGET_MB = 1024
+
+# A rating spilled to its block's file while partitioning: row, column, value
+BLOCK_TRIPLE = np.dtype([("row", np.int32), ("col", np.int32), ("value", np.float64)])
+
+# Ratings mapped to their blocks per chunk while partitioning
+PARTITION_CHUNK_ROWS = 1_000_000
+
+
+def reconstruction_error(
+    matrix_sq_norm: float,
+    user_features: np.ndarray,
+    item_features: np.ndarray,
+    cross_term: float,
+) -> float:
+    """
+    Frobenius norm ||R - W H|| of the zero-filled rating matrix, computed
+    without forming W H: ||R||^2 - 2 tr(W^T R H^T) + tr((W^T W)(H H^T)).
+
+    cross_term is tr(W^T R H^T), which the ALS half-steps already produce.
+    """
+    squared = (
+        matrix_sq_norm
+        - 2.0 * cross_term
+        + np.sum((user_features.T @ user_features) * (item_features @ item_features.T))
+    )
+    return float(np.sqrt(max(squared, 0.0)))
+
+
+class TrainingEngine:
+    """
+    Interface of the matrix factorization engines used for training.
+
+    An engine factorizes the sparse user x movie rating matrix R (unrated
+    movies count as 0) into non-negative user factors W (users x k) and
+    item factors H (k x movies) with R ~ W H, which is the artifact shape
+    serving, fold-in and the similarity index expect.
+    """
+
+    name = ""
+    # Iterations of a full fit and of a warm-started incremental one
+    full_max_iter = 200
+    incremental_max_iter = 20
+    # Memory limit and scratch directory, for engines that work out of core
+    out_of_core = False
+    memory_budget_mb: int | None = None
+    scratch_dir: Path | None = None
+
+    def scratch(self) -> contextlib.AbstractContextManager[Path | None]:
+        """
+        Directory for the files of one training run, removed afterwards.
+
+        Yields None for in-memory engines.
+        """
+        return contextlib.nullcontext()
+
+    def fit(
+        self,
+        matrix: sparse.csr_matrix,
+        n_components: int,
+        init: tuple[np.ndarray, np.ndarray] | None = None,
+        max_iter: int | None = None,
+        on_iteration: Callable[[int, float | None], None] | None = None,
+    ) -> dict:
+        """
+        Factorize matrix into n_components factors.
+
+        init is an optional (W, H) warm start. on_iteration, if given, is
+        called after every iteration with its number (from 1) and the
+        reconstruction error when the engine tracks it (None otherwise).
+
+        Returns dict with user_features, item_features,
+        reconstruction_err and n_iter.
+        """
+        raise NotImplementedError
+
+
+class NMFEngine(TrainingEngine):
+    """sklearn NMF (coordinate descent), the original training engine."""
+
+    name = "nmf"
+
+    def fit(self, matrix, n_components, init=None, max_iter=None, on_iteration=None):
+        max_iter = max_iter or (self.full_max_iter if init is None else self.incremental_max_iter)
+        if init is not None:
+            model = NMF(n_components=n_components, init="custom", max_iter=max_iter)
+            user_features = model.fit_transform(matrix, W=init[0], H=init[1])
+        else:
+            model = NMF(n_components=n_components, init="random", random_state=42, max_iter=max_iter)
+            user_features = model.fit_transform(matrix)
+
+        # sklearn runs the iterations internally; report the final one only
+        if on_iteration is not None:
+            on_iteration(model.n_iter_, float(model.reconstruction_err_))
+
+        return {
+            "user_features": user_features,
+            "item_features": model.components_,
+            "reconstruction_err": float(model.reconstruction_err_),
+            "n_iter": int(model.n_iter_),
+        }
+
+
+class ALSEngine(TrainingEngine):
+    """
+    Alternating least squares with non-negativity projection.
+
+    Each half-step solves the ridge least-squares problem for one side with
+    the other fixed, in closed form for all rows at once:
+    W = max(0, R H^T (H H^T + lambda I)^-1), then the same for H with R^T.
+    Only the k x k Gram matrix is inverted; the expensive part is the
+    sparse-dense product R H^T, which is split into row blocks solved on a
+    thread pool (NumPy and SciPy release the GIL in these kernels).
+    """
+
+    name = "als"
+    full_max_iter = 50
+    incremental_max_iter = 5
+
+    def __init__(
+        self,
+        regularization: float = ALS_REGULARIZATION,
+        block_rows: int = ALS_BLOCK_ROWS,
+        n_threads: int | None = None,
+        tolerance: float = ALS_TOLERANCE,
+        seed: int = 42,
+    ):
+        self.regularization = regularization
+        self.block_rows = block_rows
+        self.n_threads = n_threads or os.cpu_count() or 1
+        self.tolerance = tolerance
+        self.seed = seed
+
+    def _ridge_inverse(self, fixed: np.ndarray) -> np.ndarray:
+        """Inverse of the regularized k x k Gram matrix of (k x n) factors."""
+        gram = fixed @ fixed.T
+        gram[np.diag_indices_from(gram)] += self.regularization * max(np.trace(gram) / len(gram), 1e-12)
+        return np.linalg.inv(gram)
+
+    def _initial_items(self, matrix_mean: float, n_movies: int, n_components: int, init) -> np.ndarray:
+        if init is not None:
+            return np.array(init[1], dtype=np.float64)
+        # Same scale as sklearn's random NMF init
+        rng = np.random.default_rng(self.seed)
+        scale = np.sqrt(matrix_mean / n_components)
+        return scale * np.abs(rng.standard_normal((n_components, n_movies)))
+
+    def _iterate(
+        self,
+        solve_users: Callable[[np.ndarray], np.ndarray],
+        solve_items: Callable[[np.ndarray], tuple[np.ndarray, float]],
+        item_features: np.ndarray,
+        matrix_sq_norm: float,
+        max_iter: int,
+        on_iteration,
+    ) -> dict:
+        """
+        Alternate the two half-steps until the error stops improving.
+
+        solve_users(H) returns W; solve_items(W) returns (H^T, tr(W^T R H^T)).
+        """
+        error = previous_error = None
+        n_iter = 0
+        for n_iter in range(1, max_iter + 1):
+            user_features = solve_users(item_features)
+            item_t, cross_term = solve_items(user_features)
+            item_features = np.ascontiguousarray(item_t.T)
+
+            error = reconstruction_error(matrix_sq_norm, user_features, item_features, cross_term)
+            if on_iteration is not None:
+                on_iteration(n_iter, error)
+
+            if previous_error is not None and previous_error - error <= self.tolerance * previous_error:
+                break
+            previous_error = error
+
+        return {
+            "user_features": user_features,
+            "item_features": item_features,
+            "reconstruction_err": error,
+            "n_iter": n_iter,
+        }
+
+    def _solve(
+        self, matrix: sparse.csr_matrix, fixed: np.ndarray, executor: ThreadPoolExecutor
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Solve the rows of one side given the other side's (k x n) factors.
+
+        Returns (factors, products) where products = matrix @ fixed^T, kept
+        to compute the reconstruction error without another pass over R.
+        """
+        inverse = self._ridge_inverse(fixed)
+        fixed_t = np.ascontiguousarray(fixed.T)
+
+        n_rows = matrix.shape[0]
+        factors = np.empty((n_rows, fixed.shape[0]))
+        products = np.empty_like(factors)
+
+        def solve_block(start: int):
+            end = min(start + self.block_rows, n_rows)
+            products[start:end] = matrix[start:end] @ fixed_t
+            np.maximum(products[start:end] @ inverse, 0.0, out=factors[start:end])
+
+        list(executor.map(solve_block, range(0, n_rows, self.block_rows)))
+        return factors, products
+
+    def fit(self, matrix, n_components, init=None, max_iter=None, on_iteration=None):
+        max_iter = max_iter or (self.full_max_iter if init is None else self.incremental_max_iter)
+        matrix = sparse.csr_matrix(matrix, dtype=np.float64)
+        matrix_t = matrix.T.tocsr()
+        matrix_sq_norm = float(matrix.multiply(matrix).sum())
+        item_features = self._initial_items(matrix.mean(), matrix.shape[1], n_components, init)
+
+        with ThreadPoolExecutor(max_workers=self.n_threads) as executor:
+
+            def solve_items(user_features):
+                item_t, products = self._solve(matrix_t, user_features.T, executor)
+                # products = R^T W, so tr(W^T R H^T) = sum(H^T * R^T W)
+                return item_t, float(np.sum(item_t * products))
+
+            return self._iterate(
+                lambda items: self._solve(matrix, items, executor)[0],
+                solve_items,
+                item_features,
+                matrix_sq_norm,
+                max_iter,
+                on_iteration,
+            )
+
+
+def _solve_block_file(block_path: str, fixed_path: str, inverse: np.ndarray) -> tuple[np.ndarray, float]:
+    """
+    Solve one on-disk block of rows in a worker process.
+
+    The block is a CSR slice of R (or R^T) and the fixed factors are
+    memory-mapped, so a worker holds one block and its k-wide results.
+    Returns (factors, sum(factors * products)) for the error's cross term.
+    """
+    block = sparse.load_npz(block_path)
+    fixed_t = np.load(fixed_path, mmap_mode="r")
+    products = block @ fixed_t
+    factors = np.maximum(products @ inverse, 0.0)
+    return factors, float(np.sum(factors * products))
+
+
+def _spill(triples: np.ndarray, blocks: np.ndarray, n_blocks: int, path_pattern: str):
+    """Append every triple to the file of its block (blocks[i] for triples[i])."""
+    order = np.argsort(blocks, kind="stable")
+    bounds = np.searchsorted(blocks[order], np.arange(n_blocks + 1))
+    for block, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+        if start < end:
+            with open(path_pattern.format(block), "ab") as f:
+                triples[order[start:end]].tofile(f)
+
+
+def _load_spilled(path: Path, major: str, minor: str, first: int, shape: tuple[int, int]) -> sparse.csr_matrix:
+    """
+    Build a CSR block starting at row first from its spilled triples and
+    delete them; major and minor name the fields used as row and column.
+    """
+    triples = np.fromfile(path, dtype=BLOCK_TRIPLE) if path.exists() else np.empty(0, dtype=BLOCK_TRIPLE)
+    path.unlink(missing_ok=True)
+    block = sparse.csr_matrix((triples["value"], (triples[major] - first, triples[minor])), shape=shape)
+    block.sort_indices()
+    return block
+
+
+class OutOfCoreALSEngine(ALSEngine):
+    """
+    ALS with the least squares solves run in worker processes over blocks on disk.
+
+    The matrix is cut into row blocks of R and of R^T (column blocks of R),
+    sized so that each block, its products and results fit in
+    memory_budget_mb divided by the number of workers. partition_ratings
+    writes the blocks straight from the rating arrays, which are typically
+    memory-mapped from the ratings snapshot: chunks of ratings are spilled
+    to per-block files and each block is then assembled on its own, so the
+    matrix never exists in memory as a whole. Every half-step streams the
+    blocks through a process pool, with the fixed side's factors shared as
+    a memory-mapped .npy file. Results are merged into the same
+    user_features/item_features as the in-memory engines.
+
+    Besides one chunk or one block at a time, the training process holds
+    only per-user and per-movie arrays: the dense factors (k values each),
+    ids and rating counts.
+    """
+
+    name = "als_ooc"
+    out_of_core = True
+
+    def __init__(self, n_workers: int | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.memory_budget_mb = OUT_OF_CORE_MEMORY_BUDGET_MB
+
+    @contextlib.contextmanager
+    def scratch(self):
+        if self.scratch_dir is not None:
+            Path(self.scratch_dir).mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(prefix="als_blocks_", dir=self.scratch_dir) as scratch:
+            yield Path(scratch)
+
+    def _block_bounds(self, row_nnz: np.ndarray, n_components: int, n_fixed: int) -> np.ndarray:
+        """
+        Split rows into consecutive blocks within each worker's memory share.
+
+        A row costs 32 bytes per rating, enough to assemble its block from
+        the spilled triples (16 bytes) into CSR (12 bytes, all a worker
+        needs), plus three k-wide float64 rows (products, factors and a
+        temporary); the fixed side's factors count against every worker.
+        """
+        worker_bytes = self.memory_budget_mb * 1024 * 1024 / self.n_workers
+        available = worker_bytes - n_fixed * n_components * 8
+        if available <= 0:
+            raise ValueError(
+                f"Memory budget of {self.memory_budget_mb} MB is too small for "
+                f"{self.n_workers} workers and {n_fixed} x {n_components} factors"
+            )
+        row_bytes = 32 * row_nnz + 8 + 24 * n_components
+        cumulative = np.cumsum(row_bytes)
+        bounds = [0]
+        while bounds[-1] < len(row_nnz):
+            start_bytes = cumulative[bounds[-1] - 1] if bounds[-1] else 0
+            end = int(np.searchsorted(cumulative, start_bytes + available, side="right"))
+            bounds.append(max(end, bounds[-1] + 1))
+        return np.array(bounds)
+
+    def partition_ratings(
+        self,
+        ratings: dict,
+        scan: dict,
+        block_dir: Path,
+        n_components: int,
+        chunk_rows: int = PARTITION_CHUNK_ROWS,
+    ) -> dict:
+        """
+        Write row blocks of R and of R^T to block_dir in one pass over the ratings.
+
+        ratings holds user_ids, movie_ids and ratings arrays (one entry per
+        rating, unique per user and movie) and scan their scan_ratings
+        summary, which gives the rows, columns and block bounds. Each chunk
+        of ratings is appended to the spill files of its row and column
+        blocks; every block is then assembled from its file alone. The
+        seen index is taken from the row blocks on the way, into a
+        memory-mapped file in block_dir.
+
+        Returns dict with shape, row_blocks and col_blocks ((start, end,
+        path) of every block), matrix_sq_norm, matrix_mean, nbytes (CSR
+        size of the row blocks) and seen_index.
+        """
+        n_users, n_movies = len(scan["user_ids"]), len(scan["movie_ids"])
+        row_bounds = self._block_bounds(scan["user_counts"], n_components, n_movies)
+        col_bounds = self._block_bounds(scan["movie_counts"], n_components, n_users)
+
+        n_ratings = len(ratings["ratings"])
+        for start in range(0, n_ratings, chunk_rows):
+            end = start + chunk_rows
+            triples = np.empty(min(end, n_ratings) - start, dtype=BLOCK_TRIPLE)
+            triples["row"] = np.searchsorted(scan["user_ids"], ratings["user_ids"][start:end])
+            triples["col"] = np.searchsorted(scan["movie_ids"], ratings["movie_ids"][start:end])
+            triples["value"] = ratings["ratings"][start:end]
+            row_of = np.searchsorted(row_bounds, triples["row"], side="right") - 1
+            col_of = np.searchsorted(col_bounds, triples["col"], side="right") - 1
+            _spill(triples, row_of, len(row_bounds) - 1, str(block_dir / "rows_{}.bin"))
+            _spill(triples, col_of, len(col_bounds) - 1, str(block_dir / "cols_{}.bin"))
+
+        seen_indptr = np.zeros(n_users + 1, dtype=np.int64)
+        np.cumsum(scan["user_counts"], out=seen_indptr[1:])
+        seen_indices = np.lib.format.open_memmap(
+            block_dir / "seen_indices.npy", mode="w+", dtype=np.int32, shape=(n_ratings,)
+        )
+
+        row_blocks, nbytes = [], 0
+        for i, (start, end) in enumerate(zip(row_bounds[:-1], row_bounds[1:])):
+            block = _load_spilled(block_dir / f"rows_{i}.bin", "row", "col", start, (end - start, n_movies))
+            seen_indices[seen_indptr[start]:seen_indptr[end]] = block.indices
+            nbytes += block.data.nbytes + block.indices.nbytes + block.indptr.nbytes
+            path = block_dir / f"rows_{i}.npz"
+            sparse.save_npz(path, block, compressed=False)
+            row_blocks.append((int(start), int(end), str(path)))
+        seen_indices.flush()
+
+        col_blocks = []
+        for j, (start, end) in enumerate(zip(col_bounds[:-1], col_bounds[1:])):
+            block = _load_spilled(block_dir / f"cols_{j}.bin", "col", "row", start, (end - start, n_users))
+            path = block_dir / f"cols_{j}.npz"
+            sparse.save_npz(path, block, compressed=False)
+            col_blocks.append((int(start), int(end), str(path)))
+
+        return {
+            "shape": (n_users, n_movies),
+            "row_blocks": row_blocks,
+            "col_blocks": col_blocks,
+            "matrix_sq_norm": scan["rating_sq_sum"],
+            "matrix_mean": scan["rating_sum"] / (n_users * n_movies) if n_users and n_movies else 0.0,
+            "nbytes": nbytes,
+            "seen_index": {"seen_indptr": seen_indptr, "seen_indices": seen_indices},
+            "block_dir": block_dir,
+        }
+
+    def _solve_blocks(
+        self, executor, blocks: list, fixed: np.ndarray, fixed_path: Path, n_rows: int
+    ) -> tuple[np.ndarray, float]:
+        """Solve all blocks of one side in parallel and merge the results."""
+        np.save(fixed_path, np.ascontiguousarray(fixed.T))
+        inverse = self._ridge_inverse(fixed)
+        factors = np.empty((n_rows, fixed.shape[0]))
+        futures = [
+            (start, end, executor.submit(_solve_block_file, path, str(fixed_path), inverse))
+            for start, end, path in blocks
+        ]
+        cross_term = 0.0
+        for start, end, future in futures:
+            factors[start:end], block_cross = future.result()
+            cross_term += block_cross
+        return factors, cross_term
+
+    def fit_blocks(self, blocks: dict, n_components, init=None, max_iter=None, on_iteration=None) -> dict:
+        """Factorize the matrix partition_ratings wrote; same results as fit."""
+        max_iter = max_iter or (self.full_max_iter if init is None else self.incremental_max_iter)
+        n_users, n_movies = blocks["shape"]
+        block_dir = blocks["block_dir"]
+        item_features = self._initial_items(blocks["matrix_mean"], n_movies, n_components, init)
+
+        with ProcessPoolExecutor(
+            max_workers=self.n_workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            return self._iterate(
+                lambda items: self._solve_blocks(
+                    executor, blocks["row_blocks"], items, block_dir / "items.npy", n_users
+                )[0],
+                lambda users: self._solve_blocks(
+                    executor, blocks["col_blocks"], users.T, block_dir / "users.npy", n_movies
+                ),
+                item_features,
+                blocks["matrix_sq_norm"],
+                max_iter,
+                on_iteration,
+            )
+
+    def fit(self, matrix, n_components, init=None, max_iter=None, on_iteration=None):
+        # An in-memory matrix is partitioned like rating arrays whose ids
+        # are already the rows and columns
+        matrix = sparse.csr_matrix(matrix, dtype=np.float64)
+        n_users, n_movies = matrix.shape
+        coo = matrix.tocoo()
+        scan = {
+            "user_ids": np.arange(n_users),
+            "movie_ids": np.arange(n_movies),
+            "user_counts": np.diff(matrix.indptr),
+            "movie_counts": np.bincount(matrix.indices, minlength=n_movies),
+            "rating_sum": float(matrix.data.sum()),
+            "rating_sq_sum": float(np.dot(matrix.data, matrix.data)),
+        }
+        ratings = {"user_ids": coo.row, "movie_ids": coo.col, "ratings": coo.data}
+
+        with self.scratch() as block_dir:
+            blocks = self.partition_ratings(ratings, scan, block_dir, n_components)
+            return self.fit_blocks(blocks, n_components, init, max_iter, on_iteration)
+
+
+TRAINING_ENGINES = {engine.name: engine for engine in (NMFEngine, ALSEngine, OutOfCoreALSEngine)}
+
+
+def get_training_engine(
+    name: str, memory_budget_mb: int | None = None, scratch_dir: Path | None = None
+) -> TrainingEngine:
+    """
+    Return a new engine by name. Raises ValueError for unknown engines.
+
+    memory_budget_mb and scratch_dir configure engines that work out of
+    core; in-memory engines ignore them.
+    """
+    if name not in TRAINING_ENGINES:
+        raise ValueError(f"Unsupported training engine: {name}")
+    engine = TRAINING_ENGINES[name]()
+    if memory_budget_mb is not None:
+        engine.memory_budget_mb = memory_budget_mb
+    if scratch_dir is not None:
+        engine.scratch_dir = scratch_dir
+    return engine
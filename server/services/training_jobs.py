@@ -0,0 +1,365 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, ContextManager
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from server.models.training_jobs import TrainingJobModel
+
+logger = logging.getLogger(__name__)
+
+# Job states; queued and running jobs hold the single active slot
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+ACTIVE_SLOT = 1
+
+# How often a running job's worker refreshes its heartbeat, independently of
+# stage boundaries (a single stage can take much longer)
+HEARTBEAT_INTERVAL = timedelta(minutes=1)
+
+# An active job whose worker hasn't reported for this long is considered
+# lost (e.g. the process was killed) and releases the slot
+STALE_JOB_AFTER = 5 * HEARTBEAT_INTERVAL
+
+# Process pool running training jobs, created on first use per API process
+_executor: ProcessPoolExecutor | None = None
+
+
+class TrainingCancelled(Exception):
+    """Raised inside a training job when cancellation was requested."""
+
+
+class TrainingLost(Exception):
+    """Raised inside a training job that no longer holds the active slot."""
+
+
+def job_to_dict(job: TrainingJobModel) -> dict:
+    """Convert a training job row to a plain dict."""
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "params": job.params or {},
+        "stage": job.stage,
+        "progress": job.progress,
+        "cancel_requested": job.cancel_requested,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "completed_at": job.completed_at.isoformat() if job.completed_at else None,
+        "model_version": job.model_version,
+        "total_ratings": job.total_ratings,
+        "result": job.result,
+        "error": job.error,
+    }
+
+
+def _expire_stale_jobs(session: Session):
+    """Fail active jobs whose worker stopped reporting, releasing the slot."""
+    cutoff = datetime.now() - STALE_JOB_AFTER
+    stale = session.query(TrainingJobModel).filter(
+        TrainingJobModel.active_slot.is_not(None),
+        TrainingJobModel.created_at < cutoff,
+        (TrainingJobModel.heartbeat_at.is_(None)) | (TrainingJobModel.heartbeat_at < cutoff),
+    ).with_for_update()
+    for job in stale:
+        _finish(job, "failed", error="Training job stopped reporting progress")
+    session.commit()
+
+
+def create_training_job(session: Session, params: dict) -> dict | None:
+    """
+    Record a new queued training job.
+
+    Returns the job as a dict, or None if another job is already queued or
+    running (in any API worker): only one job can hold the active slot.
+    """
+    _expire_stale_jobs(session)
+
+    job = TrainingJobModel(
+        status="queued",
+        params=params,
+        active_slot=ACTIVE_SLOT,
+        cancel_requested=False,
+        progress=0.0,
+        created_at=datetime.now(),
+    )
+    session.add(job)
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        return None
+
+    session.refresh(job)
+    return job_to_dict(job)
+
+
+def submit_training_job(session: Session, params: dict) -> dict | None:
+    """
+    Create a training job and run it in the training process pool.
+
+    A pool whose worker died (e.g. killed for running out of memory) can't
+    take jobs anymore; it is replaced and the submission retried once. If
+    that fails too, the job is recorded as failed, releasing the slot.
+
+    Returns the job as a dict, or None if a job is already active.
+    """
+    job = create_training_job(session, params)
+    if job is None:
+        return None
+
+    for attempt in range(2):
+        try:
+            _get_executor().submit(run_training_job, job["job_id"])
+            return job
+        except Exception:
+            logger.exception("Failed to submit training job %s (attempt %d)", job["job_id"], attempt + 1)
+            _discard_executor()
+
+    row = session.get(TrainingJobModel, job["job_id"])
+    _finish(row, "failed", error="Could not start the training process")
+    session.commit()
+    session.refresh(row)
+    return job_to_dict(row)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the training process pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        # spawn: the child must not inherit the API's DB connections and threads
+        _executor = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def _discard_executor():
+    """Drop the training process pool (e.g. broken by a dead worker), so the next use creates a new one."""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is not None:
+        try:
+            executor.shutdown(wait=False, cancel_futures=True)
+        except Exception:
+            logger.exception("Failed to shut down the training process pool")
+
+
+def shutdown_training_executor():
+    """Stop the training process pool without waiting for a running job."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def _default_session() -> ContextManager[Session]:
+    """Open a database session in the training process."""
+    from server.backend.postgres import PostgresSessionManager
+
+    return PostgresSessionManager().open_session()
+
+
+def _finish(job: TrainingJobModel, status: str, error: str | None = None, result: dict | None = None):
+    """Mark a job as finished and release the active slot."""
+    job.status = status
+    job.active_slot = None
+    job.completed_at = datetime.now()
+    job.error = error
+    if result is not None:
+        job.result = result
+        job.model_version = result.get("model_version")
+        job.total_ratings = result.get("total_ratings")
+        job.progress = 1.0
+
+
+def _holds_slot(session: Session, job: TrainingJobModel) -> bool:
+    """Re-read a job, locking its row, and tell whether it is still running in the active slot."""
+    session.refresh(job, with_for_update=True)
+    return job.status == "running" and job.active_slot is not None
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Refreshes a running job's heartbeat every HEARTBEAT_INTERVAL.
+
+    Runs next to the training stages in the worker process, with its own
+    sessions, so a long stage isn't mistaken for a lost worker. Stops, and
+    sets lost, once the job no longer holds the active slot.
+    """
+
+    def __init__(self, job_id: int, open_session: Callable[[], ContextManager[Session]]):
+        super().__init__(name=f"training-job-{job_id}-heartbeat", daemon=True)
+        self.job_id = job_id
+        self.open_session = open_session
+        self.lost = False
+        self._stopped = threading.Event()
+
+    def beat(self, session: Session) -> bool:
+        """Refresh the heartbeat if the job still runs in the active slot; return whether it does."""
+        updated = session.query(TrainingJobModel).filter(
+            TrainingJobModel.job_id == self.job_id,
+            TrainingJobModel.status == "running",
+            TrainingJobModel.active_slot.is_not(None),
+        ).update({TrainingJobModel.heartbeat_at: datetime.now()}, synchronize_session=False)
+        session.commit()
+        if not updated:
+            self.lost = True
+        return bool(updated)
+
+    def run(self):
+        while not self._stopped.wait(HEARTBEAT_INTERVAL.total_seconds()):
+            try:
+                with self.open_session() as session:
+                    if not self.beat(session):
+                        return
+            except Exception:
+                logger.exception("Heartbeat of training job %s failed", self.job_id)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+def run_training_job(
+    job_id: int, open_session: Callable[[], ContextManager[Session]] = _default_session
+):
+    """
+    Run a queued training job to completion (executed in the process pool).
+
+    Progress is written to the job row at the start of every training
+    stage, and a background thread keeps the heartbeat fresh in between.
+    A cancel request is honoured at the next stage boundary. The job ends
+    completed, failed or cancelled and releases the active slot, unless it
+    lost the slot meanwhile (expired as stale): then it stops at the next
+    stage boundary and records nothing, leaving the job as it was expired.
+    """
+    from server.services.recommendation_service import train_recommendation_model
+
+    with open_session() as session:
+        job = session.get(TrainingJobModel, job_id)
+        if job is None or job.status != "queued":
+            return
+        if job.cancel_requested:
+            _finish(job, "cancelled")
+            session.commit()
+            return
+
+        job.status = "running"
+        job.started_at = job.heartbeat_at = datetime.now()
+        session.commit()
+
+        heartbeat = _Heartbeat(job_id, open_session)
+        heartbeat.start()
+
+        def progress(stage: str, fraction: float):
+            if heartbeat.lost or not _holds_slot(session, job):
+                raise TrainingLost()
+            if job.cancel_requested:
+                raise TrainingCancelled()
+            job.stage = stage
+            job.progress = fraction
+            job.heartbeat_at = datetime.now()
+            session.commit()
+
+        status, error, result = None, None, None
+        try:
+            result = train_recommendation_model(session, progress=progress, **job.params)
+            status = "completed"
+        except TrainingLost:
+            session.rollback()
+        except TrainingCancelled:
+            session.rollback()
+            status = "cancelled"
+        except Exception as e:
+            logger.exception("Training job %s failed", job_id)
+            session.rollback()
+            status, error = "failed", str(e)
+        finally:
+            heartbeat.stop()
+
+        if status is None or not _holds_slot(session, job):
+            logger.warning("Training job %s lost the active slot; its outcome is not recorded", job_id)
+            session.rollback()
+            return
+        _finish(job, status, error=error, result=result)
+        session.commit()
+
+
+def get_training_job(session: Session, job_id: int) -> dict:
+    """
+    Get one training job.
+
+    Raises ValueError if the job doesn't exist.
+    """
+    job = session.get(TrainingJobModel, job_id)
+    if job is None:
+        raise ValueError(f"Training job with ID {job_id} not found")
+    return job_to_dict(job)
+
+
+def list_training_jobs(session: Session, limit: int = 20) -> list[dict]:
+    """List the most recent training jobs, newest first."""
+    jobs = (
+        session.query(TrainingJobModel)
+        .order_by(TrainingJobModel.job_id.desc())
+        .limit(limit)
+        .all()
+    )
+    return [job_to_dict(job) for job in jobs]
+
+
+def cancel_training_job(session: Session, job_id: int) -> dict:
+    """
+    Cancel a queued or running training job.
+
+    A queued job is cancelled immediately; a running one stops at its next
+    stage boundary. Raises ValueError if the job doesn't exist or has
+    already finished.
+    """
+    job = session.get(TrainingJobModel, job_id)
+    if job is None:
+        raise ValueError(f"Training job with ID {job_id} not found")
+    if job.status in FINISHED_STATUSES:
+        raise ValueError(f"Training job {job_id} already {job.status}")
+
+    job.cancel_requested = True
+    if job.status == "queued":
+        _finish(job, "cancelled")
+    session.commit()
+    session.refresh(job)
+    return job_to_dict(job)
+
+
+def get_training_status(session: Session) -> dict:
+    """
+    Get the status of the most recent training job.
+
+    Read from the job table, so every API worker reports the same status.
+    "training" covers queued and running jobs; "idle" means no job ever ran.
+    Completed jobs include the training metrics (stage timings, memory,
+    matrix shape and per-iteration error).
+    """
+    job = session.query(TrainingJobModel).order_by(TrainingJobModel.job_id.desc()).first()
+    if job is None:
+        return {
+            "status": "idle",
+            "started_at": None,
+            "completed_at": None,
+            "model_version": None,
+            "total_ratings": None,
+            "error": None,
+        }
+
+    job_data = job_to_dict(job)
+    return {
+        "status": "training" if job.status in ACTIVE_STATUSES else job.status,
+        "job_id": job.job_id,
+        "stage": job.stage,
+        "progress": job.progress,
+        "metrics": (job.result or {}).get("metrics"),
+        **{k: job_data[k] for k in ("started_at", "completed_at", "model_version", "total_ratings", "error")},
+    }
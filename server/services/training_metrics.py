@@ -0,0 +1,75 @@
+import resource
+import time
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process so far, in MB (Linux reports KB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class TrainingMetrics:
+    """
+    Instrumentation of one training run.
+
+    Records the wall time of every stage, the process's peak memory when
+    each stage ends, the shape and density of the rating matrix, and the
+    reconstruction error after each factorization iteration. Peak memory
+    is the process high-water mark, so a stage that raises it is the one
+    that allocated the most.
+    """
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._stage: str | None = None
+        self._stage_started = self._started
+        self.stages: list[dict] = []
+        self.matrix: dict | None = None
+        self.iterations: list[dict] = []
+
+    def start_stage(self, stage: str):
+        """End the current stage (if any) and start timing the next one."""
+        self._end_stage()
+        self._stage = stage
+        self._stage_started = time.perf_counter()
+
+    def _end_stage(self):
+        if self._stage is None:
+            return
+        self.stages.append({
+            "stage": self._stage,
+            "seconds": round(time.perf_counter() - self._stage_started, 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        })
+        self._stage = None
+
+    def record_matrix(self, matrix):
+        """Record the shape, density and size of the sparse rating matrix."""
+        n_users, n_movies = matrix.shape
+        self.record_matrix_shape(
+            n_users, n_movies, matrix.nnz, matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+        )
+
+    def record_matrix_shape(self, n_users: int, n_movies: int, n_ratings: int, nbytes: int):
+        """Record the same for a matrix that is only ever stored in blocks."""
+        self.matrix = {
+            "n_users": int(n_users),
+            "n_movies": int(n_movies),
+            "n_ratings": int(n_ratings),
+            "density": n_ratings / (n_users * n_movies) if n_users and n_movies else 0.0,
+            "size_mb": round(nbytes / 1024 / 1024, 1),
+        }
+
+    def record_iteration(self, iteration: int, error: float | None):
+        """Record the reconstruction error after a factorization iteration."""
+        self.iterations.append({"iteration": iteration, "error": error})
+
+    def finish(self) -> dict:
+        """End the current stage and return all metrics as a JSON-serializable dict."""
+        self._end_stage()
+        return {
+            "total_seconds": round(time.perf_counter() - self._started, 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "stages": list(self.stages),
+            "matrix": self.matrix,
+            "iterations": list(self.iterations),
+        }
@@ -0,0 +1,229 @@
+import contextlib
+import json
+import logging
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from server.models.ratings import RatingModel
+from server.services.model_artifact import save_json, save_raw_array
+from server.services.training_data import extract_ratings
+from server.services.training_metrics import peak_rss_mb
+
+logger = logging.getLogger(__name__)
+
+# Local columnar copy of the extracted ratings, one .npy file per column,
+# sorted by rating id. snapshot.json (written last) holds the fingerprint
+# of the ratings table the arrays correspond to.
+SNAPSHOT_FORMAT = "ratings-npy-v1"
+SNAPSHOT_FILE = "snapshot.json"
+SNAPSHOT_ARRAYS = ("rating_ids", "user_ids", "movie_ids", "ratings")
+SNAPSHOT_DTYPES = {"rating_ids": np.int64, "user_ids": np.int32, "movie_ids": np.int32, "ratings": np.float32}
+
+# Ratings merged or read from the database per chunk while the snapshot
+# is rewritten; bounds the memory of a refresh
+SNAPSHOT_CHUNK_ROWS = 1_000_000
+
+
+def ratings_fingerprint(session: Session) -> dict:
+    """
+    Cheap summary of the ratings table: row count, max id and max timestamp.
+
+    New ratings raise the max id, updates (which refresh the timestamp)
+    raise the max timestamp, and deletions lower the count, so an
+    unchanged fingerprint means unchanged training data.
+    """
+    count, max_id, max_timestamp = session.query(
+        func.count(RatingModel.rating_id),
+        func.max(RatingModel.rating_id),
+        func.max(RatingModel.timestamp),
+    ).one()
+    return {
+        "count": int(count),
+        "max_id": max_id,
+        "max_timestamp": max_timestamp.isoformat() if max_timestamp else None,
+    }
+
+
+def load_snapshot(snapshot_dir: Path, mmap: bool = False) -> dict | None:
+    """
+    Load the ratings snapshot, or None if there is no usable one.
+
+    With mmap, the arrays are opened memory-mapped (read-only) instead of
+    being read into memory. A snapshot whose arrays don't match its
+    metadata (e.g. after a crash while it was being rewritten) is ignored.
+    """
+    try:
+        with open(snapshot_dir / SNAPSHOT_FILE, "rb") as f:
+            metadata = json.load(f)
+        if metadata.get("format") != SNAPSHOT_FORMAT:
+            return None
+        snapshot = {
+            name: np.load(snapshot_dir / f"{name}.npy", mmap_mode="r" if mmap else None)
+            for name in SNAPSHOT_ARRAYS
+        }
+    except (OSError, ValueError):
+        return None
+
+    if any(len(snapshot[name]) != metadata["fingerprint"]["count"] for name in SNAPSHOT_ARRAYS):
+        return None
+    snapshot["fingerprint"] = metadata["fingerprint"]
+    return snapshot
+
+
+def _write_snapshot(snapshot_dir: Path, chunks: Iterator[dict]) -> int:
+    """
+    Write chunks of ratings (sorted by rating id) as the snapshot's arrays.
+
+    Each chunk is appended to a raw file per column as it arrives, and the
+    columns become .npy files once all chunks are written, so the ratings
+    are never in memory together. The metadata file is removed first and
+    written last by the caller, so a partially rewritten snapshot is never
+    mistaken for a complete one. Returns the number of ratings written.
+    """
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    (snapshot_dir / SNAPSHOT_FILE).unlink(missing_ok=True)
+    raw_paths = {name: snapshot_dir / f".{name}.raw" for name in SNAPSHOT_ARRAYS}
+
+    rows = 0
+    try:
+        with contextlib.ExitStack() as stack:
+            raw_files = {name: stack.enter_context(open(path, "wb")) for name, path in raw_paths.items()}
+            for chunk in chunks:
+                for name in SNAPSHOT_ARRAYS:
+                    np.asarray(chunk[name], dtype=SNAPSHOT_DTYPES[name]).tofile(raw_files[name])
+                rows += len(chunk["rating_ids"])
+        for name in SNAPSHOT_ARRAYS:
+            save_raw_array(snapshot_dir / f"{name}.npy", raw_paths[name], SNAPSHOT_DTYPES[name], rows)
+    finally:
+        for path in raw_paths.values():
+            path.unlink(missing_ok=True)
+    return rows
+
+
+def _sorted_by_id(ratings: dict) -> dict:
+    order = np.argsort(ratings["rating_ids"], kind="stable")
+    return {name: ratings[name][order] for name in SNAPSHOT_ARRAYS}
+
+
+def _merged_chunks(snapshot: dict, delta: dict, is_new: np.ndarray, chunk_rows: int) -> Iterator[dict]:
+    """
+    Merge rows read since the snapshot into it, one chunk at a time.
+
+    Rows the snapshot already has were updated and get their new values
+    in the chunk that holds them; rows with ids past the snapshot (is_new)
+    are appended after the last chunk.
+    """
+    updated = {name: delta[name][~is_new] for name in SNAPSHOT_ARRAYS}
+    positions = np.searchsorted(snapshot["rating_ids"], updated["rating_ids"])
+
+    for start in range(0, len(snapshot["rating_ids"]), chunk_rows):
+        end = start + chunk_rows
+        chunk = {name: np.array(snapshot[name][start:end]) for name in SNAPSHOT_ARRAYS}
+        in_chunk = (positions >= start) & (positions < end)
+        for name in ("user_ids", "movie_ids", "ratings"):
+            chunk[name][positions[in_chunk] - start] = updated[name][in_chunk]
+        yield chunk
+
+    yield {name: delta[name][is_new] for name in SNAPSHOT_ARRAYS}
+
+
+def _extracted_chunks(session: Session, max_id: int, stats: dict, window_rows: int) -> Iterator[dict]:
+    """
+    Read every rating up to max_id, window_rows ratings per query.
+
+    Windows are consecutive rating id ranges, so every chunk sorts on its
+    own. Rows read and seconds spent are added to stats.
+    """
+    last_id = 0
+    while True:
+        window_end = (
+            session.query(RatingModel.rating_id)
+            .filter(RatingModel.rating_id > last_id, RatingModel.rating_id <= max_id)
+            .order_by(RatingModel.rating_id)
+            .offset(window_rows - 1)
+            .limit(1)
+            .scalar()
+        ) or max_id
+        window = (RatingModel.rating_id > last_id) & (RatingModel.rating_id <= window_end)
+        chunk = extract_ratings(session, include_rating_ids=True, where=window)
+        stats["rows"] += chunk["stats"]["rows"]
+        stats["seconds"] += chunk["stats"]["seconds"]
+        yield _sorted_by_id(chunk)
+
+        if window_end >= max_id:
+            return
+        last_id = window_end
+
+
+def load_training_ratings(
+    session: Session, snapshot_dir: Path, fingerprint: dict | None = None, mmap: bool = False
+) -> dict:
+    """
+    Get all ratings for training, reading as little from the database as possible.
+
+    - Fingerprint equal to the snapshot's: no rows are read.
+    - Otherwise, if the snapshot exists, only rows added (id past the
+      snapshot) or updated (timestamp past the snapshot) are read and
+      merged in. If the row count then doesn't match, ratings were
+      deleted and everything is re-read.
+    - Without a snapshot, everything is read.
+
+    Reads are capped at the fingerprint's max id, so rows inserted
+    meanwhile are picked up by the next run instead of being counted
+    twice. The snapshot is refreshed afterwards, streaming the merged or
+    re-read ratings to disk chunk by chunk.
+
+    With mmap, the returned arrays are memory-mapped from the snapshot, so
+    neither refreshing nor returning it holds all ratings in memory.
+
+    Returns the extract_ratings dict (with rating_ids) plus fingerprint;
+    stats gain source ("snapshot", "delta" or "full") and rows_read.
+    """
+    fingerprint = fingerprint or ratings_fingerprint(session)
+    snapshot = load_snapshot(snapshot_dir, mmap=True)
+    max_id = fingerprint["max_id"] or 0
+
+    if snapshot is not None and snapshot["fingerprint"] == fingerprint:
+        ratings = {name: snapshot[name] if mmap else np.array(snapshot[name]) for name in SNAPSHOT_ARRAYS}
+        stats = {"rows": len(ratings["ratings"]), "source": "snapshot", "rows_read": 0}
+        logger.info("Ratings unchanged since the snapshot, read 0 rows")
+        return {**ratings, "stats": stats, "fingerprint": fingerprint}
+
+    rows = source = None
+    if snapshot is not None:
+        since = snapshot["fingerprint"]
+        changed = RatingModel.rating_id > (since["max_id"] or 0)
+        if since["max_timestamp"]:
+            changed = or_(changed, RatingModel.timestamp > datetime.fromisoformat(since["max_timestamp"]))
+        delta = extract_ratings(session, include_rating_ids=True, where=changed & (RatingModel.rating_id <= max_id))
+        stats = delta["stats"]
+        delta = _sorted_by_id(delta)
+        is_new = delta["rating_ids"] > (snapshot["rating_ids"][-1] if len(snapshot["rating_ids"]) else 0)
+        if len(snapshot["rating_ids"]) + np.count_nonzero(is_new) == fingerprint["count"]:
+            rows = _write_snapshot(snapshot_dir, _merged_chunks(snapshot, delta, is_new, SNAPSHOT_CHUNK_ROWS))
+            source = "delta"
+        else:
+            logger.info("Ratings were deleted since the snapshot, re-reading all of them")
+
+    if source is None:
+        stats = {"rows": 0, "seconds": 0.0}
+        rows = _write_snapshot(snapshot_dir, _extracted_chunks(session, max_id, stats, SNAPSHOT_CHUNK_ROWS))
+        seconds = stats["seconds"]
+        stats = {
+            "rows": stats["rows"],
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(stats["rows"] / seconds) if seconds > 0 else None,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+        source = "full"
+
+    stats = {**stats, "rows": rows, "source": source, "rows_read": stats["rows"]}
+    fingerprint = {**fingerprint, "count": rows}
+    save_json(snapshot_dir / SNAPSHOT_FILE, {"format": SNAPSHOT_FORMAT, "fingerprint": fingerprint})
+    snapshot = load_snapshot(snapshot_dir, mmap=mmap)
+    return {**{name: snapshot[name] for name in SNAPSHOT_ARRAYS}, "stats": stats, "fingerprint": fingerprint}
@@ -24,7 +24,7 @@ def not_found_error(resource: str, resource_id: int | str) -> APIError:
     """Create a 404 not found error."""
     return APIError(
         status_code=404,
-        error_code=f"{resource.upper()}_NOT_FOUND",
+        error_code=f"{resource.upper().replace(' ', '_')}_NOT_FOUND",
         message=f"{resource.capitalize()} with ID {resource_id} not found"
     )
 
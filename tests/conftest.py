@@ -44,6 +44,26 @@ def test_client():
     return TestClient(app)
 
 
+@pytest.fixture(scope="function")
+def clean_models_dir(tmp_path, monkeypatch):
+    """Empty models directory under tmp_path, used by training and serving instead of models/"""
+    from server.services import recommendation_service
+    from server.services.fold_in import fold_in_cache
+    from server.services.seen_index import recent_ratings
+
+    models_dir = tmp_path / "models"
+    models_dir.mkdir()
+    monkeypatch.setattr(recommendation_service, "MODELS_DIR", models_dir)
+    monkeypatch.setattr(recommendation_service, "SNAPSHOT_DIR", models_dir / "ratings_snapshot")
+    monkeypatch.setattr(recommendation_service, "TRAINING_SCRATCH_DIR", models_dir / "training_scratch")
+    monkeypatch.setattr(
+        recommendation_service.model_holder, "path", models_dir / recommendation_service.LATEST_POINTER_FILE
+    )
+    fold_in_cache.clear()
+    recent_ratings.clear()
+    return models_dir
+
+
 @pytest.fixture(scope="function")
 def sample_movies(test_session):
     """Create sample movies for testing"""
@@ -7,6 +7,7 @@ import pytest
 from unittest.mock import patch, MagicMock
 from fastapi.testclient import TestClient
 from server.app import app
+from server.services.movie_service import CursorError
 
 
 client = TestClient(app)
@@ -91,6 +92,118 @@ class TestMoviesRouter:
         args, kwargs = mock_get_movies.call_args
         assert args[4] == "year_desc"  # sort_by parameter
 
+    @patch("server.routers.movies.get_movies")
+    def test_list_movies_with_search_mode(self, mock_get_movies):
+        """Test GET /movies with relevance search mode"""
+        mock_get_movies.return_value = ([], 0)
+
+        response = client.get("/api/rest/v1/movies?search=toy&search_mode=relevance")
+
+        assert response.status_code == 200
+        args, kwargs = mock_get_movies.call_args
+        assert args[5] == "relevance"  # search_mode parameter
+
+    def test_list_movies_invalid_search_mode(self):
+        """Test GET /movies with unknown search mode"""
+        response = client.get("/api/rest/v1/movies?search_mode=fuzzy")
+
+        assert response.status_code == 422
+
+    @patch("server.routers.movies.get_movies")
+    def test_list_movies_with_cursor(self, mock_get_movies):
+        """Test GET /movies passes the cursor and returns the next one"""
+        mock_movie = MagicMock(id=7, title="Heat", release_year=1995, genres=[])
+        mock_get_movies.return_value = ([mock_movie], 20)
+
+        response = client.get("/api/rest/v1/movies?limit=1&sort_by=id_asc&cursor=abc")
+
+        assert response.status_code == 200
+        args, kwargs = mock_get_movies.call_args
+        assert args[6] == "abc"  # cursor parameter
+        assert response.json()["next_cursor"]
+        assert response.json()["has_previous"] is True
+
+    @patch("server.routers.movies.get_movies")
+    def test_list_movies_invalid_cursor(self, mock_get_movies):
+        """Test GET /movies with a cursor the service rejects"""
+        mock_get_movies.side_effect = CursorError("cursor", "Invalid cursor")
+
+        response = client.get("/api/rest/v1/movies?cursor=abc")
+
+        assert response.status_code == 400
+        assert response.json()["error"]["code"] == "VALIDATION_ERROR"
+        assert response.json()["error"]["message"] == "cursor: Invalid cursor"
+
+    @patch("server.routers.movies.get_movies")
+    def test_list_movies_cursor_with_relevance(self, mock_get_movies):
+        """Test GET /movies reports a cursor with relevance ordering against search_mode"""
+        mock_get_movies.side_effect = CursorError("search_mode", "Cursor pagination is not supported with relevance ordering")
+
+        response = client.get("/api/rest/v1/movies?search=toy&search_mode=relevance&cursor=abc")
+
+        assert response.status_code == 400
+        assert response.json()["error"]["message"].startswith("search_mode: Cursor pagination")
+
+    @patch("server.routers.movies.get_movies")
+    def test_list_movies_other_errors_not_reported_as_cursor(self, mock_get_movies):
+        """Test GET /movies lets unrelated service errors propagate"""
+        mock_get_movies.side_effect = ValueError("Unsupported count mode: all")
+
+        with pytest.raises(ValueError, match="Unsupported count mode"):
+            client.get("/api/rest/v1/movies")
+
+    @patch("server.routers.movies.get_movies")
+    def test_list_movies_without_count(self, mock_get_movies):
+        """Test GET /movies with count_mode=none leaves the totals empty"""
+        mock_movie = MagicMock(id=7, title="Heat", release_year=1995, genres=[])
+        mock_get_movies.return_value = ([mock_movie], None)
+
+        response = client.get("/api/rest/v1/movies?limit=1&count_mode=none")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] is None
+        assert data["total_pages"] is None
+        assert data["has_next"] is True
+        args, kwargs = mock_get_movies.call_args
+        assert args[7] == "none"  # count_mode parameter
+
+    @patch("server.routers.movies.get_movies")
+    def test_list_movies_estimated_count(self, mock_get_movies):
+        """Test GET /movies with count_mode=estimate flags the total as estimated"""
+        mock_get_movies.return_value = ([], 1200)
+
+        response = client.get("/api/rest/v1/movies?count_mode=estimate")
+
+        assert response.status_code == 200
+        assert response.json()["total_estimated"] is True
+        assert response.json()["has_next"] is False
+
+    def test_list_movies_invalid_count_mode(self):
+        """Test GET /movies with unknown count mode"""
+        response = client.get("/api/rest/v1/movies?count_mode=fast")
+        assert response.status_code == 422
+
+    @patch("server.routers.movies.autocomplete")
+    def test_autocomplete(self, mock_autocomplete):
+        """Test GET /movies/autocomplete returns suggestions"""
+        mock_autocomplete.return_value = {
+            "query": "toy",
+            "suggestions": [{"type": "movie", "id": 1, "label": "Toy Story (1995)"}],
+        }
+
+        response = client.get("/api/rest/v1/movies/autocomplete?q=toy&limit=5")
+
+        assert response.status_code == 200
+        assert response.json()["suggestions"][0]["label"] == "Toy Story (1995)"
+        args, kwargs = mock_autocomplete.call_args
+        assert args[1:] == ("toy", 5)
+
+    def test_autocomplete_requires_query(self):
+        """Test GET /movies/autocomplete without q or with too high limit"""
+        assert client.get("/api/rest/v1/movies/autocomplete").status_code == 422
+        assert client.get("/api/rest/v1/movies/autocomplete?q=a&limit=50").status_code == 422
+
     def test_list_movies_invalid_limit(self):
         """Test GET /movies with invalid limit (too high)"""
         response = client.get("/api/rest/v1/movies?limit=500")
@@ -15,12 +15,10 @@ client = TestClient(app)
 class TestRecommendationsRouter:
     """Test recommendations endpoints with mocked services"""
 
-    @patch("server.routers.recommendations.get_training_status")
-    @patch("server.routers.recommendations.BackgroundTasks.add_task")
-    def test_train_model_starts_background_task(self, mock_add_task, mock_get_status):
-        """Test POST /recommendation-engine starts training in background (BONUS #3)"""
-        # Mock status to show no training in progress
-        mock_get_status.return_value = {"status": "idle"}
+    @patch("server.routers.recommendations.submit_training_job")
+    def test_train_model_starts_background_task(self, mock_submit):
+        """Test POST /recommendation-engine starts a training job in the background (BONUS #3)"""
+        mock_submit.return_value = {"job_id": 7, "status": "queued"}
 
         response = client.post("/api/rest/v1/recommendation-engine")
 
@@ -28,14 +26,96 @@ class TestRecommendationsRouter:
         data = response.json()
         assert data["status"] == "training"
         assert "background" in data["message"].lower()
+        assert data["job_id"] == 7
 
-        # Verify background task was added
-        mock_add_task.assert_called_once()
+        # Verify the job was submitted
+        mock_submit.assert_called_once()
 
-    @patch("server.routers.recommendations.get_training_status")
-    def test_train_model_already_training(self, mock_get_status):
+    @patch("server.routers.recommendations.submit_training_job")
+    def test_train_model_with_precompute_top_k(self, mock_submit):
+        """Test POST /recommendation-engine passes precompute_top_k to training"""
+        mock_submit.return_value = {"job_id": 1, "status": "queued"}
+
+        response = client.post("/api/rest/v1/recommendation-engine?precompute_top_k=50")
+
+        assert response.status_code == 200
+        session, params = mock_submit.call_args.args
+        assert params["precompute_top_k"] == 50
+
+    @patch("server.routers.recommendations.submit_training_job")
+    def test_train_model_with_factor_dtype(self, mock_submit):
+        """Test POST /recommendation-engine passes factor_dtype to training"""
+        mock_submit.return_value = {"job_id": 1, "status": "queued"}
+
+        response = client.post("/api/rest/v1/recommendation-engine?factor_dtype=int8")
+
+        assert response.status_code == 200
+        session, params = mock_submit.call_args.args
+        assert params["factor_dtype"] == "int8"
+
+    @patch("server.routers.recommendations.submit_training_job")
+    def test_train_model_with_mode(self, mock_submit):
+        """Test POST /recommendation-engine passes the training mode"""
+        mock_submit.return_value = {"job_id": 1, "status": "queued"}
+
+        response = client.post("/api/rest/v1/recommendation-engine?mode=incremental")
+
+        assert response.status_code == 200
+        session, params = mock_submit.call_args.args
+        assert params["mode"] == "incremental"
+
+    @patch("server.routers.recommendations.submit_training_job")
+    def test_train_model_with_engine(self, mock_submit):
+        """Test POST /recommendation-engine passes the training engine"""
+        mock_submit.return_value = {"job_id": 1, "status": "queued"}
+
+        response = client.post("/api/rest/v1/recommendation-engine?engine=als")
+
+        assert response.status_code == 200
+        session, params = mock_submit.call_args.args
+        assert params["engine"] == "als"
+
+    @patch("server.routers.recommendations.submit_training_job")
+    def test_train_model_with_memory_budget(self, mock_submit):
+        """Test POST /recommendation-engine passes the out-of-core memory budget"""
+        mock_submit.return_value = {"job_id": 1, "status": "queued"}
+
+        response = client.post("/api/rest/v1/recommendation-engine?engine=als_ooc&memory_budget_mb=512")
+
+        assert response.status_code == 200
+        session, params = mock_submit.call_args.args
+        assert params["engine"] == "als_ooc"
+        assert params["memory_budget_mb"] == 512
+
+    def test_train_model_invalid_memory_budget(self):
+        """Test POST /recommendation-engine rejects memory budgets below 64 MB"""
+        response = client.post("/api/rest/v1/recommendation-engine?memory_budget_mb=8")
+        assert response.status_code == 422
+
+    def test_train_model_invalid_engine(self):
+        """Test POST /recommendation-engine rejects unknown engines"""
+        response = client.post("/api/rest/v1/recommendation-engine?engine=svd")
+        assert response.status_code == 422
+
+    def test_train_model_invalid_mode(self):
+        """Test POST /recommendation-engine rejects unknown modes"""
+        response = client.post("/api/rest/v1/recommendation-engine?mode=partial")
+        assert response.status_code == 422
+
+    def test_train_model_invalid_factor_dtype(self):
+        """Test POST /recommendation-engine rejects unknown factor_dtype"""
+        response = client.post("/api/rest/v1/recommendation-engine?factor_dtype=float16")
+        assert response.status_code == 422
+
+    def test_train_model_invalid_precompute_top_k(self):
+        """Test POST /recommendation-engine rejects out of range precompute_top_k"""
+        response = client.post("/api/rest/v1/recommendation-engine?precompute_top_k=0")
+        assert response.status_code == 422
+
+    @patch("server.routers.recommendations.submit_training_job")
+    def test_train_model_already_training(self, mock_submit):
         """Test POST /recommendation-engine when training already in progress"""
-        mock_get_status.return_value = {"status": "training"}
+        mock_submit.return_value = None
 
         response = client.post("/api/rest/v1/recommendation-engine")
 
@@ -43,6 +123,20 @@ class TestRecommendationsRouter:
         data = response.json()
         assert data["status"] == "training"
         assert "already in progress" in data["message"].lower()
+        assert data["job_id"] is None
+
+    @patch("server.routers.recommendations.submit_training_job")
+    def test_train_model_could_not_start(self, mock_submit):
+        """Test POST /recommendation-engine when the training process can't be started"""
+        mock_submit.return_value = {"job_id": 4, "status": "failed", "error": "Could not start the training process"}
+
+        response = client.post("/api/rest/v1/recommendation-engine")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "failed"
+        assert data["job_id"] == 4
+        assert "could not start" in data["message"].lower()
 
     @patch("server.routers.recommendations.get_training_status")
     def test_get_training_status_idle(self, mock_get_status):
@@ -71,6 +165,13 @@ class TestRecommendationsRouter:
             "completed_at": "2024-10-29T10:02:00",
             "model_version": "20241029_100000",
             "total_ratings": 100000,
+            "metrics": {
+                "total_seconds": 12.5,
+                "peak_rss_mb": 512.0,
+                "stages": [{"stage": "factorizing", "seconds": 10.0, "peak_rss_mb": 512.0}],
+                "matrix": {"n_users": 600, "n_movies": 9000, "n_ratings": 100000, "density": 0.0185, "size_mb": 1.2},
+                "iterations": [{"iteration": 1, "error": 250.0}],
+            },
             "error": None
         }
 
@@ -81,6 +182,8 @@ class TestRecommendationsRouter:
         assert data["status"] == "completed"
         assert data["model_version"] == "20241029_100000"
         assert data["total_ratings"] == 100000
+        assert data["metrics"]["stages"][0]["stage"] == "factorizing"
+        assert data["metrics"]["matrix"]["density"] == 0.0185
 
     @patch("server.routers.recommendations.get_training_status")
     def test_get_training_status_failed(self, mock_get_status):
@@ -101,6 +204,109 @@ class TestRecommendationsRouter:
         assert data["status"] == "failed"
         assert data["error"] is not None
 
+    @patch("server.routers.recommendations.list_training_jobs")
+    def test_list_training_jobs(self, mock_list):
+        """Test GET /recommendation-engine/jobs lists jobs"""
+        mock_list.return_value = [{"job_id": 2, "status": "running", "stage": "factorizing", "progress": 0.3}]
+
+        response = client.get("/api/rest/v1/recommendation-engine/jobs?limit=5")
+
+        assert response.status_code == 200
+        assert response.json()["jobs"][0]["job_id"] == 2
+        assert mock_list.call_args.args[1] == 5
+
+    @patch("server.routers.recommendations.get_training_job")
+    def test_get_training_job(self, mock_get_job):
+        """Test GET /recommendation-engine/jobs/{job_id} returns one job"""
+        mock_get_job.return_value = {"job_id": 3, "status": "completed", "progress": 1.0, "model_version": "20241029_100000"}
+
+        response = client.get("/api/rest/v1/recommendation-engine/jobs/3")
+
+        assert response.status_code == 200
+        assert response.json()["model_version"] == "20241029_100000"
+
+    @patch("server.routers.recommendations.get_training_job")
+    def test_get_training_job_not_found(self, mock_get_job):
+        """Test GET /recommendation-engine/jobs/{job_id} for an unknown job"""
+        mock_get_job.side_effect = ValueError("Training job with ID 99 not found")
+
+        response = client.get("/api/rest/v1/recommendation-engine/jobs/99")
+
+        assert response.status_code == 404
+        assert response.json()["error"]["code"] == "TRAINING_JOB_NOT_FOUND"
+
+    @patch("server.routers.recommendations.cancel_training_job")
+    def test_cancel_training_job(self, mock_cancel):
+        """Test POST /recommendation-engine/jobs/{job_id}/cancel requests cancellation"""
+        mock_cancel.return_value = {"job_id": 4, "status": "running", "cancel_requested": True}
+
+        response = client.post("/api/rest/v1/recommendation-engine/jobs/4/cancel")
+
+        assert response.status_code == 200
+        assert response.json()["cancel_requested"] is True
+
+    @patch("server.routers.recommendations.cancel_training_job")
+    def test_cancel_finished_training_job(self, mock_cancel):
+        """Test cancelling a finished job is rejected"""
+        mock_cancel.side_effect = ValueError("Training job 4 already completed")
+
+        response = client.post("/api/rest/v1/recommendation-engine/jobs/4/cancel")
+
+        assert response.status_code == 400
+        assert response.json()["error"]["code"] == "JOB_NOT_CANCELLABLE"
+
+    @patch("server.routers.recommendations.get_model_info")
+    def test_get_model_info_loaded(self, mock_get_info):
+        """Test GET /recommendation-engine/model reports the served model"""
+        mock_get_info.return_value = {
+            "loaded": True,
+            "model_version": "20241029_100000",
+            "trained_at": "2024-10-29T10:02:00",
+            "loaded_at": "2024-10-29T10:05:00",
+        }
+
+        response = client.get("/api/rest/v1/recommendation-engine/model")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["loaded"] is True
+        assert data["model_version"] == "20241029_100000"
+        assert data["loaded_at"] == "2024-10-29T10:05:00"
+
+    @patch("server.routers.recommendations.get_model_info")
+    def test_get_model_info_not_loaded(self, mock_get_info):
+        """Test GET /recommendation-engine/model before any training"""
+        mock_get_info.return_value = {
+            "loaded": False,
+            "model_version": None,
+            "trained_at": None,
+            "loaded_at": None,
+        }
+
+        response = client.get("/api/rest/v1/recommendation-engine/model")
+
+        assert response.status_code == 200
+        assert response.json()["loaded"] is False
+
+    @patch("server.routers.recommendations.list_model_versions")
+    def test_get_model_versions(self, mock_list_versions):
+        """Test GET /recommendation-engine/models lists the registry"""
+        mock_list_versions.return_value = {
+            "latest": "20241029_100000",
+            "versions": [
+                {"version": "20241029_100000", "training_engine": "als", "size_bytes": 2048, "metrics": {"total_seconds": 3.5}},
+                {"version": "20241028_100000", "training_engine": "nmf", "size_bytes": 1024, "metrics": None},
+            ],
+        }
+
+        response = client.get("/api/rest/v1/recommendation-engine/models")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["latest"] == "20241029_100000"
+        assert [v["version"] for v in data["versions"]] == ["20241029_100000", "20241028_100000"]
+        assert data["versions"][0]["metrics"]["total_seconds"] == 3.5
+
     @patch("server.routers.recommendations.get_recommendations_for_user")
     def test_get_recommendations_success(self, mock_get_recs):
         """Test GET /user/{id}/recommended-movies success"""
@@ -213,3 +419,119 @@ class TestRecommendationsRouter:
         data = response.json()
         assert data["probabilities"] == [0.5, 0.3, 0.2]
         assert len(data["probabilities"]) == len(data["movie_ids"])
+
+
+class TestBatchRecommendationsRouter:
+    """Test batch recommendations endpoint with mocked services"""
+
+    @patch("server.routers.recommendations.get_recommendations_for_users")
+    def test_batch_recommendations_success(self, mock_get_recs):
+        """Test POST /users/recommended-movies success"""
+        mock_get_recs.return_value = {
+            "recommendations": [
+                {"user_id": 1, "movie_ids": [5, 10], "probabilities": [0.6, 0.4]},
+                {"user_id": 2, "movie_ids": [7, 3], "probabilities": [0.5, 0.5]},
+            ],
+            "not_found_user_ids": [999],
+        }
+
+        response = client.post(
+            "/api/rest/v1/users/recommended-movies",
+            json={"user_ids": [1, 2, 999], "n": 2},
+        )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["user_id"] for r in data["recommendations"]] == [1, 2]
+        assert data["recommendations"][0]["movie_ids"] == [5, 10]
+        assert data["not_found_user_ids"] == [999]
+
+        args, kwargs = mock_get_recs.call_args
+        assert args[1] == [1, 2, 999]
+        assert args[2] == 2
+
+    @patch("server.routers.recommendations.get_recommendations_for_users")
+    def test_batch_recommendations_default_n(self, mock_get_recs):
+        """Test POST /users/recommended-movies with default n=10"""
+        mock_get_recs.return_value = {"recommendations": [], "not_found_user_ids": []}
+
+        response = client.post("/api/rest/v1/users/recommended-movies", json={"user_ids": [1]})
+
+        assert response.status_code == 200
+        args, kwargs = mock_get_recs.call_args
+        assert args[2] == 10
+
+    @patch("server.routers.recommendations.get_recommendations_for_users")
+    def test_batch_recommendations_model_not_trained(self, mock_get_recs):
+        """Test POST /users/recommended-movies when model not trained"""
+        mock_get_recs.side_effect = ValueError("No trained model found. Please train the model first.")
+
+        response = client.post("/api/rest/v1/users/recommended-movies", json={"user_ids": [1]})
+
+        assert response.status_code == 400
+        assert response.json()["error"]["code"] == "MODEL_NOT_TRAINED"
+
+    def test_batch_recommendations_invalid_request(self):
+        """Test POST /users/recommended-movies with invalid input"""
+        # Empty list
+        response = client.post("/api/rest/v1/users/recommended-movies", json={"user_ids": []})
+        assert response.status_code == 422
+
+        # Non-positive user ID
+        response = client.post("/api/rest/v1/users/recommended-movies", json={"user_ids": [0]})
+        assert response.status_code == 422
+
+        # n too high
+        response = client.post("/api/rest/v1/users/recommended-movies", json={"user_ids": [1], "n": 200})
+        assert response.status_code == 422
+
+
+class TestSimilarMoviesRouter:
+    """Test similar movies endpoint with mocked services"""
+
+    @patch("server.routers.recommendations.get_similar_movies")
+    def test_similar_movies_success(self, mock_get_similar):
+        """Test GET /movies/{id}/similar success"""
+        mock_get_similar.return_value = {
+            "movie_ids": [2, 3],
+            "similarities": [0.9, 0.7],
+            "model_version": "20241029_100000",
+        }
+
+        response = client.get("/api/rest/v1/movies/1/similar?n=2")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["movie_id"] == 1
+        assert data["movie_ids"] == [2, 3]
+        assert data["similarities"] == [0.9, 0.7]
+        assert data["model_version"] == "20241029_100000"
+        mock_get_similar.assert_called_once_with(1, 2)
+
+    @patch("server.routers.recommendations.get_similar_movies")
+    def test_similar_movies_not_found(self, mock_get_similar):
+        """Test GET /movies/{id}/similar for a movie not in the model"""
+        mock_get_similar.side_effect = ValueError("Movie with ID 999 not found in trained model")
+
+        response = client.get("/api/rest/v1/movies/999/similar")
+
+        assert response.status_code == 404
+        assert response.json()["error"]["code"] == "MOVIE_NOT_FOUND"
+
+    @patch("server.routers.recommendations.get_similar_movies")
+    def test_similar_movies_model_not_trained(self, mock_get_similar):
+        """Test GET /movies/{id}/similar when model not trained"""
+        mock_get_similar.side_effect = ValueError("No trained model found. Please train the model first.")
+
+        response = client.get("/api/rest/v1/movies/1/similar")
+
+        assert response.status_code == 400
+        assert response.json()["error"]["code"] == "MODEL_NOT_TRAINED"
+
+    def test_similar_movies_invalid_params(self):
+        """Test GET /movies/{id}/similar with invalid parameters"""
+        response = client.get("/api/rest/v1/movies/-1/similar")
+        assert response.status_code == 400
+
+        response = client.get("/api/rest/v1/movies/1/similar?n=0")
+        assert response.status_code == 422
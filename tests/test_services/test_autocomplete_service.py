@@ -0,0 +1,143 @@
+"""
+Service-level tests for autocomplete_service
+Tests the in-memory prefix/trigram index and its refresh from the database
+"""
+
+import pytest
+from server.models.movies import MovieModel
+from server.services import autocomplete_service
+from server.services.autocomplete_service import (
+    AutocompleteIndex,
+    autocomplete,
+    build_autocomplete_index,
+    normalize_words,
+)
+
+
+@pytest.fixture
+def index():
+    """Index over a few genres and titles"""
+    index = AutocompleteIndex()
+    index.add_genre(1, "Drama")
+    index.add_genre(2, "Sci-Fi")
+    index.add_movie(1, "The Matrix (1999)")
+    index.add_movie(2, "The Matrix Reloaded (2003)")
+    index.add_movie(3, "Toy Story (1995)")
+    index.add_movie(4, "Amélie (2001)")
+    index.add_movie(5, "Drama Queen (2010)")
+    return index
+
+
+@pytest.fixture
+def reset_index():
+    """Start and end every test without a process-wide index"""
+    autocomplete_service._index = None
+    yield
+    autocomplete_service._index = None
+
+
+class TestAutocompleteIndex:
+    """Test searching the in-memory index"""
+
+    def test_normalize_words(self):
+        """Test words are lowercased and stripped of accents and punctuation"""
+        assert normalize_words("Amélie (2001)!") == ["amelie", "2001"]
+
+    def test_prefix_of_last_word(self, index):
+        """Test a partially typed word matches titles starting words with it"""
+        labels = [s["label"] for s in index.search("the mat")]
+        assert labels == ["The Matrix (1999)", "The Matrix Reloaded (2003)"]
+
+    def test_words_in_any_order(self, index):
+        """Test query words match title words regardless of order"""
+        assert [s["id"] for s in index.search("story toy")] == [3]
+
+    def test_accents_ignored(self, index):
+        """Test accented titles match unaccented queries"""
+        assert [s["label"] for s in index.search("ameli")] == ["Amélie (2001)"]
+
+    def test_typo_tolerated(self, index):
+        """Test a mistyped word matches through trigram similarity"""
+        assert [s["id"] for s in index.search("matrx")] == [1, 2]
+
+    def test_genres_ranked_before_movies(self, index):
+        """Test a genre matching the query comes before movies"""
+        suggestions = index.search("dra")
+        assert [(s["type"], s["id"]) for s in suggestions] == [("genre", 1), ("movie", 5)]
+
+    def test_exact_match_beyond_candidate_cap(self, monkeypatch):
+        """Test exact and leading matches are found however many other entries match first"""
+        monkeypatch.setattr(autocomplete_service, "AUTOCOMPLETE_MAX_CANDIDATES", 10)
+        index = AutocompleteIndex()
+        for movie_id in range(1, 50):
+            index.add_movie(movie_id, f"Italian Story {movie_id}")
+        index.add_movie(50, "Time It Takes")
+        index.add_movie(51, "It")
+        index.add_movie(52, "It Follows")
+
+        labels = [s["label"] for s in index.search("it", limit=3)]
+
+        assert labels == ["It", "It Follows", "Italian Story 1"]
+
+    def test_leading_matches_follow_updates(self, index):
+        """Test renamed and removed entries are no longer found as leading matches"""
+        assert [s["id"] for s in index.search("toy story")] == [3]
+
+        index.add_movie(3, "Heat (1995)")
+        assert index.search("toy story") == []
+
+        index.remove_movie(1)
+        assert [s["id"] for s in index.search("the matrix")] == [2]
+
+    def test_limit_and_no_match(self, index):
+        """Test the limit is applied and unrelated queries return nothing"""
+        assert len(index.search("the", limit=1)) == 1
+        assert index.search("zzzzzz") == []
+        assert index.search("  ") == []
+
+    def test_update_and_remove(self, index):
+        """Test re-adding a movie replaces its title and removed movies disappear"""
+        index.add_movie(3, "Toy Story 2 (1999)")
+        assert [s["label"] for s in index.search("toy")] == ["Toy Story 2 (1999)"]
+
+        index.remove_movie(3)
+        assert index.search("toy") == []
+
+
+class TestAutocomplete:
+    """Test building and refreshing the process-wide index"""
+
+    def test_builds_from_database(self, test_session, sample_movies, reset_index):
+        """Test the first request builds the index from movies and genres"""
+        result = autocomplete(test_session, "comedy")
+
+        assert result["query"] == "comedy"
+        assert [(s["type"], s["label"]) for s in result["suggestions"]] == [
+            ("genre", "Comedy"), ("movie", "Test Comedy Movie"),
+        ]
+
+    def test_refresh_adds_new_movies(self, test_session, sample_movies, reset_index, monkeypatch):
+        """Test a due refresh reads only movies added since and keeps the index"""
+        index = build_autocomplete_index(test_session)
+        autocomplete_service._index = index
+        test_session.add(MovieModel(id=10, title="Heat", release_year=1995))
+        test_session.commit()
+
+        assert autocomplete(test_session, "heat")["suggestions"] == []
+
+        monkeypatch.setattr(autocomplete_service, "AUTOCOMPLETE_REFRESH_SECONDS", -1)
+        assert [s["id"] for s in autocomplete(test_session, "heat")["suggestions"]] == [10]
+        assert autocomplete_service._index is index
+
+    def test_refresh_rebuilds_after_deletion(self, test_session, sample_movies, reset_index, monkeypatch):
+        """Test deleted movies trigger a rebuild"""
+        index = build_autocomplete_index(test_session)
+        autocomplete_service._index = index
+        test_session.delete(sample_movies[0])
+        test_session.commit()
+
+        monkeypatch.setattr(autocomplete_service, "AUTOCOMPLETE_REFRESH_SECONDS", -1)
+        result = autocomplete(test_session, "test")
+
+        assert autocomplete_service._index is not index
+        assert sorted(s["id"] for s in result["suggestions"]) == [2, 3]
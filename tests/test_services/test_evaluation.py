@@ -0,0 +1,95 @@
+"""
+Service-level tests for offline evaluation of the recommender
+Tests the time-based split, ranking metrics and evaluating a configuration
+"""
+
+import numpy as np
+import pytest
+from server.services.evaluation import evaluate_config, evaluate_factors, time_split
+from server.services.training_data import build_rating_matrix
+
+
+def make_ratings(n_users=60, n_movies=40, n_ratings=900, seed=4):
+    """Synthetic ratings with timestamps, from a low-rank model"""
+    rng = np.random.default_rng(seed)
+    cells = rng.choice(n_users * n_movies, size=n_ratings, replace=False)
+    user_ids, movie_ids = np.divmod(cells, n_movies)
+    affinity = (rng.random((n_users, 3)) @ rng.random((3, n_movies)))[user_ids, movie_ids]
+    return {
+        "user_ids": (user_ids + 1).astype(np.int32),
+        "movie_ids": (movie_ids + 100).astype(np.int32),
+        "ratings": np.round(1 + 8 * affinity / affinity.max()).astype(np.float32) / 2 + 0.5,
+        "timestamps": np.datetime64("2024-01-01") + rng.permutation(n_ratings).astype("timedelta64[m]"),
+    }
+
+
+class TestTimeSplit:
+    """Test holding out the newest ratings"""
+
+    def test_newest_ratings_are_test(self):
+        """Test every test rating is newer than every training rating"""
+        ratings = make_ratings()
+
+        train, test = time_split(ratings, test_fraction=0.25)
+
+        assert len(train["ratings"]) == 675
+        assert len(test["ratings"]) == 225
+        lookup = dict(zip(zip(ratings["user_ids"].tolist(), ratings["movie_ids"].tolist()), ratings["timestamps"]))
+        newest_train = max(lookup[p] for p in zip(train["user_ids"].tolist(), train["movie_ids"].tolist()))
+        oldest_test = min(lookup[p] for p in zip(test["user_ids"].tolist(), test["movie_ids"].tolist()))
+        assert newest_train < oldest_test
+
+
+class TestEvaluateFactors:
+    """Test precision@k, recall@k and RMSE"""
+
+    def make_case(self):
+        """Two users, four movies; in training user 1 rated movie 10 and user 2 movie 30"""
+        rating_matrix = build_rating_matrix([1, 1, 2, 2], [10, 20, 30, 40], [5.0, 0.0, 3.0, 0.0])
+        rating_matrix["matrix"].eliminate_zeros()  # keep columns for 20 and 40 without ratings
+        user_features = np.array([[1.0, 0.0], [0.0, 1.0]])
+        item_features = np.array([[4.0, 3.0, 1.0, 0.5], [0.5, 1.0, 2.0, 4.0]])
+        return rating_matrix, user_features, item_features
+
+    def test_ranking_metrics(self):
+        """Test hits are counted among the top k unseen movies"""
+        rating_matrix, user_features, item_features = self.make_case()
+        # User 1: top unseen movie is 20 (relevant hit); user 2: top unseen is 40, relevant is 20
+        test = {"user_ids": np.array([1, 2]), "movie_ids": np.array([20, 20]), "ratings": np.array([4.0, 5.0])}
+
+        scores = evaluate_factors(rating_matrix, user_features, item_features, test, k=1)
+
+        assert scores["ranking_users"] == 2
+        assert scores["precision_at_k"] == pytest.approx(0.5)
+        assert scores["recall_at_k"] == pytest.approx(0.5)
+
+    def test_rmse_skips_unknown_ids(self):
+        """Test RMSE covers only ratings of users and movies seen in training"""
+        rating_matrix, user_features, item_features = self.make_case()
+        test = {"user_ids": np.array([1, 9, 2]), "movie_ids": np.array([20, 20, 99]), "ratings": np.array([2.0, 5.0, 5.0])}
+
+        scores = evaluate_factors(rating_matrix, user_features, item_features, test)
+
+        assert scores["rmse_ratings"] == 1
+        assert scores["rmse"] == pytest.approx(1.0)
+        assert scores["precision_at_k"] is None
+
+
+class TestEvaluateConfig:
+    """Test training and evaluating one candidate configuration"""
+
+    @pytest.mark.parametrize("engine", ["nmf", "als"])
+    def test_reports_quality_and_cost(self, engine):
+        """Test a configuration reports metrics, time and memory"""
+        train, test = time_split(make_ratings())
+
+        result = evaluate_config(train, test, {"engine": engine, "n_components": 3, "max_iter": 20})
+
+        assert result["engine"] == engine
+        assert result["n_components"] == 3
+        assert 0 <= result["precision_at_k"] <= 1
+        assert 0 <= result["recall_at_k"] <= 1
+        assert result["rmse"] > 0
+        assert result["train_seconds"] >= 0
+        assert result["peak_rss_mb"] > 0
+        assert result["n_iter"] <= 20
@@ -0,0 +1,113 @@
+"""
+Service-level tests for reduced-precision factor storage
+Tests int8 quantization, scoring with float32/int8 factors, and the
+top-N overlap accuracy check
+"""
+
+import numpy as np
+import pytest
+from server.services.factor_precision import quantize_rows, reduce_precision, top_n_overlap
+from server.services.scoring import prepare_model_data, recommend_for_row, recommend_for_rows, score_rows
+
+
+def make_factors(n_users=40, n_movies=60, k=5):
+    """Random non-negative factors shaped like a trained NMF model"""
+    rng = np.random.default_rng(11)
+    return rng.random((n_users, k)), rng.random((k, n_movies))
+
+
+class TestQuantizeRows:
+    """Test per-row int8 quantization"""
+
+    def test_dequantized_close_to_original(self):
+        """Test every value is recovered within half a quantization step"""
+        matrix = np.random.default_rng(0).normal(size=(8, 16))
+
+        values, scales = quantize_rows(matrix)
+
+        assert values.dtype == np.int8
+        assert scales.dtype == np.float32
+        error = np.abs(values * scales[:, np.newaxis] - matrix)
+        assert np.all(error <= scales[:, np.newaxis] / 2 + 1e-6)
+
+    def test_zero_row(self):
+        """Test an all-zero row quantizes to zeros with a unit scale"""
+        values, scales = quantize_rows(np.zeros((2, 3)))
+
+        assert not values.any()
+        assert scales.tolist() == [1.0, 1.0]
+
+
+class TestReducePrecision:
+    """Test converting factors to a serving precision"""
+
+    @pytest.mark.parametrize("dtype,expected", [
+        ("float64", np.float64), ("float32", np.float32), ("int8", np.int8),
+    ])
+    def test_factor_dtypes(self, dtype, expected):
+        """Test factors are stored in the requested dtype"""
+        factors = reduce_precision(*make_factors(), dtype)
+
+        assert factors["factor_dtype"] == dtype
+        assert factors["user_features"].dtype == expected
+        assert factors["item_features"].dtype == expected
+        assert ("user_scales" in factors) == (dtype == "int8")
+
+    def test_unsupported_dtype(self):
+        """Test an unknown precision is rejected"""
+        with pytest.raises(ValueError, match="Unsupported factor dtype"):
+            reduce_precision(*make_factors(), "float16")
+
+    @pytest.mark.parametrize("dtype", ["float32", "int8"])
+    def test_scores_close_to_float64(self, dtype):
+        """Test reduced-precision scores stay close to float64 scores"""
+        user_features, item_features = make_factors()
+        factors = reduce_precision(user_features, item_features, dtype)
+        rows = np.arange(10)
+
+        expected = user_features[rows] @ item_features
+        np.testing.assert_allclose(score_rows(factors, rows), expected, rtol=0.05)
+
+    def test_int8_scoring_in_blocks(self, monkeypatch):
+        """Test int8 scoring gives the same result whatever the dequantize block"""
+        factors = reduce_precision(*make_factors(), "int8")
+        expected = score_rows(factors, np.arange(5))
+
+        monkeypatch.setattr("server.services.scoring.DEQUANTIZE_BLOCK_SIZE", 7)
+        np.testing.assert_allclose(score_rows(factors, np.arange(5)), expected, rtol=1e-6)
+        np.testing.assert_allclose(score_rows(factors, 3), expected[3], rtol=1e-6)
+
+    def test_single_and_batch_agree_int8(self):
+        """Test single-user and batch scoring agree on int8 factors"""
+        user_features, item_features = make_factors()
+        model_data = prepare_model_data({
+            **reduce_precision(user_features, item_features, "int8"),
+            "user_ids": list(range(1, 41)),
+            "movie_ids": list(range(1, 61)),
+        })
+
+        batch = recommend_for_rows(model_data, [0, 7], n=5)
+
+        assert batch[0] == recommend_for_row(model_data, 0, n=5)
+        assert batch[1] == recommend_for_row(model_data, 7, n=5)
+
+
+class TestTopNOverlap:
+    """Test the accuracy check against float64 factors"""
+
+    def test_identical_factors(self):
+        """Test identical factors overlap completely"""
+        user_features, item_features = make_factors()
+        reference = {"user_features": user_features, "item_features": item_features}
+
+        assert top_n_overlap(reference, reference, n=10) == 1.0
+
+    @pytest.mark.parametrize("dtype,minimum", [("float32", 0.99), ("int8", 0.8)])
+    def test_reduced_precision_overlap(self, dtype, minimum):
+        """Test reduced precisions keep most of the float64 top-N"""
+        user_features, item_features = make_factors()
+        reference = {"user_features": user_features, "item_features": item_features}
+
+        overlap = top_n_overlap(reference, reduce_precision(user_features, item_features, dtype), n=10)
+
+        assert minimum <= overlap <= 1.0
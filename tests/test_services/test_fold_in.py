@@ -0,0 +1,97 @@
+"""
+Service-level tests for request-time fold-in of users missing from the model
+Tests the non-negative projection onto item factors and the per-user cache
+"""
+
+import numpy as np
+from scipy.optimize import nnls
+from server.services.factor_precision import reduce_precision
+from server.services.fold_in import FoldInCache, build_fold_in_factor, fold_in_user
+from server.services.scoring import prepare_model_data
+
+
+def make_model_data(dtype="float64", n_movies=30, k=4):
+    """Random model prepared for fold-in"""
+    rng = np.random.default_rng(5)
+    model_data = prepare_model_data({
+        **reduce_precision(rng.random((10, k)), rng.random((k, n_movies)), dtype),
+        "user_ids": list(range(1, 11)),
+        "movie_ids": list(range(100, 100 + n_movies)),
+    })
+    model_data["fold_in_factor"] = build_fold_in_factor(model_data)
+    return model_data
+
+
+class TestFoldInUser:
+    """Test projecting ratings onto fixed item factors"""
+
+    def test_matches_full_nnls(self):
+        """Test the Gram-form solution equals NNLS over the full rating row"""
+        model_data = make_model_data()
+        movie_ids, ratings = [100, 105, 117], [5.0, 3.5, 4.0]
+
+        vector = fold_in_user(model_data, movie_ids, ratings)
+
+        row = np.zeros(30)
+        row[[0, 5, 17]] = ratings
+        expected, _ = nnls(model_data["item_features"].T, row)
+        np.testing.assert_allclose(vector, expected, atol=1e-6)
+        assert np.all(vector >= 0)
+
+    def test_int8_factors(self):
+        """Test fold-in works on quantized item factors"""
+        float_vector = fold_in_user(make_model_data(), [100, 101], [4.0, 2.0])
+        int8_vector = fold_in_user(make_model_data("int8"), [100, 101], [4.0, 2.0])
+
+        np.testing.assert_allclose(int8_vector, float_vector, rtol=0.1, atol=0.05)
+
+    def test_unknown_movies_ignored(self):
+        """Test users who only rated movies missing from the model can't be folded in"""
+        model_data = make_model_data()
+
+        assert fold_in_user(model_data, [], []) is None
+        assert fold_in_user(model_data, [999], [4.0]) is None
+
+
+class TestFoldInCache:
+    """Test the per-user LRU cache of folded-in vectors"""
+
+    def test_get_put_invalidate(self):
+        """Test cached vectors are returned until invalidated"""
+        cache = FoldInCache()
+        cache.put(1, "v1", (1, None), np.ones(3), [10])
+
+        vector, movie_ids = cache.get(1, "v1", (1, None))
+        assert vector.tolist() == [1.0, 1.0, 1.0]
+        assert movie_ids == [10]
+
+        cache.invalidate(1)
+        assert cache.get(1, "v1", (1, None)) is None
+
+    def test_other_model_version_misses(self):
+        """Test entries computed against another model version are ignored"""
+        cache = FoldInCache()
+        cache.put(1, "v1", (0, None), None, [])
+
+        assert cache.get(1, "v1", (0, None)) == (None, [])
+        assert cache.get(1, "v2", (0, None)) is None
+
+    def test_changed_ratings_miss(self):
+        """Test entries computed from fewer or older ratings are ignored"""
+        cache = FoldInCache()
+        cache.put(1, "v1", (1, "10:00"), None, [10])
+
+        assert cache.get(1, "v1", (2, "10:05")) is None
+        assert cache.get(1, "v1", (1, "10:05")) is None
+
+    def test_evicts_least_recently_used(self):
+        """Test the cache keeps at most max_size users"""
+        cache = FoldInCache(max_size=2)
+        cache.put(1, "v1", (0, None), None, [])
+        cache.put(2, "v1", (0, None), None, [])
+        cache.get(1, "v1", (0, None))
+        cache.put(3, "v1", (0, None), None, [])
+
+        assert cache.get(1, "v1", (0, None)) is not None
+        assert cache.get(2, "v1", (0, None)) is None
+        assert cache.get(3, "v1", (0, None)) is not None
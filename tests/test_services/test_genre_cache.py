@@ -0,0 +1,48 @@
+"""
+Service-level tests for genre_cache
+Tests the process-wide genre dictionary used by the movie listing
+"""
+
+import pytest
+from sqlalchemy import text
+from server.models.genres import GenreModel
+from server.services.genre_cache import GenreRow, genre_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start every test with no cached genres"""
+    genre_cache.clear()
+    yield
+    genre_cache.clear()
+
+
+class TestGenreCache:
+    """Test resolving genre ids to names"""
+
+    def test_resolves_ids_in_order(self, test_session, sample_movies):
+        """Test ids are resolved to id/name rows in the order asked"""
+        ids = [g.id for g in test_session.query(GenreModel).order_by(GenreModel.name.desc())]
+
+        genres = genre_cache.get_many(test_session, ids)
+
+        assert [g.name for g in genres] == ["Drama", "Comedy", "Action"]
+        assert genres[0] == GenreRow(ids[0], "Drama")
+
+    def test_reloads_on_unknown_id(self, test_session, sample_movies):
+        """Test a genre added by another process is found by reloading"""
+        genre_cache.get_many(test_session, [1])
+        test_session.execute(text("INSERT INTO genres (id, name) VALUES (50, 'Horror')"))
+        test_session.commit()
+
+        assert [g.name for g in genre_cache.get_many(test_session, [50, 999])] == ["Horror"]
+
+    def test_rename_invalidates(self, test_session, sample_movies):
+        """Test renaming a genre in this process drops the cached names"""
+        action = test_session.query(GenreModel).filter_by(name="Action").one()
+        assert genre_cache.get_many(test_session, [action.id])[0].name == "Action"
+
+        action.name = "Adventure"
+        test_session.commit()
+
+        assert genre_cache.get_many(test_session, [action.id])[0].name == "Adventure"
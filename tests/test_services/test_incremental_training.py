@@ -0,0 +1,86 @@
+"""
+Service-level tests for warm-start incremental retraining
+Tests the full/incremental policy and initialization from a previous model
+"""
+
+import numpy as np
+import pytest
+from server.services.factor_precision import reduce_precision
+from server.services.incremental_training import (
+    INCREMENTAL_MAX_RUNS,
+    choose_training_mode,
+    warm_start_factors,
+)
+
+
+def previous_model(**overrides):
+    """Metadata of a previous model trained on 1000 ratings"""
+    return {"n_components": 2, "total_ratings": 1000, "incremental_runs": 0, **overrides}
+
+
+class TestChooseTrainingMode:
+    """Test the policy deciding between full and incremental retraining"""
+
+    def test_auto_incremental_for_few_new_ratings(self):
+        """Test auto warm-starts when few ratings were added"""
+        assert choose_training_mode(previous_model(), 1050, 2)[0] == "incremental"
+
+    @pytest.mark.parametrize("previous,total_ratings,n_components", [
+        (None, 1000, 2),                                          # no previous model
+        (previous_model(), 1000, 3),                              # components changed
+        (previous_model(), 2000, 2),                              # too many new ratings
+        (previous_model(), 900, 2),                               # ratings removed
+        (previous_model(incremental_runs=INCREMENTAL_MAX_RUNS), 1010, 2),
+        (previous_model(training_engine="als"), 1010, 2),         # engine changed
+    ])
+    def test_auto_full_retrain(self, previous, total_ratings, n_components):
+        """Test auto retrains from scratch when the policy requires it"""
+        mode, reason = choose_training_mode(previous, total_ratings, n_components)
+
+        assert mode == "full"
+        assert reason
+
+    def test_explicit_modes(self):
+        """Test explicit modes override the thresholds where possible"""
+        assert choose_training_mode(previous_model(), 1050, 2, "full")[0] == "full"
+        assert choose_training_mode(previous_model(), 5000, 2, "incremental")[0] == "incremental"
+        assert choose_training_mode(None, 5000, 2, "incremental")[0] == "full"
+
+    def test_unsupported_mode(self):
+        """Test an unknown mode is rejected"""
+        with pytest.raises(ValueError, match="Unsupported training mode"):
+            choose_training_mode(None, 10, 2, "partial")
+
+
+class TestWarmStartFactors:
+    """Test initializing factors from a previous model"""
+
+    def make_previous(self, dtype="float64"):
+        """Previous model over users 1-3 and movies 10-30"""
+        user_features = np.array([[1.0, 0.0], [0.0, 2.0], [3.0, 1.0]])
+        item_features = np.array([[0.5, 1.0, 0.0], [0.0, 2.0, 1.5]])
+        return {
+            **reduce_precision(user_features, item_features, dtype),
+            "user_ids": np.array([1, 2, 3]),
+            "movie_ids": np.array([10, 20, 30]),
+        }
+
+    def test_known_rows_copied_new_rows_initialized(self):
+        """Test known users/movies keep factors and new ones get positive values"""
+        users, items = warm_start_factors(
+            self.make_previous(), np.array([2, 3, 4]), np.array([5, 20, 30]), 4.0
+        )
+
+        np.testing.assert_array_equal(users[:2], [[0.0, 2.0], [3.0, 1.0]])
+        np.testing.assert_array_equal(items[:, 1:], [[1.0, 0.0], [2.0, 1.5]])
+        assert np.all(users[2] > 0)
+        assert np.all(items[:, 0] > 0)
+
+    def test_from_int8_model(self):
+        """Test warm-starting from a quantized model uses dequantized factors"""
+        users, items = warm_start_factors(
+            self.make_previous("int8"), np.array([1, 2, 3]), np.array([10, 20, 30]), 4.0
+        )
+
+        np.testing.assert_allclose(users, [[1.0, 0.0], [0.0, 2.0], [3.0, 1.0]], rtol=0.01)
+        assert users.dtype == np.float64
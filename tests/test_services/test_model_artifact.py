@@ -0,0 +1,137 @@
+"""
+Service-level tests for the memory-mapped model artifact format
+Tests saving/loading .npy arrays with a JSON manifest, the latest pointer,
+and conversion of legacy pickled models
+"""
+
+import json
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.decomposition import NMF
+
+from server.services.model_artifact import (
+    LATEST_POINTER_FILE,
+    artifact_dir,
+    convert_pickle_artifact,
+    load_artifact,
+    load_latest_artifact,
+    save_artifact,
+    write_latest_pointer,
+)
+
+
+def make_model_data(version="20241029_100000"):
+    """Small model data mixing arrays and JSON metadata"""
+    rng = np.random.default_rng(3)
+    return {
+        "version": version,
+        "trained_at": "2024-10-29T10:00:00",
+        "total_ratings": 5,
+        "topk": None,
+        "user_features": rng.random((3, 2)),
+        "item_features": rng.random((2, 4)).astype(np.float32),
+        "user_ids": np.array([1, 2, 3], dtype=np.int64),
+        "movie_ids": np.array([10, 20, 30, 40], dtype=np.int64),
+    }
+
+
+class TestSaveLoadArtifact:
+    """Test round-tripping model data through the artifact format"""
+
+    def test_round_trip(self, tmp_path):
+        """Test arrays and metadata survive save and load unchanged"""
+        model_data = make_model_data()
+        save_artifact(tmp_path / "model", model_data)
+
+        loaded = load_artifact(tmp_path / "model")
+
+        assert loaded["version"] == model_data["version"]
+        assert loaded["total_ratings"] == 5
+        assert loaded["topk"] is None
+        for key in ("user_features", "item_features", "user_ids", "movie_ids"):
+            np.testing.assert_array_equal(loaded[key], model_data[key])
+            assert loaded[key].dtype == model_data[key].dtype
+
+    def test_arrays_are_memory_mapped(self, tmp_path):
+        """Test arrays are opened read-only memory-mapped, not copied"""
+        save_artifact(tmp_path / "model", make_model_data())
+
+        loaded = load_artifact(tmp_path / "model")
+
+        assert isinstance(loaded["user_features"], np.memmap)
+        assert not loaded["user_features"].flags.writeable
+
+    def test_manifest_lists_extra_arrays(self, tmp_path):
+        """Test arrays written beforehand can be registered in the manifest"""
+        target = tmp_path / "model"
+        target.mkdir()
+        np.save(target / "topk_movies.npy", np.zeros((3, 2), dtype=np.int32))
+
+        save_artifact(target, make_model_data(), extra_arrays=("topk_movies",))
+
+        assert load_artifact(target)["topk_movies"].shape == (3, 2)
+
+    def test_missing_manifest(self, tmp_path):
+        """Test loading an incomplete artifact fails"""
+        (tmp_path / "model").mkdir()
+
+        with pytest.raises(FileNotFoundError):
+            load_artifact(tmp_path / "model")
+
+    def test_unsupported_format(self, tmp_path):
+        """Test loading an unknown manifest format fails"""
+        (tmp_path / "model").mkdir()
+        (tmp_path / "model" / "manifest.json").write_text(json.dumps({"format": "other"}))
+
+        with pytest.raises(ValueError, match="Unsupported model artifact format"):
+            load_artifact(tmp_path / "model")
+
+
+class TestLatestPointer:
+    """Test the pointer to the served model version"""
+
+    def test_pointer_loads_version(self, tmp_path):
+        """Test the latest pointer resolves to the saved version"""
+        save_artifact(artifact_dir(tmp_path, "v1"), make_model_data("v1"))
+        save_artifact(artifact_dir(tmp_path, "v2"), make_model_data("v2"))
+
+        write_latest_pointer(tmp_path, "v1")
+        assert load_latest_artifact(tmp_path / LATEST_POINTER_FILE)["version"] == "v1"
+
+        write_latest_pointer(tmp_path, "v2")
+        assert load_latest_artifact(tmp_path / LATEST_POINTER_FILE)["version"] == "v2"
+
+
+class TestConvertPickleArtifact:
+    """Test converting legacy pickled models"""
+
+    def test_convert_pickle(self, tmp_path):
+        """Test a pickled model converts to arrays with the estimator dropped"""
+        matrix = np.random.default_rng(0).random((3, 4))
+        model = NMF(n_components=2, init="random", random_state=42, max_iter=50)
+        user_features = model.fit_transform(matrix)
+        legacy = {
+            "version": "20241029_100000",
+            "model": model,
+            "user_features": user_features,
+            "item_features": model.components_,
+            "user_ids": [1, 2, 3],
+            "movie_ids": [10, 20, 30, 40],
+            "trained_at": "2024-10-29T10:00:00",
+            "total_ratings": 12,
+        }
+        pickle_path = tmp_path / "recommendation_model_latest.pkl"
+        with open(pickle_path, "wb") as f:
+            pickle.dump(legacy, f)
+
+        target = convert_pickle_artifact(pickle_path, tmp_path)
+        loaded = load_artifact(target)
+
+        assert target == artifact_dir(tmp_path, "20241029_100000")
+        assert "model" not in loaded
+        assert loaded["n_components"] == 2
+        assert loaded["user_ids"].dtype == np.int64
+        np.testing.assert_array_equal(loaded["movie_ids"], [10, 20, 30, 40])
+        np.testing.assert_allclose(loaded["user_features"], user_features)
@@ -0,0 +1,150 @@
+"""
+Service-level tests for the resident model holder
+Tests loading once, hot-swapping and reporting of the served model
+"""
+
+import os
+import pickle
+from unittest.mock import patch
+
+import pytest
+from server.services.model_holder import ModelHolder
+
+
+def write_model(path, version):
+    """Write a minimal model artifact"""
+    with open(path, "wb") as f:
+        pickle.dump({"version": version, "trained_at": "2024-10-29T10:00:00"}, f)
+
+
+class TestModelHolder:
+    """Test in-memory model serving and hot-swap"""
+
+    def test_get_loads_model_once(self, tmp_path):
+        """Test that repeated access does not unpickle the artifact again"""
+        path = tmp_path / "model.pkl"
+        write_model(path, "v1")
+        holder = ModelHolder(path)
+
+        with patch("server.services.model_holder.pickle.load", wraps=pickle.load) as mock_load:
+            first = holder.get()
+            second = holder.get()
+
+        assert first is second
+        assert first["version"] == "v1"
+        assert mock_load.call_count == 1
+
+    def test_get_reloads_when_artifact_changes(self, tmp_path):
+        """Test that a new artifact on disk is swapped in"""
+        path = tmp_path / "model.pkl"
+        write_model(path, "v1")
+        holder = ModelHolder(path)
+        assert holder.get()["version"] == "v1"
+
+        write_model(path, "v2")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert holder.get()["version"] == "v2"
+
+    def test_get_missing_artifact(self, tmp_path):
+        """Test error when no model has been trained"""
+        holder = ModelHolder(tmp_path / "model.pkl")
+
+        with pytest.raises(ValueError, match="No trained model found"):
+            holder.get()
+
+    def test_get_after_artifact_removed(self, tmp_path):
+        """Test that a removed artifact is no longer served"""
+        path = tmp_path / "model.pkl"
+        write_model(path, "v1")
+        holder = ModelHolder(path)
+        holder.get()
+
+        path.unlink()
+
+        with pytest.raises(ValueError, match="No trained model found"):
+            holder.get()
+        assert holder.info()["loaded"] is False
+
+    def test_get_keeps_previous_model_on_corrupt_artifact(self, tmp_path):
+        """Test that an unreadable artifact does not replace a loaded model"""
+        path = tmp_path / "model.pkl"
+        write_model(path, "v1")
+        holder = ModelHolder(path)
+        holder.get()
+
+        path.write_bytes(b"not a pickle")
+
+        assert holder.get()["version"] == "v1"
+
+    def test_corrupt_artifact_read_once_until_changed(self, tmp_path):
+        """Test an unreadable artifact isn't re-read on every access, but is retried once rewritten"""
+        path = tmp_path / "model.pkl"
+        write_model(path, "v1")
+        holder = ModelHolder(path)
+        holder.get()
+        path.write_bytes(b"not a pickle")
+
+        with patch("server.services.model_holder.pickle.load", wraps=pickle.load) as mock_load:
+            assert holder.get()["version"] == "v1"
+            assert holder.get()["version"] == "v1"
+            assert mock_load.call_count == 1
+
+        write_model(path, "v2")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert holder.get()["version"] == "v2"
+
+    def test_corrupt_artifact_without_previous_model(self, tmp_path):
+        """Test the load error is repeated without re-reading the artifact"""
+        path = tmp_path / "model.pkl"
+        path.write_bytes(b"not a pickle")
+        holder = ModelHolder(path)
+
+        with patch("server.services.model_holder.pickle.load", wraps=pickle.load) as mock_load:
+            for _ in range(2):
+                with pytest.raises(ValueError, match="Failed to load trained model"):
+                    holder.get()
+            assert mock_load.call_count == 1
+
+    def test_swap_replaces_model_without_reload(self, tmp_path):
+        """Test that swap serves new data without reading the file"""
+        path = tmp_path / "model.pkl"
+        write_model(path, "v2")
+        holder = ModelHolder(path)
+
+        holder.swap({"version": "v2", "trained_at": "2024-10-29T11:00:00"})
+
+        with patch("server.services.model_holder.pickle.load") as mock_load:
+            assert holder.get()["trained_at"] == "2024-10-29T11:00:00"
+        mock_load.assert_not_called()
+
+    def test_on_swap_called_for_loaded_and_swapped_models(self, tmp_path):
+        """Test the swap callback sees models loaded from disk and swapped in"""
+        path = tmp_path / "model.pkl"
+        write_model(path, "v1")
+        served = []
+        holder = ModelHolder(path, on_swap=lambda model_data: served.append(model_data["version"]))
+
+        holder.get()
+        holder.get()
+        holder.swap({"version": "v2"})
+
+        assert served == ["v1", "v2"]
+
+    def test_info_reports_version_and_load_time(self, tmp_path):
+        """Test reported version and load time"""
+        path = tmp_path / "model.pkl"
+        write_model(path, "v1")
+        holder = ModelHolder(path)
+
+        assert holder.info()["loaded"] is False
+
+        holder.get()
+        info = holder.info()
+
+        assert info["loaded"] is True
+        assert info["model_version"] == "v1"
+        assert info["trained_at"] == "2024-10-29T10:00:00"
+        assert info["loaded_at"] is not None
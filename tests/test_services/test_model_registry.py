@@ -0,0 +1,113 @@
+"""
+Service-level tests for the model registry
+Tests the version index, the latest pointer and retention-based garbage collection
+"""
+
+import json
+
+import numpy as np
+
+from server.services.model_artifact import (
+    LATEST_POINTER_FILE,
+    artifact_dir,
+    save_artifact,
+    save_training_metrics,
+)
+from server.services.model_registry import (
+    REGISTRY_INDEX_FILE,
+    list_versions,
+    load_index,
+    publish_version,
+)
+
+
+def save_version(models_dir, version, engine="nmf"):
+    """Save a small artifact with training metrics under models_dir"""
+    version_dir = artifact_dir(models_dir, version)
+    save_artifact(version_dir, {
+        "version": version,
+        "trained_at": "2024-10-29T10:00:00",
+        "training_engine": engine,
+        "total_ratings": 5,
+        "user_features": np.ones((3, 2)),
+    })
+    save_training_metrics(version_dir, {"total_seconds": 1.5, "iterations": [{"iteration": 1, "error": 2.0}]})
+    return version_dir
+
+
+class TestPublishVersion:
+    """Test registering versions and switching latest"""
+
+    def test_publish_updates_pointer_and_index(self, tmp_path):
+        """Test publishing points latest at the version and indexes its metadata and metrics"""
+        save_version(tmp_path, "20241029_100000", engine="als")
+
+        removed = publish_version(tmp_path, "20241029_100000")
+
+        assert removed == []
+        pointer = json.loads((tmp_path / LATEST_POINTER_FILE).read_text())
+        assert pointer["version"] == "20241029_100000"
+        index = json.loads((tmp_path / REGISTRY_INDEX_FILE).read_text())
+        assert index["latest"] == "20241029_100000"
+        entry = index["versions"][0]
+        assert entry["training_engine"] == "als"
+        assert entry["size_bytes"] > 0
+        assert entry["metrics"] == {"total_seconds": 1.5}
+
+    def test_retention_removes_old_versions(self, tmp_path):
+        """Test only the newest versions are kept on disk and in the index"""
+        versions = [f"20241029_10000{i}" for i in range(5)]
+        for version in versions:
+            save_version(tmp_path, version)
+            removed = publish_version(tmp_path, version, retain=2)
+
+        assert removed == [artifact_dir(tmp_path, versions[2]).name]
+        assert [v["version"] for v in list_versions(tmp_path)["versions"]] == versions[:2:-1]
+        assert sorted(p.name for p in tmp_path.glob("recommendation_model_2*")) == [
+            artifact_dir(tmp_path, v).name for v in versions[3:]
+        ]
+
+    def test_latest_kept_after_rollback(self, tmp_path):
+        """Test a republished older version survives retention"""
+        for version in ("20241029_100000", "20241029_100001", "20241029_100002"):
+            save_version(tmp_path, version)
+            publish_version(tmp_path, version, retain=3)
+
+        publish_version(tmp_path, "20241029_100000", retain=1)
+
+        assert [v["version"] for v in load_index(tmp_path)["versions"]] == ["20241029_100000"]
+        assert artifact_dir(tmp_path, "20241029_100000").exists()
+        assert not artifact_dir(tmp_path, "20241029_100002").exists()
+
+    def test_interrupted_training_directory_removed(self, tmp_path):
+        """Test a version directory without a manifest is garbage collected"""
+        partial = artifact_dir(tmp_path, "20241029_095959")
+        partial.mkdir()
+        (partial / "user_features.npy").write_bytes(b"partial")
+        save_version(tmp_path, "20241029_100000")
+
+        removed = publish_version(tmp_path, "20241029_100000")
+
+        assert removed == [partial.name]
+        assert not partial.exists()
+
+
+class TestLoadIndex:
+    """Test reading the version index"""
+
+    def test_rebuilds_missing_index(self, tmp_path):
+        """Test versions saved before the registry existed are indexed from disk"""
+        save_version(tmp_path, "20241029_100000")
+        save_version(tmp_path, "20241029_100001")
+
+        index = load_index(tmp_path)
+
+        assert [v["version"] for v in index["versions"]] == ["20241029_100000", "20241029_100001"]
+        assert index["latest"] is None
+
+    def test_rebuilds_corrupt_index(self, tmp_path):
+        """Test an unreadable index falls back to a directory scan"""
+        save_version(tmp_path, "20241029_100000")
+        (tmp_path / REGISTRY_INDEX_FILE).write_text("{not json")
+
+        assert [v["version"] for v in load_index(tmp_path)["versions"]] == ["20241029_100000"]
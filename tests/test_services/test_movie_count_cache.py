@@ -0,0 +1,97 @@
+"""
+Service-level tests for movie_count_cache
+Tests cached listing totals, their invalidation and the count modes of get_movies
+"""
+
+import pytest
+from sqlalchemy import text
+from server.models.movies import MovieModel
+from server.services.movie_count_cache import MovieCountCache, count_key, movie_count_cache
+from server.services.movie_service import get_movies
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start every test with no cached totals"""
+    movie_count_cache.clear()
+    yield
+    movie_count_cache.clear()
+
+
+def insert_without_orm(session, movie_id):
+    """Insert a movie with plain SQL, which the ORM events don't see"""
+    session.execute(text(f"INSERT INTO movies (id, title) VALUES ({movie_id}, 'Test Raw Movie')"))
+    session.commit()
+
+
+class TestMovieCountCache:
+    """Test the LRU cache of listing totals"""
+
+    def test_count_key_normalizes_search(self):
+        """Test searches differing in case and whitespace share a key"""
+        assert count_key("  Toy   STORY ", "substring") == count_key("toy story", "substring")
+        assert count_key("toy", "substring") != count_key("toy", "relevance")
+        assert count_key(None, "substring") == count_key("", "substring")
+
+    def test_lru_eviction_and_expiry(self, monkeypatch):
+        """Test the least recently used entry is evicted and old entries expire"""
+        cache = MovieCountCache(max_size=2, ttl=60)
+        cache.put(("a", "substring"), 1)
+        cache.put(("b", "substring"), 2)
+        cache.get(("a", "substring"))
+        cache.put(("c", "substring"), 3)
+
+        assert cache.get(("b", "substring")) is None
+        assert cache.get(("a", "substring")) == 1
+
+        cache.ttl = -1
+        assert cache.get(("a", "substring")) is None
+
+
+class TestCountModes:
+    """Test how get_movies computes totals"""
+
+    def test_exact_total_is_cached(self, test_session, sample_movies):
+        """Test a repeated search reuses the total counted the first time"""
+        assert get_movies(test_session, search="Test")[1] == 3
+        insert_without_orm(test_session, 10)
+
+        assert get_movies(test_session, search="  test ")[1] == 3
+        assert len(get_movies(test_session, search="Test")[0]) == 4
+
+    def test_orm_writes_invalidate(self, test_session, sample_movies):
+        """Test adding, changing and bulk deleting movies drops cached totals"""
+        assert get_movies(test_session)[1] == 3
+
+        test_session.add(MovieModel(id=10, title="Heat"))
+        test_session.commit()
+        assert get_movies(test_session)[1] == 4
+
+        test_session.query(MovieModel).filter(MovieModel.id == 10).delete()
+        test_session.commit()
+        assert get_movies(test_session)[1] == 3
+
+    def test_genre_links_invalidate(self, test_session, sample_movies):
+        """Test linking a movie to a genre drops cached genre search totals"""
+        assert get_movies(test_session, search="Comedy")[1] == 1
+
+        sample_movies[0].genres.append(sample_movies[1].genres[0])
+        test_session.commit()
+
+        assert get_movies(test_session, search="Comedy")[1] == 2
+
+    def test_none_skips_counting(self, test_session, sample_movies):
+        """Test count_mode none returns the page without a total"""
+        movies, total = get_movies(test_session, limit=2, count_mode="none")
+
+        assert len(movies) == 2
+        assert total is None
+
+    def test_estimate_falls_back_to_exact(self, test_session, sample_movies):
+        """Test databases without planner estimates count exactly"""
+        assert get_movies(test_session, search="Movie", count_mode="estimate")[1] == 3
+
+    def test_invalid_count_mode(self, test_session, sample_movies):
+        """Test an unknown count mode is rejected"""
+        with pytest.raises(ValueError, match="Unsupported count mode"):
+            get_movies(test_session, count_mode="fast")
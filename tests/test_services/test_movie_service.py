@@ -3,8 +3,11 @@ BONUS #1: Service-level tests for movie_service
 Tests business logic directly without HTTP layer
 """
 
+import base64
+import json
+
 import pytest
-from server.services.movie_service import get_movies, get_movie_avg_rating
+from server.services.movie_service import MOVIE_SORT_KEYS, CursorError, get_movie_avg_rating, get_movies, next_cursor
 
 
 class TestGetMovies:
@@ -70,6 +73,147 @@ class TestGetMovies:
         assert len(movies) == 0
         assert total == 0
 
+    def test_get_movies_search_movie_with_several_genres(self, test_session, sample_movies):
+        """Test a movie matching through several genres is returned once"""
+        from server.models.genres import GenreModel
+        for name in ("Dark Comedy", "Comedy Drama"):
+            sample_movies[1].genres.append(GenreModel(name=name))
+        test_session.commit()
+
+        movies, total = get_movies(test_session, limit=10, page=1, search="Comedy")
+
+        assert [m.id for m in movies] == [2]
+        assert total == 1
+
+    def test_get_movies_genres_resolved(self, test_session, sample_movies):
+        """Test listed movies carry their genres, sorted by genre id, as id/name rows"""
+        from server.models.genres import GenreModel
+        sample_movies[0].genres.append(GenreModel(name="Thriller"))
+        test_session.commit()
+
+        movies, _ = get_movies(test_session, limit=10)
+
+        assert [g.name for g in movies[0].genres] == ["Action", "Thriller"]
+        assert [g.name for g in movies[1].genres] == ["Comedy"]
+        assert movies[0].genres[0].id < movies[0].genres[1].id
+
+    def test_get_movies_without_genres(self, test_session):
+        """Test movies without genres are listed with an empty genre list"""
+        from server.models.movies import MovieModel
+        test_session.add(MovieModel(id=1, title="Untagged"))
+        test_session.commit()
+
+        movies, _ = get_movies(test_session)
+
+        assert movies[0].title == "Untagged"
+        assert movies[0].genres == []
+
+    def test_get_movies_relevance_ordering(self, test_session, sample_movies):
+        """Test relevance mode ranks exact, then prefix, then other matches"""
+        from server.models.movies import MovieModel
+        test_session.add_all([
+            MovieModel(id=4, title="Drama", release_year=2000),
+            MovieModel(id=5, title="Dramatic Tale", release_year=2001),
+        ])
+        test_session.commit()
+
+        movies, total = get_movies(test_session, limit=10, page=1, search="drama", search_mode="relevance")
+
+        assert [m.id for m in movies] == [4, 5, 3]
+        assert total == 3
+
+    def test_get_movies_relevance_sort_by_overrides(self, test_session, sample_movies):
+        """Test an explicit sort_by takes precedence over relevance"""
+        movies, total = get_movies(
+            test_session, limit=10, page=1, search="Test", sort_by="id_desc", search_mode="relevance"
+        )
+
+        assert [m.id for m in movies] == [3, 2, 1]
+
+    def test_get_movies_invalid_search_mode(self, test_session, sample_movies):
+        """Test an unknown search mode is rejected"""
+        with pytest.raises(ValueError, match="Unsupported search mode"):
+            get_movies(test_session, search="Test", search_mode="fuzzy")
+
+
+
+class TestCursorPagination:
+    """Test keyset pagination of the movie listing"""
+
+    @pytest.fixture
+    def more_movies(self, test_session, sample_movies):
+        """Movies with duplicate titles and years, and one without a year"""
+        from server.models.movies import MovieModel
+        test_session.add_all([
+            MovieModel(id=4, title="Test Comedy Movie", release_year=2021),
+            MovieModel(id=5, title="Another Movie", release_year=None),
+            MovieModel(id=6, title="Zeta", release_year=2020),
+        ])
+        test_session.commit()
+
+    @pytest.mark.parametrize("sort_by", [None, *MOVIE_SORT_KEYS])
+    def test_cursor_pages_match_offset_pages(self, test_session, more_movies, sort_by):
+        """Test following cursors visits movies in the same order as page numbers"""
+        expected = [m.id for m in get_movies(test_session, limit=10, sort_by=sort_by)[0]]
+
+        seen, cursor = [], None
+        while True:
+            movies, total = get_movies(test_session, limit=2, sort_by=sort_by, cursor=cursor)
+            seen.extend(m.id for m in movies)
+            cursor = next_cursor(movies, 2, sort_by)
+            if cursor is None:
+                break
+
+        assert seen == expected
+        assert total == 6
+
+    def test_years_missing_sort_last(self, test_session, more_movies):
+        """Test movies without a release year come last in both directions"""
+        for sort_by in ("year_asc", "year_desc"):
+            movies, _ = get_movies(test_session, limit=10, sort_by=sort_by)
+            assert movies[-1].id == 5
+
+    def test_cursor_with_search(self, test_session, more_movies):
+        """Test the cursor seeks within the search results"""
+        movies, _ = get_movies(test_session, limit=1, search="Comedy", sort_by="id_desc")
+        cursor = next_cursor(movies, 1, "id_desc", "Comedy")
+
+        movies, total = get_movies(test_session, limit=1, search="Comedy", sort_by="id_desc", cursor=cursor)
+
+        assert [m.id for m in movies] == [2]
+        assert total == 2
+
+    def test_invalid_cursor(self, test_session, sample_movies):
+        """Test malformed cursors and cursors of another sort are rejected"""
+        movies, _ = get_movies(test_session, limit=1, sort_by="title_asc")
+        cursor = next_cursor(movies, 1, "title_asc")
+
+        for bad_cursor, sort_by in (("not-a-cursor", "title_asc"), (cursor, "year_asc")):
+            with pytest.raises(CursorError, match="Invalid cursor") as error:
+                get_movies(test_session, limit=1, sort_by=sort_by, cursor=bad_cursor)
+            assert error.value.field == "cursor"
+
+    @pytest.mark.parametrize("sort_by,value,movie_id", [
+        ("year_asc", "x", 1), ("title_asc", 1995, 1), ("id_asc", None, 1), ("id_asc", 1, True),
+    ])
+    def test_cursor_value_of_wrong_type(self, test_session, sample_movies, sort_by, value, movie_id):
+        """Test tampered cursors whose values don't match the sort column are rejected"""
+        payload = json.dumps({"sort": sort_by, "value": value, "id": movie_id}).encode()
+        cursor = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+        with pytest.raises(CursorError, match="Invalid cursor"):
+            get_movies(test_session, limit=1, sort_by=sort_by, cursor=cursor)
+
+    def test_no_cursor_with_relevance_ordering(self, test_session, sample_movies):
+        """Test relevance ordering offers no cursor and rejects one"""
+        movies, _ = get_movies(test_session, limit=1, search="Test", search_mode="relevance")
+        assert next_cursor(movies, 1, None, "Test", "relevance") is None
+
+        cursor = next_cursor(movies, 1)
+        with pytest.raises(CursorError, match="not supported") as error:
+            get_movies(test_session, limit=1, search="Test", search_mode="relevance", cursor=cursor)
+        assert error.value.field == "search_mode"
+
 
 class TestGetMovieRating:
     """Test movie rating retrieval service"""
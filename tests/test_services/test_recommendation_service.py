@@ -4,34 +4,19 @@ Tests ML model training and recommendation logic
 """
 
 import pytest
-import os
-import shutil
-from pathlib import Path
+from unittest.mock import patch
+from server.services.fold_in import fold_in_user
 from server.services.recommendation_service import (
     train_recommendation_model,
     get_recommendations_for_user,
-    get_training_status,
-    MODELS_DIR
+    get_recommendations_for_users,
+    get_model_info,
+    get_similar_movies,
+    list_model_versions,
+    model_holder,
 )
 
 
-@pytest.fixture(scope="function")
-def clean_models_dir():
-    """Clean models directory before and after tests"""
-    # Clean before
-    if MODELS_DIR.exists():
-        shutil.rmtree(MODELS_DIR)
-
-    # Create fresh directory
-    MODELS_DIR.mkdir(parents=True, exist_ok=True)
-
-    yield
-
-    # Clean after
-    if MODELS_DIR.exists():
-        shutil.rmtree(MODELS_DIR)
-
-
 class TestTrainRecommendationModel:
     """Test ML model training service"""
 
@@ -46,32 +31,143 @@ class TestTrainRecommendationModel:
         assert result["message"] == "Model trained successfully"
 
         # Check model file was created
-        assert MODELS_DIR.exists()
-        assert (MODELS_DIR / "recommendation_model_latest.pkl").exists()
+        assert clean_models_dir.exists()
+        assert (clean_models_dir / "recommendation_model_latest.json").exists()
 
     def test_train_model_creates_versioned_file(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
-        """Test that versioned model file is created"""
+        """Test that a versioned model directory with arrays and manifest is created"""
         result = train_recommendation_model(test_session)
 
         version = result["model_version"]
-        versioned_file = MODELS_DIR / f"recommendation_model_{version}.pkl"
+        versioned_dir = clean_models_dir / f"recommendation_model_{version}"
+
+        assert (versioned_dir / "manifest.json").exists()
+        assert (versioned_dir / "user_features.npy").exists()
+        assert (versioned_dir / "item_features.npy").exists()
+
+    def test_train_model_precomputes_top_k(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test optional top-K materialization reports time and size"""
+        result = train_recommendation_model(test_session, precompute_top_k=2)
+
+        assert result["topk"]["k"] == 2
+        assert result["topk"]["bytes"] > 0
+        assert result["topk"]["seconds"] >= 0
+
+        version = result["model_version"]
+        assert (clean_models_dir / f"recommendation_model_{version}" / "topk_movies.npy").exists()
+        assert (clean_models_dir / f"recommendation_model_{version}" / "topk_scores.npy").exists()
+
+    def test_train_model_int8_factors(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test training with int8 factors reports overlap and still serves"""
+        result = train_recommendation_model(test_session, factor_dtype="int8")
+
+        assert 0.0 <= result["factor_overlap"] <= 1.0
+        assert len(get_recommendations_for_user(test_session, user_id=3, n=2)["movie_ids"]) > 0
+
+    def test_train_model_incremental_after_full(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test retraining warm-starts from the previous version"""
+        from server.services.rating_service import create_rating
+        first = train_recommendation_model(test_session)
+        assert first["training_mode"] == "full"
+
+        create_rating(test_session, user_id=3, movie_id=1, rating=4.0)
+        second = train_recommendation_model(test_session, mode="incremental")
+
+        assert second["training_mode"] == "incremental"
+        assert second["total_ratings"] == 6
+        assert len(get_recommendations_for_user(test_session, user_id=3, n=2)["movie_ids"]) == 1
+
+    def test_train_model_full_mode(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test an explicit full retrain ignores the previous version"""
+        train_recommendation_model(test_session)
 
-        assert versioned_file.exists()
+        result = train_recommendation_model(test_session, mode="full")
+
+        assert result["training_mode"] == "full"
+
+    def test_train_model_als_engine(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test training with the ALS engine writes a servable model"""
+        train_recommendation_model(test_session)
+
+        result = train_recommendation_model(test_session, engine="als", mode="incremental")
+
+        assert result["training_engine"] == "als"
+        assert result["training_mode"] == "full"
+        assert result["mode_reason"] == "training engine changed"
+        assert len(get_recommendations_for_user(test_session, user_id=1, n=1)["movie_ids"]) == 1
+
+    def test_train_model_out_of_core_engine(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test training with the out-of-core ALS engine writes a servable model"""
+        result = train_recommendation_model(test_session, engine="als_ooc", memory_budget_mb=64)
+
+        assert result["training_engine"] == "als_ooc"
+        assert result["metrics"]["iterations"]
+        assert result["metrics"]["matrix"]["n_ratings"] == 5
+        assert len(get_recommendations_for_user(test_session, user_id=1, n=1)["movie_ids"]) == 1
+        # Scratch blocks are removed after training
+        assert not list((clean_models_dir / "training_scratch").iterdir())
+
+    def test_train_model_out_of_core_matches_in_memory_data(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test the streamed partition yields the seen index and popularity of the full matrix"""
+        from server.services.model_artifact import artifact_dir, load_artifact
+        in_memory = train_recommendation_model(test_session, engine="als")
+        out_of_core = train_recommendation_model(test_session, engine="als_ooc", memory_budget_mb=64)
+
+        expected = load_artifact(artifact_dir(clean_models_dir, in_memory["model_version"]))
+        model = load_artifact(artifact_dir(clean_models_dir, out_of_core["model_version"]))
+        for name in ("user_ids", "movie_ids", "seen_indptr", "seen_indices", "popular_movie_ids", "popular_counts"):
+            assert model[name].tolist() == expected[name].tolist()
+        assert out_of_core["metrics"]["matrix"] == in_memory["metrics"]["matrix"]
+
+    def test_train_model_skipped_when_ratings_unchanged(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test auto mode keeps the latest model when neither ratings nor parameters changed"""
+        from server.services.rating_service import create_rating
+        first = train_recommendation_model(test_session)
+        assert first["ratings_source"] == "full"
+
+        skipped = train_recommendation_model(test_session)
+        assert skipped["training_mode"] == "skipped"
+        assert skipped["model_version"] == first["model_version"]
+
+        assert train_recommendation_model(test_session, factor_dtype="float32")["training_mode"] != "skipped"
+
+        create_rating(test_session, user_id=3, movie_id=1, rating=4.0)
+        retrained = train_recommendation_model(test_session, factor_dtype="float32")
+        assert retrained["training_mode"] != "skipped"
+        assert retrained["ratings_source"] == "delta"
+        assert retrained["total_ratings"] == 6
 
     def test_train_model_no_ratings(self, test_session, sample_users, sample_movies, clean_models_dir):
         """Test training fails gracefully with no ratings"""
         with pytest.raises(ValueError, match="No ratings available to train the model"):
             train_recommendation_model(test_session)
 
-    def test_train_model_updates_status(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
-        """Test that training updates global status"""
-        train_recommendation_model(test_session)
+    def test_train_model_reports_progress(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test that training reports each stage it starts"""
+        stages = []
+
+        train_recommendation_model(test_session, progress=lambda stage, fraction: stages.append((stage, fraction)))
+
+        assert [stage for stage, _ in stages] == ["extracting", "building_matrix", "factorizing", "indexing", "saving"]
+        fractions = [fraction for _, fraction in stages]
+        assert fractions == sorted(fractions)
+
+    def test_train_model_records_metrics(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test training returns stage timings, matrix shape and errors and saves them with the version"""
+        import json
+        from server.services.model_artifact import METRICS_FILE, artifact_dir
 
-        status = get_training_status()
-        assert status["status"] == "completed"
-        assert status["model_version"] is not None
-        assert status["total_ratings"] == 5
-        assert status["completed_at"] is not None
+        result = train_recommendation_model(test_session, engine="als")
+
+        metrics = result["metrics"]
+        assert [s["stage"] for s in metrics["stages"]] == ["extracting", "building_matrix", "factorizing", "indexing", "saving"]
+        assert all(s["seconds"] >= 0 and s["peak_rss_mb"] > 0 for s in metrics["stages"])
+        assert metrics["matrix"]["n_users"] == 3
+        assert metrics["matrix"]["n_movies"] == 3
+        assert metrics["matrix"]["density"] == pytest.approx(5 / 9)
+        assert len(metrics["iterations"]) >= 1
+        with open(artifact_dir(clean_models_dir, result["model_version"]) / METRICS_FILE) as f:
+            assert json.load(f) == metrics
 
     def test_train_model_multiple_times(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
         """Test training multiple times creates different versions"""
@@ -81,12 +177,23 @@ class TestTrainRecommendationModel:
         import time
         time.sleep(1)  # Ensure different timestamp
 
-        result2 = train_recommendation_model(test_session)
+        result2 = train_recommendation_model(test_session, mode="full")
         version2 = result2["model_version"]
 
         assert version1 != version2  # Different versions
-        assert (MODELS_DIR / f"recommendation_model_{version1}.pkl").exists()
-        assert (MODELS_DIR / f"recommendation_model_{version2}.pkl").exists()
+        assert (clean_models_dir / f"recommendation_model_{version1}" / "manifest.json").exists()
+        assert (clean_models_dir / f"recommendation_model_{version2}" / "manifest.json").exists()
+
+    def test_train_model_registers_version(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test training publishes the version to the registry with its metrics"""
+        result = train_recommendation_model(test_session)
+
+        versions = list_model_versions()
+
+        assert versions["latest"] == result["model_version"]
+        assert versions["versions"][0]["version"] == result["model_version"]
+        assert versions["versions"][0]["total_ratings"] == 5
+        assert versions["versions"][0]["metrics"]["matrix"]["n_ratings"] == 5
 
 
 class TestGetRecommendationsForUser:
@@ -97,8 +204,8 @@ class TestGetRecommendationsForUser:
         # Train model first
         train_recommendation_model(test_session)
 
-        # Get recommendations
-        result = get_recommendations_for_user(test_session, user_id=1, n=2)
+        # Get recommendations (user 3 rated one of the three movies)
+        result = get_recommendations_for_user(test_session, user_id=3, n=2)
 
         assert "movie_ids" in result
         assert "probabilities" in result
@@ -124,6 +231,92 @@ class TestGetRecommendationsForUser:
         assert len(result["movie_ids"]) <= 3  # May be less if not enough rated movies
         assert len(result["probabilities"]) == len(result["movie_ids"])
 
+    def test_new_user_popularity_served_from_model(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test the popularity fallback is sliced from the model, not queried"""
+        from server.models.ratings import RatingModel
+        from server.models.user import UserModel
+        test_session.add(UserModel(user_id=99))
+        test_session.commit()
+
+        train_recommendation_model(test_session)
+
+        # Ratings removed after training don't affect the stored ranking
+        test_session.query(RatingModel).delete()
+        test_session.commit()
+
+        result = get_recommendations_for_user(test_session, user_id=99, n=2)
+
+        # Movies 1 and 2 have two ratings each, movie 3 has one
+        assert result["movie_ids"] == [1, 2]
+        assert result["probabilities"] == [0.5, 0.5]
+
+    def test_new_user_popularity_depth(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test requests deeper than the stored ranking fall back to the database"""
+        from server.models.user import UserModel
+        test_session.add(UserModel(user_id=99))
+        test_session.commit()
+
+        train_recommendation_model(test_session, popularity_depth=1)
+
+        assert get_recommendations_for_user(test_session, user_id=99, n=1)["movie_ids"] == [1]
+        assert len(get_recommendations_for_user(test_session, user_id=99, n=3)["movie_ids"]) == 3
+
+    def test_new_user_folded_in_from_ratings(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test a user who rated movies after training gets personalized results"""
+        from server.models.user import UserModel
+        from server.services.rating_service import create_rating
+        test_session.add(UserModel(user_id=99))
+        test_session.commit()
+
+        train_recommendation_model(test_session)
+        create_rating(test_session, user_id=99, movie_id=1, rating=5.0)
+
+        with patch("server.services.recommendation_service._get_popular_movies") as mock_popular:
+            result = get_recommendations_for_user(test_session, user_id=99, n=3)
+
+        mock_popular.assert_not_called()
+        assert 1 not in result["movie_ids"]
+        assert set(result["movie_ids"]) <= {2, 3}
+
+    def test_folded_in_vector_cached_until_new_rating(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test the folded-in vector is reused and recomputed after a new rating"""
+        from server.models.user import UserModel
+        from server.services.rating_service import create_rating
+        test_session.add(UserModel(user_id=99))
+        test_session.commit()
+
+        train_recommendation_model(test_session)
+        create_rating(test_session, user_id=99, movie_id=1, rating=5.0)
+
+        with patch("server.services.recommendation_service.fold_in_user", wraps=fold_in_user) as mock_fold:
+            get_recommendations_for_user(test_session, user_id=99, n=3)
+            get_recommendations_for_user(test_session, user_id=99, n=3)
+            assert mock_fold.call_count == 1
+
+            create_rating(test_session, user_id=99, movie_id=2, rating=4.0)
+            result = get_recommendations_for_user(test_session, user_id=99, n=3)
+            assert mock_fold.call_count == 2
+
+        assert result["movie_ids"] == [3]
+
+    def test_folded_in_vector_recomputed_after_rating_in_other_worker(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test a rating written by another process, which can't invalidate this cache, is still seen"""
+        from datetime import datetime
+        from server.models.ratings import RatingModel
+        from server.models.user import UserModel
+        test_session.add(UserModel(user_id=99))
+        test_session.commit()
+        train_recommendation_model(test_session)
+        test_session.add(RatingModel(user_id=99, movie_id=1, rating=5.0, timestamp=datetime.now()))
+        test_session.commit()
+        get_recommendations_for_user(test_session, user_id=99, n=3)
+
+        test_session.add(RatingModel(user_id=99, movie_id=2, rating=4.0, timestamp=datetime.now()))
+        test_session.commit()
+        result = get_recommendations_for_user(test_session, user_id=99, n=3)
+
+        assert result["movie_ids"] == [3]
+
     def test_get_recommendations_user_not_found(self, test_session, clean_models_dir):
         """Test error when user doesn't exist"""
         with pytest.raises(ValueError, match="User with ID 999 not found"):
@@ -163,30 +356,162 @@ class TestGetRecommendationsForUser:
             assert probs[i] >= probs[i + 1]
 
 
-class TestGetTrainingStatus:
-    """Test training status retrieval"""
+    def test_recommendations_exclude_rated_movies(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test that movies the user already rated are not recommended"""
+        train_recommendation_model(test_session)
+
+        result = get_recommendations_for_user(test_session, user_id=1, n=3)
+
+        # User 1 rated movies 1 and 2
+        assert result["movie_ids"] == [3]
+        assert result["probabilities"] == [1.0]
+
+    def test_recommendations_include_rated_movies_when_requested(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test that exclusion can be turned off"""
+        train_recommendation_model(test_session)
+
+        result = get_recommendations_for_user(test_session, user_id=1, n=3, exclude_rated=False)
+
+        assert sorted(result["movie_ids"]) == [1, 2, 3]
+
+    def test_recommendations_exclude_ratings_after_training(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test that ratings written after training are excluded without retraining"""
+        from server.services.rating_service import create_rating
+        train_recommendation_model(test_session)
+
+        create_rating(test_session, user_id=3, movie_id=1, rating=4.0)
+        result = get_recommendations_for_user(test_session, user_id=3, n=3)
+
+        # User 3 rated movie 2 before training and movie 1 after
+        assert result["movie_ids"] == [3]
+
+    def test_loading_model_prunes_recent_ratings(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test a model published by another process drops the recent ratings it includes"""
+        from datetime import datetime, timedelta
+        from server.services.seen_index import recent_ratings
+        train_recommendation_model(test_session)
+        recent_ratings.add(3, 1, rated_at=datetime.now() - timedelta(hours=1))
+        recent_ratings.add(3, 4)
+        model_holder.clear()
 
-    def test_get_status_idle(self, clean_models_dir):
-        """Test status when no training has occurred"""
-        from server.services.recommendation_service import training_status
-        # Reset to idle state
-        training_status["status"] = "idle"
-        training_status["started_at"] = None
-        training_status["completed_at"] = None
-        training_status["model_version"] = None
-        training_status["total_ratings"] = None
-        training_status["error"] = None
+        model_holder.get()
 
-        status = get_training_status()
+        assert recent_ratings.movie_ids_for(3) == [4]
+
+    def test_recommendations_from_top_k_table(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test precomputed recommendations match live scoring"""
+        train_recommendation_model(test_session)
+        live = get_recommendations_for_user(test_session, user_id=3, n=2)
+
+        train_recommendation_model(test_session, precompute_top_k=2)
+        with patch("server.services.recommendation_service.recommend_for_row") as mock_live:
+            precomputed = get_recommendations_for_user(test_session, user_id=3, n=2)
+
+        mock_live.assert_not_called()
+        assert precomputed["movie_ids"] == live["movie_ids"]
+
+    def test_recommendations_served_from_memory(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test that the trained model is not loaded again per request"""
+        train_recommendation_model(test_session)
+
+        with patch.object(model_holder, "load") as mock_load:
+            get_recommendations_for_user(test_session, user_id=1, n=2)
+            get_recommendations_for_user(test_session, user_id=2, n=2)
+
+        mock_load.assert_not_called()
+
+    def test_model_info_after_training(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test that a newly trained model is reported as served"""
+        result = train_recommendation_model(test_session)
+
+        info = get_model_info()
+
+        assert info["loaded"] is True
+        assert info["model_version"] == result["model_version"]
+        assert info["loaded_at"] is not None
+
+
+class TestGetRecommendationsForUsers:
+    """Test batch recommendation retrieval service"""
+
+    def test_batch_matches_single_user(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test batch results equal the single-user results"""
+        train_recommendation_model(test_session)
 
-        assert status["status"] == "idle"
-        assert status["model_version"] is None
-        assert status["total_ratings"] is None
+        result = get_recommendations_for_users(test_session, [1, 2, 3], n=2)
 
-    def test_get_status_returns_copy(self):
-        """Test that status returns a copy, not reference"""
-        status1 = get_training_status()
-        status2 = get_training_status()
+        assert [r["user_id"] for r in result["recommendations"]] == [1, 2, 3]
+        for rec in result["recommendations"]:
+            single = get_recommendations_for_user(test_session, rec["user_id"], n=2)
+            assert rec["movie_ids"] == single["movie_ids"]
+        assert result["not_found_user_ids"] == []
 
-        assert status1 is not status2  # Different objects
-        assert status1 == status2  # Same content
+    def test_batch_new_user_gets_popular_movies(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test users not in the model get the popular movies fallback"""
+        from server.models.user import UserModel
+        test_session.add(UserModel(user_id=99))
+        test_session.commit()
+
+        train_recommendation_model(test_session)
+
+        result = get_recommendations_for_users(test_session, [99, 1], n=3)
+
+        new_user = result["recommendations"][0]
+        assert new_user["user_id"] == 99
+        assert new_user == {"user_id": 99, **get_recommendations_for_user(test_session, 99, n=3)}
+
+    def test_batch_folds_in_new_users(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test batch results for users rated after training match single requests"""
+        from server.models.user import UserModel
+        from server.services.rating_service import create_rating
+        test_session.add(UserModel(user_id=99))
+        test_session.commit()
+
+        train_recommendation_model(test_session)
+        create_rating(test_session, user_id=99, movie_id=3, rating=4.0)
+
+        result = get_recommendations_for_users(test_session, [99], n=3)
+
+        assert result["recommendations"][0] == {"user_id": 99, **get_recommendations_for_user(test_session, 99, n=3)}
+        assert 3 not in result["recommendations"][0]["movie_ids"]
+
+    def test_batch_reports_unknown_users(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test users that don't exist are reported instead of failing the batch"""
+        train_recommendation_model(test_session)
+
+        result = get_recommendations_for_users(test_session, [1, 999, 1], n=2)
+
+        assert [r["user_id"] for r in result["recommendations"]] == [1]
+        assert result["not_found_user_ids"] == [999]
+
+    def test_batch_no_model(self, test_session, sample_users, clean_models_dir):
+        """Test error when model hasn't been trained"""
+        with pytest.raises(ValueError, match="No trained model found"):
+            get_recommendations_for_users(test_session, [1, 2], n=10)
+
+
+class TestGetSimilarMovies:
+    """Test similar movies retrieval service"""
+
+    def test_similar_movies(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test similar movies exclude the movie itself"""
+        result = train_recommendation_model(test_session)
+
+        similar = get_similar_movies(movie_id=1, n=2)
+
+        assert sorted(similar["movie_ids"]) == [2, 3]
+        assert len(similar["similarities"]) == 2
+        assert similar["similarities"][0] >= similar["similarities"][1]
+        assert similar["model_version"] == result["model_version"]
+
+    def test_similar_movies_unknown_movie(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test error when the movie is not in the model"""
+        train_recommendation_model(test_session)
+
+        with pytest.raises(ValueError, match="Movie with ID 999 not found"):
+            get_similar_movies(movie_id=999)
+
+    def test_similar_movies_no_model(self, clean_models_dir):
+        """Test error when model hasn't been trained"""
+        with pytest.raises(ValueError, match="No trained model found"):
+            get_similar_movies(movie_id=1)
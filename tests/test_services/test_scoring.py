@@ -0,0 +1,200 @@
+"""
+Service-level tests for vectorized recommendation scoring
+Tests top-N selection and id lookups without a database
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+from server.services.scoring import (
+    normalize_scores,
+    prepare_model_data,
+    recommend_for_row,
+    recommend_for_rows,
+    score_rows,
+    top_n_indices,
+)
+
+
+def make_model_data():
+    """Small model with a known score ordering per user"""
+    return {
+        "user_features": np.array([[1.0, 0.0], [0.0, 1.0]]),
+        "item_features": np.array([[0.1, 0.9, 0.5, 0.3], [0.8, 0.2, 0.4, 0.6]]),
+        "user_ids": [10, 20],
+        "movie_ids": [100, 200, 300, 400],
+    }
+
+
+class TestTopNIndices:
+    """Test partial top-N selection"""
+
+    def test_returns_highest_first(self):
+        """Test that indices are ordered by descending score"""
+        scores = np.array([0.2, 0.9, 0.1, 0.5, 0.7])
+
+        assert top_n_indices(scores, 3).tolist() == [1, 4, 3]
+
+    def test_n_larger_than_scores(self):
+        """Test that n is capped at the number of scores"""
+        scores = np.array([0.2, 0.9, 0.1])
+
+        assert top_n_indices(scores, 10).tolist() == [1, 0, 2]
+
+    def test_selects_per_row(self):
+        """Test selection on a score matrix is done row by row"""
+        scores = np.array([[0.2, 0.9, 0.1], [0.8, 0.3, 0.5]])
+
+        assert top_n_indices(scores, 2).tolist() == [[1, 0], [0, 2]]
+
+    def test_matches_full_sort(self):
+        """Test agreement with a full sort on random data"""
+        scores = np.random.default_rng(0).random(1000)
+
+        expected = np.argsort(-scores)[:25]
+        assert top_n_indices(scores, 25).tolist() == expected.tolist()
+
+
+class TestNormalizeScores:
+    """Test probability normalization"""
+
+    def test_sums_to_one(self):
+        """Test normalized scores sum to 1"""
+        probabilities = normalize_scores(np.array([2.0, 1.0, 1.0]))
+
+        assert probabilities.tolist() == [0.5, 0.25, 0.25]
+
+    def test_normalizes_each_row(self):
+        """Test rows of a score matrix are normalized independently"""
+        probabilities = normalize_scores(np.array([[1.0, 3.0], [0.0, 0.0]]))
+
+        assert probabilities.tolist() == [[0.25, 0.75], [0.5, 0.5]]
+
+    def test_zero_scores_are_uniform(self):
+        """Test zero scores fall back to a uniform distribution"""
+        probabilities = normalize_scores(np.zeros(4))
+
+        assert probabilities.tolist() == [0.25] * 4
+
+
+class TestRecommendForRow:
+    """Test scoring a single trained user"""
+
+    def test_prepare_builds_user_index(self):
+        """Test id -> row mapping for trained users"""
+        prepared = prepare_model_data(make_model_data())
+
+        assert prepared["user_index"] == {10: 0, 20: 1}
+        assert prepared["movie_id_array"].tolist() == [100, 200, 300, 400]
+
+    def test_recommends_top_movies(self):
+        """Test top-N movie ids follow predicted scores"""
+        prepared = prepare_model_data(make_model_data())
+
+        result = recommend_for_row(prepared, prepared["user_index"][10], n=2)
+
+        assert result["movie_ids"] == [200, 300]
+        assert abs(sum(result["probabilities"]) - 1.0) < 1e-9
+        assert all(isinstance(mid, int) for mid in result["movie_ids"])
+        assert all(isinstance(p, float) for p in result["probabilities"])
+
+    def test_recommends_for_second_user(self):
+        """Test rows are looked up per user"""
+        prepared = prepare_model_data(make_model_data())
+
+        result = recommend_for_row(prepared, prepared["user_index"][20], n=4)
+
+        assert result["movie_ids"] == [100, 400, 300, 200]
+
+
+class TestExcludeRated:
+    """Test masking of already-rated movies"""
+
+    def make_prepared(self):
+        """Model where user 10 rated movie 200 (column 1)"""
+        return prepare_model_data({
+            **make_model_data(),
+            "seen_indptr": np.array([0, 1, 1]),
+            "seen_indices": np.array([1], dtype=np.int32),
+        })
+
+    def test_skips_rated_movies(self):
+        """Test rated movies are not recommended"""
+        prepared = self.make_prepared()
+
+        result = recommend_for_row(prepared, 0, n=2)
+
+        assert result["movie_ids"] == [300, 400]
+
+    def test_skips_extra_movie_ids(self):
+        """Test movies rated after training are not recommended"""
+        prepared = self.make_prepared()
+
+        result = recommend_for_row(prepared, 0, n=2, exclude_movie_ids=[300])
+
+        assert result["movie_ids"] == [400, 100]
+
+    def test_returns_fewer_when_all_rated(self):
+        """Test fewer than N movies when not enough unrated remain"""
+        prepared = self.make_prepared()
+
+        result = recommend_for_row(prepared, 0, n=4, exclude_movie_ids=[100, 300])
+
+        assert result["movie_ids"] == [400]
+        assert result["probabilities"] == [1.0]
+
+    def test_batch_skips_rated_movies(self):
+        """Test batch scoring masks each user's own rated movies"""
+        prepared = self.make_prepared()
+
+        results = recommend_for_rows(prepared, [0, 1], n=2, exclude_movie_ids=[[], [100]])
+
+        assert results[0]["movie_ids"] == [300, 400]
+        assert results[1]["movie_ids"] == [400, 300]
+
+    def test_rated_movies_kept_when_not_excluding(self):
+        """Test exclusion can be turned off"""
+        prepared = self.make_prepared()
+
+        result = recommend_for_row(prepared, 0, n=2, exclude_rated=False)
+
+        assert result["movie_ids"] == [200, 300]
+
+
+class TestRecommendForRows:
+    """Test batch scoring of many trained users"""
+
+    def test_matches_single_user_scoring(self):
+        """Test batch results equal per-user results"""
+        rng = np.random.default_rng(1)
+        prepared = prepare_model_data({
+            "user_features": rng.random((50, 5)),
+            "item_features": rng.random((5, 200)),
+            "user_ids": list(range(1, 51)),
+            "movie_ids": list(range(1000, 1200)),
+        })
+        rows = [3, 0, 49, 17]
+
+        batch = recommend_for_rows(prepared, rows, n=10, block_bytes=3 * 200 * 16)
+
+        assert len(batch) == len(rows)
+        for row, result in zip(rows, batch):
+            single = recommend_for_row(prepared, row, n=10)
+            assert result["movie_ids"] == single["movie_ids"]
+            assert np.allclose(result["probabilities"], single["probabilities"])
+
+    def test_blocks_sized_by_bytes(self):
+        """Test the users per block shrink as the catalogue grows"""
+        prepared = prepare_model_data(make_model_data())
+        n_movies = len(prepared["movie_id_array"])
+
+        with patch("server.services.scoring.score_rows", wraps=score_rows) as mock_score:
+            recommend_for_rows(prepared, [0, 1, 0, 1, 0], n=1, block_bytes=2 * n_movies * 16)
+
+        assert [len(call.args[1]) for call in mock_score.call_args_list] == [2, 2, 1]
+
+    def test_empty_rows(self):
+        """Test no users yields no results"""
+        prepared = prepare_model_data(make_model_data())
+
+        assert recommend_for_rows(prepared, [], n=2) == []
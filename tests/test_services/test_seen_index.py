@@ -0,0 +1,82 @@
+"""
+Service-level tests for the seen-movie index
+Tests the CSR index built at training time and the recent ratings delta
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+from server.services.seen_index import RecentRatings, build_seen_index, seen_positions
+
+
+class TestBuildSeenIndex:
+    """Test CSR index of rated movie columns"""
+
+    def test_builds_rows_in_order(self):
+        """Test each user row lists its rated columns"""
+        index = build_seen_index(
+            user_rows=np.array([2, 0, 0, 2, 2]),
+            movie_cols=np.array([4, 3, 1, 0, 2]),
+            n_users=3,
+        )
+
+        indptr, indices = index["seen_indptr"], index["seen_indices"]
+        assert indptr.tolist() == [0, 2, 2, 5]
+        assert indices[indptr[0]:indptr[1]].tolist() == [1, 3]
+        assert indices[indptr[1]:indptr[2]].tolist() == []
+        assert indices[indptr[2]:indptr[3]].tolist() == [0, 2, 4]
+
+    def test_seen_positions_for_several_rows(self):
+        """Test gathering (position, column) pairs for a block of users"""
+        model_data = build_seen_index(
+            user_rows=np.array([0, 0, 1, 2]),
+            movie_cols=np.array([1, 3, 2, 0]),
+            n_users=3,
+        )
+
+        positions, columns = seen_positions(model_data, np.array([2, 0]))
+
+        assert positions.tolist() == [0, 1, 1]
+        assert columns.tolist() == [0, 1, 3]
+
+    def test_seen_positions_without_index(self):
+        """Test models trained without a seen index mask nothing"""
+        positions, columns = seen_positions({}, np.array([0, 1]))
+
+        assert len(positions) == 0
+        assert len(columns) == 0
+
+
+class TestRecentRatings:
+    """Test the in-process delta of ratings written after training"""
+
+    def test_add_and_lookup(self):
+        """Test recorded ratings are returned per user"""
+        recent = RecentRatings()
+        recent.add(1, 10)
+        recent.add(1, 20)
+        recent.add(2, 30)
+
+        assert sorted(recent.movie_ids_for(1)) == [10, 20]
+        assert recent.movie_ids_for(3) == []
+
+    def test_lookup_since_model_snapshot(self):
+        """Test ratings older than the model snapshot are ignored"""
+        recent = RecentRatings()
+        snapshot = datetime.now()
+        recent.add(1, 10, rated_at=snapshot - timedelta(minutes=1))
+        recent.add(1, 20, rated_at=snapshot + timedelta(minutes=1))
+
+        assert recent.movie_ids_for(1, since=snapshot) == [20]
+
+    def test_prune_drops_old_entries(self):
+        """Test pruning removes entries covered by a new model"""
+        recent = RecentRatings()
+        snapshot = datetime.now()
+        recent.add(1, 10, rated_at=snapshot - timedelta(minutes=1))
+        recent.add(2, 20, rated_at=snapshot + timedelta(minutes=1))
+
+        recent.prune(before=snapshot)
+
+        assert recent.movie_ids_for(1) == []
+        assert recent.movie_ids_for(2) == [20]
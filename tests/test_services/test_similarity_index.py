@@ -0,0 +1,75 @@
+"""
+Service-level tests for the movie similarity index
+Tests exact and IVF nearest-neighbour search over item factors
+"""
+
+import numpy as np
+from server.services.similarity_index import build_similarity_index, find_similar
+
+
+def clustered_item_features(n_items=3000, n_components=8, n_clusters=30, seed=3):
+    """Non-negative item factors grouped around a few directions (k x items)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.random((n_clusters, n_components))
+    labels = rng.integers(0, n_clusters, size=n_items)
+    items = centers[labels] + 0.05 * rng.random((n_items, n_components))
+    return items.T
+
+
+class TestExactIndex:
+    """Test exact cosine search for small catalogs"""
+
+    def test_small_catalog_is_exact(self):
+        """Test small catalogs get an exact index"""
+        index = build_similarity_index(clustered_item_features(n_items=100))
+
+        assert index["sim_kind"] == "exact"
+        assert np.allclose(np.linalg.norm(index["sim_vectors"], axis=1), 1.0)
+
+    def test_finds_most_similar_excluding_itself(self):
+        """Test neighbours are ordered by cosine similarity"""
+        item_features = np.array([[1.0, 0.9, 0.0, 0.5], [0.0, 0.1, 1.0, 0.5]])
+        index = build_similarity_index(item_features)
+
+        items, similarities = find_similar(index, 0, n=3)
+
+        assert items.tolist() == [1, 3, 2]
+        assert similarities[0] > similarities[1] > similarities[2]
+
+    def test_blocked_scan_matches_full_scan(self, monkeypatch):
+        """Test scanning in blocks gives the same neighbours"""
+        item_features = clustered_item_features(n_items=500)
+        index = build_similarity_index(item_features)
+        expected, _ = find_similar(index, 7, n=10)
+
+        monkeypatch.setattr("server.services.similarity_index.EXACT_BLOCK_SIZE", 37)
+        actual, _ = find_similar(index, 7, n=10)
+
+        assert actual.tolist() == expected.tolist()
+
+
+class TestIVFIndex:
+    """Test approximate search for large catalogs"""
+
+    def test_large_catalog_is_ivf(self):
+        """Test large catalogs get IVF lists covering every movie once"""
+        index = build_similarity_index(clustered_item_features(), exact_max_items=1000)
+
+        assert index["sim_kind"] == "ivf"
+        assert index["sim_list_indptr"][-1] == 3000
+        assert sorted(index["sim_list_items"].tolist()) == list(range(3000))
+
+    def test_recall_against_exact(self):
+        """Test IVF neighbours mostly agree with exact search"""
+        item_features = clustered_item_features()
+        exact = build_similarity_index(item_features, exact_max_items=10_000)
+        ivf = build_similarity_index(item_features, exact_max_items=1000)
+
+        hits = 0
+        for item in range(0, 3000, 100):
+            expected, _ = find_similar(exact, item, n=10)
+            actual, _ = find_similar(ivf, item, n=10)
+            assert item not in actual.tolist()
+            hits += len(set(expected.tolist()) & set(actual.tolist()))
+
+        assert hits / (30 * 10) >= 0.9
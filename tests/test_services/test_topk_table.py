@@ -0,0 +1,93 @@
+"""
+Service-level tests for the precomputed top-K recommendation table
+Tests materialization in blocks and point lookups with live-scoring fallback
+"""
+
+import numpy as np
+from server.services.scoring import prepare_model_data, recommend_for_row
+from server.services.seen_index import build_seen_index
+from server.services.topk_table import load_top_k, lookup_top_k, materialize_top_k
+
+
+def make_model_data(n_users=30, n_movies=12):
+    """Random model where every user rated their first two movie columns"""
+    rng = np.random.default_rng(7)
+    user_rows = np.repeat(np.arange(n_users), 2)
+    movie_cols = np.tile([0, 1], n_users)
+    return {
+        "user_features": rng.random((n_users, 4)),
+        "item_features": rng.random((4, n_movies)),
+        "user_ids": list(range(1, n_users + 1)),
+        "movie_ids": list(range(100, 100 + n_movies)),
+        **build_seen_index(user_rows, movie_cols, n_users),
+    }
+
+
+def materialized(tmp_path, model_data, k, block_bytes=200):
+    """Materialize a top-K table and return prepared model data using it"""
+    paths = (tmp_path / "topk_movies.npy", tmp_path / "topk_scores.npy")
+    info = materialize_top_k(model_data, k, *paths, block_bytes=block_bytes)
+    prepared = prepare_model_data(model_data)
+    prepared["topk_table"] = load_top_k(*paths)
+    return prepared, info
+
+
+class TestMaterializeTopK:
+    """Test precomputing top-K per user"""
+
+    def test_matches_live_scoring(self, tmp_path):
+        """Test stored top-K equals live scoring for every user"""
+        model_data = make_model_data()
+        prepared, info = materialized(tmp_path, model_data, k=5)
+
+        assert info["k"] == 5
+        assert info["bytes"] > 0
+        assert info["seconds"] >= 0
+        for row in range(30):
+            expected = recommend_for_row(prepared, row, n=5)
+            actual = lookup_top_k(prepared, row, n=5)
+            assert actual["movie_ids"] == expected["movie_ids"]
+            assert np.allclose(actual["probabilities"], expected["probabilities"], atol=1e-6)
+
+    def test_pads_when_few_unrated_movies(self, tmp_path):
+        """Test rows hold fewer movies when not enough unrated ones exist"""
+        model_data = make_model_data(n_movies=4)
+        prepared, _ = materialized(tmp_path, model_data, k=4)
+
+        top_movies, _ = prepared["topk_table"]
+        assert (top_movies[:, 2:] == -1).all()
+
+        result = lookup_top_k(prepared, 0, n=4)
+        assert sorted(result["movie_ids"]) == [102, 103]
+
+
+class TestLookupTopK:
+    """Test point lookups in the materialized table"""
+
+    def test_no_table(self):
+        """Test lookup declines when no table was materialized"""
+        prepared = prepare_model_data(make_model_data())
+
+        assert lookup_top_k(prepared, 0, n=5) is None
+
+    def test_n_above_k(self, tmp_path):
+        """Test lookup declines when more movies are requested than stored"""
+        prepared, _ = materialized(tmp_path, make_model_data(), k=3)
+
+        assert lookup_top_k(prepared, 0, n=4) is None
+
+    def test_drops_recently_rated(self, tmp_path):
+        """Test movies rated after training are dropped from the stored list"""
+        prepared, _ = materialized(tmp_path, make_model_data(), k=5)
+        stored = lookup_top_k(prepared, 0, n=5)["movie_ids"]
+
+        result = lookup_top_k(prepared, 0, n=3, exclude_movie_ids=[stored[0]])
+
+        assert result["movie_ids"] == stored[1:4]
+
+    def test_falls_back_when_too_few_left(self, tmp_path):
+        """Test lookup declines when dropping leaves fewer than n of a full row"""
+        prepared, _ = materialized(tmp_path, make_model_data(), k=3)
+        stored = lookup_top_k(prepared, 0, n=3)["movie_ids"]
+
+        assert lookup_top_k(prepared, 0, n=3, exclude_movie_ids=[stored[0]]) is None
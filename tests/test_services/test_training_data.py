@@ -0,0 +1,117 @@
+"""
+Service-level tests for building training data
+Tests streaming extraction of ratings and the sparse user-item rating matrix
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from sqlalchemy import func
+from server.models.ratings import RatingModel
+from server.services.training_data import build_rating_matrix, extract_ratings, scan_ratings
+
+
+class TestBuildRatingMatrix:
+    """Test the sparse user x movie matrix"""
+
+    def test_matches_dense_pivot_table(self):
+        """Test the CSR matrix equals the dense pivot table it replaces"""
+        df = pd.DataFrame({
+            "user_id": [7, 3, 7, 5, 3],
+            "movie_id": [20, 10, 30, 20, 30],
+            "rating": [4.5, 3.0, 2.0, 5.0, 1.5],
+        })
+
+        result = build_rating_matrix(df["user_id"], df["movie_id"], df["rating"])
+        pivot = df.pivot_table(index="user_id", columns="movie_id", values="rating", fill_value=0)
+
+        assert sparse.isspmatrix_csr(result["matrix"])
+        assert result["matrix"].nnz == 5
+        np.testing.assert_array_equal(result["matrix"].toarray(), pivot.to_numpy())
+        assert result["user_ids"].tolist() == pivot.index.tolist()
+        assert result["movie_ids"].tolist() == pivot.columns.tolist()
+
+    def test_rows_and_columns_of_each_rating(self):
+        """Test every rating's row/column code points back to its ids"""
+        user_ids, movie_ids = [7, 3, 7, 5], [20, 10, 30, 20]
+
+        result = build_rating_matrix(user_ids, movie_ids, [1.0, 2.0, 3.0, 4.0])
+
+        assert result["user_ids"][result["user_rows"]].tolist() == user_ids
+        assert result["movie_ids"][result["movie_cols"]].tolist() == movie_ids
+
+
+class TestScanRatings:
+    """Test the streamed summary of rating arrays"""
+
+    def test_matches_rating_matrix(self):
+        """Test chunked counts and sums equal those of the full matrix"""
+        rng = np.random.default_rng(3)
+        user_ids = rng.integers(1, 50, size=500)
+        movie_ids = rng.integers(100, 140, size=500)
+        ratings = rng.integers(1, 11, size=500) / 2
+
+        scan = scan_ratings(user_ids, movie_ids, ratings, chunk_rows=64)
+        full = build_rating_matrix(user_ids, movie_ids, ratings)
+
+        np.testing.assert_array_equal(scan["user_ids"], full["user_ids"])
+        np.testing.assert_array_equal(scan["movie_ids"], full["movie_ids"])
+        np.testing.assert_array_equal(scan["user_counts"], np.bincount(full["user_rows"]))
+        np.testing.assert_array_equal(scan["movie_counts"], np.bincount(full["movie_cols"]))
+        assert scan["n_ratings"] == 500
+        assert scan["rating_sum"] == pytest.approx(ratings.sum())
+        assert scan["rating_sq_sum"] == pytest.approx(np.dot(ratings, ratings))
+
+    def test_no_ratings(self):
+        """Test empty arrays give empty ids and counts"""
+        scan = scan_ratings(np.empty(0), np.empty(0), np.empty(0))
+
+        assert len(scan["user_ids"]) == len(scan["movie_counts"]) == 0
+        assert scan["n_ratings"] == 0
+
+
+class TestExtractRatings:
+    """Test streaming ratings into NumPy arrays"""
+
+    def test_extracts_all_ratings(self, test_session, sample_ratings):
+        """Test every rating is read into typed arrays"""
+        result = extract_ratings(test_session, chunk_rows=2)
+
+        assert result["user_ids"].dtype == np.int32
+        assert result["movie_ids"].dtype == np.int32
+        assert result["ratings"].dtype == np.float32
+        triples = sorted(zip(result["user_ids"].tolist(), result["movie_ids"].tolist(), result["ratings"].tolist()))
+        assert triples == [(1, 1, 4.5), (1, 2, 3.0), (2, 1, 5.0), (2, 3, 4.0), (3, 2, 2.5)]
+
+        stats = result["stats"]
+        assert stats["rows"] == 5
+        assert stats["seconds"] >= 0
+        assert stats["peak_rss_mb"] > 0
+
+    def test_extracts_timestamps(self, test_session, sample_ratings):
+        """Test timestamps are read as datetime64 when requested"""
+        result = extract_ratings(test_session, chunk_rows=2, include_timestamps=True)
+
+        assert result["timestamps"].dtype == np.dtype("datetime64[us]")
+        expected = sorted(np.datetime64(r.timestamp, "us") for r in sample_ratings)
+        assert sorted(result["timestamps"].tolist()) == [t.item() for t in expected]
+        assert "timestamps" not in extract_ratings(test_session)
+
+    def test_no_ratings(self, test_session):
+        """Test an empty ratings table gives empty arrays"""
+        result = extract_ratings(test_session)
+
+        assert result["stats"]["rows"] == 0
+        assert result["ratings"].size == 0
+
+    def test_ratings_added_after_count(self, test_session, sample_ratings):
+        """Test arrays grow when more rows stream in than were counted"""
+        with patch("server.services.training_data.func.count") as mock_count:
+            mock_count.return_value = func.min(RatingModel.rating_id)
+            result = extract_ratings(test_session, chunk_rows=2)
+
+        assert result["stats"]["rows"] == 5
+        assert sorted(result["user_ids"].tolist()) == [1, 1, 2, 2, 3]
@@ -0,0 +1,183 @@
+"""
+Service-level tests for the pluggable training engines
+Tests the ALS engines against NMF on a small synthetic rating matrix
+"""
+
+import numpy as np
+import pytest
+from scipy import sparse
+from server.services.seen_index import build_seen_index
+from server.services.training_data import scan_ratings
+from server.services.training_engines import (
+    ALSEngine,
+    NMFEngine,
+    OutOfCoreALSEngine,
+    get_training_engine,
+    reconstruction_error,
+)
+
+
+def make_matrix(n_users=300, n_movies=120, density=0.1, k=5):
+    """Sparse ratings sampled from a low-rank non-negative model"""
+    rng = np.random.default_rng(11)
+    dense = rng.random((n_users, k)) @ rng.random((k, n_movies))
+    mask = rng.random((n_users, n_movies)) < density
+    return sparse.csr_matrix(np.where(mask, 1 + 4 * dense / dense.max(), 0.0))
+
+
+class TestALSEngine:
+    """Test the block-parallel alternating least squares engine"""
+
+    def test_factors_shape_and_non_negative(self):
+        """Test ALS returns non-negative factors shaped like NMF's"""
+        matrix = make_matrix()
+
+        fit = ALSEngine().fit(matrix, 6)
+
+        assert fit["user_features"].shape == (300, 6)
+        assert fit["item_features"].shape == (6, 120)
+        assert fit["user_features"].min() >= 0
+        assert fit["item_features"].min() >= 0
+
+    def test_error_decreases_and_is_reported(self):
+        """Test the tracked error matches a dense recomputation and decreases"""
+        matrix = make_matrix()
+        errors = []
+
+        fit = ALSEngine().fit(matrix, 6, on_iteration=lambda n, error: errors.append(error))
+
+        dense_error = np.linalg.norm(matrix.toarray() - fit["user_features"] @ fit["item_features"])
+        assert fit["reconstruction_err"] == pytest.approx(dense_error, rel=1e-6)
+        assert len(errors) == fit["n_iter"]
+        assert errors[-1] < errors[0]
+
+    def test_error_close_to_nmf(self):
+        """Test ALS reaches a reconstruction error close to sklearn NMF"""
+        matrix = make_matrix()
+
+        als = ALSEngine().fit(matrix, 6)
+        nmf = NMFEngine().fit(matrix, 6)
+
+        assert als["reconstruction_err"] <= nmf["reconstruction_err"] * 1.1
+
+    def test_block_size_and_threads_do_not_change_result(self):
+        """Test splitting rows into blocks across threads gives the same factors"""
+        matrix = make_matrix()
+
+        single = ALSEngine(block_rows=10_000, n_threads=1).fit(matrix, 4, max_iter=5)
+        blocked = ALSEngine(block_rows=7, n_threads=4).fit(matrix, 4, max_iter=5)
+
+        np.testing.assert_allclose(blocked["user_features"], single["user_features"])
+        np.testing.assert_allclose(blocked["item_features"], single["item_features"])
+
+    def test_warm_start_uses_init(self):
+        """Test a converged init needs only a few incremental iterations"""
+        matrix = make_matrix()
+        full = ALSEngine().fit(matrix, 4)
+
+        warm = ALSEngine().fit(matrix, 4, init=(full["user_features"], full["item_features"]))
+
+        assert warm["n_iter"] <= ALSEngine.incremental_max_iter
+        assert warm["reconstruction_err"] == pytest.approx(full["reconstruction_err"], rel=1e-3)
+
+
+class TestOutOfCoreALSEngine:
+    """Test ALS over on-disk blocks solved in worker processes"""
+
+    def test_matches_in_memory_als(self, tmp_path):
+        """Test a budget forcing many blocks gives the in-memory ALS result"""
+        matrix = make_matrix()
+        engine = OutOfCoreALSEngine(n_workers=2)
+        engine.memory_budget_mb = 0.05
+        engine.scratch_dir = tmp_path
+
+        out_of_core = engine.fit(matrix, 4, max_iter=5)
+        in_memory = ALSEngine().fit(matrix, 4, max_iter=5)
+
+        np.testing.assert_allclose(out_of_core["user_features"], in_memory["user_features"], atol=1e-8)
+        np.testing.assert_allclose(out_of_core["item_features"], in_memory["item_features"], atol=1e-8)
+        assert out_of_core["reconstruction_err"] == pytest.approx(in_memory["reconstruction_err"])
+        # Blocks are removed after training
+        assert list(tmp_path.iterdir()) == []
+
+    def test_partition_writes_row_and_column_blocks(self, tmp_path):
+        """Test the blocks written from rating arrays put R and R^T back together"""
+        matrix = make_matrix()
+        coo = matrix.tocoo()
+        user_ids, movie_ids = coo.row * 10 + 3, coo.col + 1000
+        ratings = {"user_ids": user_ids, "movie_ids": movie_ids, "ratings": coo.data}
+        engine = OutOfCoreALSEngine(n_workers=2)
+        engine.memory_budget_mb = 0.05
+
+        blocks = engine.partition_ratings(ratings, scan_ratings(user_ids, movie_ids, coo.data), tmp_path, 4, chunk_rows=500)
+
+        assert blocks["shape"] == matrix.shape
+        assert len(blocks["col_blocks"]) > 1
+        rows = sparse.vstack([sparse.load_npz(path) for _, _, path in blocks["row_blocks"]])
+        cols = sparse.vstack([sparse.load_npz(path) for _, _, path in blocks["col_blocks"]])
+        assert (rows != matrix).nnz == 0
+        assert (cols != matrix.T).nnz == 0
+        assert blocks["matrix_sq_norm"] == pytest.approx(matrix.multiply(matrix).sum())
+        assert blocks["matrix_mean"] == pytest.approx(matrix.mean())
+        # Only the finished blocks and the seen index are left
+        assert not list(tmp_path.glob("*.bin"))
+
+        seen_index = build_seen_index(coo.row, coo.col, matrix.shape[0])
+        np.testing.assert_array_equal(blocks["seen_index"]["seen_indptr"], seen_index["seen_indptr"])
+        np.testing.assert_array_equal(blocks["seen_index"]["seen_indices"], seen_index["seen_indices"])
+
+    def test_block_bounds_fit_budget(self):
+        """Test rows are split into consecutive blocks within each worker's share"""
+        engine = OutOfCoreALSEngine(n_workers=2)
+        engine.memory_budget_mb = 0.05
+        row_nnz = np.full(300, 12)
+
+        bounds = engine._block_bounds(row_nnz, n_components=4, n_fixed=120)
+
+        assert bounds[0] == 0 and bounds[-1] == 300
+        assert len(bounds) > 3
+        available = 0.05 * 1024 * 1024 / 2 - 120 * 4 * 8
+        assert np.all(np.diff(bounds) * (32 * 12 + 8 + 24 * 4) <= available)
+
+    def test_budget_too_small(self):
+        """Test a budget that can't hold the fixed factors is rejected"""
+        engine = OutOfCoreALSEngine(n_workers=4)
+        engine.memory_budget_mb = 0.001
+
+        with pytest.raises(ValueError, match="too small"):
+            engine.fit(make_matrix(), 4, max_iter=1)
+
+
+class TestTrainingEngines:
+    """Test the engine registry and shared helpers"""
+
+    def test_get_training_engine(self):
+        """Test engines are looked up by name"""
+        assert isinstance(get_training_engine("nmf"), NMFEngine)
+        assert isinstance(get_training_engine("als"), ALSEngine)
+
+    def test_get_training_engine_out_of_core_options(self, tmp_path):
+        """Test the memory budget and scratch directory are passed to the engine"""
+        engine = get_training_engine("als_ooc", memory_budget_mb=256, scratch_dir=tmp_path)
+        assert isinstance(engine, OutOfCoreALSEngine)
+        assert engine.memory_budget_mb == 256
+        assert engine.scratch_dir == tmp_path
+
+    def test_unsupported_engine(self):
+        """Test an unknown engine is rejected"""
+        with pytest.raises(ValueError, match="Unsupported training engine"):
+            get_training_engine("svd")
+
+    def test_reconstruction_error_without_product(self):
+        """Test the trace form equals the norm of the dense residual"""
+        matrix = make_matrix(n_users=40, n_movies=30)
+        rng = np.random.default_rng(2)
+        user_features, item_features = rng.random((40, 3)), rng.random((3, 30))
+        cross_term = float(np.sum((matrix @ item_features.T) * user_features))
+
+        error = reconstruction_error(
+            float(matrix.multiply(matrix).sum()), user_features, item_features, cross_term
+        )
+
+        dense_error = np.linalg.norm(matrix.toarray() - user_features @ item_features)
+        assert error == pytest.approx(dense_error, rel=1e-9)
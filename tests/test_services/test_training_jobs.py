@@ -0,0 +1,255 @@
+"""
+Service-level tests for the training job runner
+Tests the persisted job lifecycle, the single active job slot, progress
+reporting and cancellation
+"""
+
+import contextlib
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from server.models.training_jobs import TrainingJobModel
+from server.services import training_jobs
+from server.services.training_jobs import (
+    STALE_JOB_AFTER,
+    _Heartbeat,
+    cancel_training_job,
+    create_training_job,
+    get_training_job,
+    get_training_status,
+    list_training_jobs,
+    run_training_job,
+    submit_training_job,
+)
+
+
+def session_opener(session):
+    """Let run_training_job use the test session instead of PostgreSQL"""
+    return lambda: contextlib.nullcontext(session)
+
+
+def expire_and_replace(session, job_id):
+    """Let the job go stale and a new submission take over its slot, as another worker would"""
+    row = session.get(TrainingJobModel, job_id)
+    row.created_at = row.heartbeat_at = datetime.now() - STALE_JOB_AFTER - timedelta(minutes=1)
+    session.commit()
+    return create_training_job(session, {})
+
+
+class TestCreateTrainingJob:
+    """Test submitting jobs and the single active slot"""
+
+    def test_creates_queued_job(self, test_session):
+        """Test a new job is queued with its parameters"""
+        job = create_training_job(test_session, {"mode": "full"})
+
+        assert job["status"] == "queued"
+        assert job["params"] == {"mode": "full"}
+        assert job["progress"] == 0.0
+
+    def test_only_one_active_job(self, test_session):
+        """Test a second job is refused while one is queued"""
+        assert create_training_job(test_session, {}) is not None
+        assert create_training_job(test_session, {}) is None
+        assert len(list_training_jobs(test_session)) == 1
+
+    def test_new_job_after_previous_finished(self, test_session):
+        """Test the slot is released when a job finishes"""
+        job = create_training_job(test_session, {})
+        cancel_training_job(test_session, job["job_id"])
+
+        assert create_training_job(test_session, {}) is not None
+
+    def test_stale_job_releases_slot(self, test_session):
+        """Test a job that stopped reporting doesn't block new jobs forever"""
+        job = create_training_job(test_session, {})
+        row = test_session.get(TrainingJobModel, job["job_id"])
+        row.created_at = row.heartbeat_at = datetime.now() - STALE_JOB_AFTER - timedelta(minutes=1)
+        test_session.commit()
+
+        assert create_training_job(test_session, {}) is not None
+        assert get_training_job(test_session, job["job_id"])["status"] == "failed"
+
+
+class TestSubmitTrainingJob:
+    """Test handing jobs to the training process pool"""
+
+    def test_broken_pool_replaced(self, test_session, monkeypatch):
+        """Test a pool whose worker died is replaced and the job submitted to the new one"""
+        broken, fresh = MagicMock(), MagicMock()
+        broken.submit.side_effect = BrokenProcessPool()
+        monkeypatch.setattr(training_jobs, "_executor", broken)
+
+        with patch("server.services.training_jobs.ProcessPoolExecutor", return_value=fresh):
+            job = submit_training_job(test_session, {})
+
+        assert job["status"] == "queued"
+        broken.shutdown.assert_called_once()
+        fresh.submit.assert_called_once_with(run_training_job, job["job_id"])
+
+    def test_submit_failure_releases_slot(self, test_session, monkeypatch):
+        """Test a job that can't be submitted at all is failed instead of blocking the slot"""
+        broken = MagicMock()
+        broken.submit.side_effect = BrokenProcessPool()
+        monkeypatch.setattr(training_jobs, "_executor", broken)
+
+        with patch("server.services.training_jobs.ProcessPoolExecutor", return_value=broken):
+            job = submit_training_job(test_session, {})
+
+        assert job["status"] == "failed"
+        assert "Could not start" in job["error"]
+        assert create_training_job(test_session, {}) is not None
+
+
+class TestRunTrainingJob:
+    """Test running a job to completion"""
+
+    def test_completes_job(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test a successful job records the model version and releases the slot"""
+        job = create_training_job(test_session, {"mode": "full"})
+
+        run_training_job(job["job_id"], session_opener(test_session))
+
+        job = get_training_job(test_session, job["job_id"])
+        assert job["status"] == "completed"
+        assert job["progress"] == 1.0
+        assert job["stage"] == "saving"
+        assert job["model_version"] is not None
+        assert job["total_ratings"] == 5
+        assert job["result"]["training_mode"] == "full"
+        assert create_training_job(test_session, {}) is not None
+
+    def test_failed_job(self, test_session, sample_users, sample_movies, clean_models_dir):
+        """Test a failing job records the error"""
+        job = create_training_job(test_session, {})
+
+        run_training_job(job["job_id"], session_opener(test_session))
+
+        job = get_training_job(test_session, job["job_id"])
+        assert job["status"] == "failed"
+        assert "No ratings available" in job["error"]
+
+    def test_cancelled_while_running(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test a cancel request stops the job at the next stage"""
+        job = create_training_job(test_session, {})
+        job_id = job["job_id"]
+
+        def request_cancel(session, snapshot_dir, fingerprint, mmap=False):
+            cancel_training_job(test_session, job_id)
+            return {"user_ids": [], "movie_ids": [], "ratings": [], "fingerprint": fingerprint, "stats": {"rows": 5}}
+
+        with patch("server.services.recommendation_service.load_training_ratings", side_effect=request_cancel):
+            run_training_job(job_id, session_opener(test_session))
+
+        job = get_training_job(test_session, job_id)
+        assert job["status"] == "cancelled"
+        assert job["model_version"] is None
+        assert not list(clean_models_dir.glob("recommendation_model_*"))
+
+    def test_expired_while_running_stays_failed(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test a job that lost its slot stops at the next stage and records nothing"""
+        job = create_training_job(test_session, {})
+        job_id = job["job_id"]
+
+        def expire(session, snapshot_dir, fingerprint, mmap=False):
+            expire_and_replace(test_session, job_id)
+            return {"user_ids": [], "movie_ids": [], "ratings": [], "fingerprint": fingerprint, "stats": {"rows": 5}}
+
+        with patch("server.services.recommendation_service.load_training_ratings", side_effect=expire):
+            run_training_job(job_id, session_opener(test_session))
+
+        job = get_training_job(test_session, job_id)
+        assert job["status"] == "failed"
+        assert "stopped reporting" in job["error"]
+        assert job["stage"] == "extracting"
+        assert get_training_status(test_session)["status"] == "training"
+
+    def test_expired_after_training_not_completed(self, test_session, clean_models_dir):
+        """Test a job that lost its slot during its last stage isn't recorded as completed"""
+        job = create_training_job(test_session, {})
+        job_id = job["job_id"]
+
+        def train(session, progress, **params):
+            progress("fitting", 0.5)
+            replacement = expire_and_replace(test_session, job_id)
+            assert replacement is not None
+            return {"model_version": "v1", "total_ratings": 5}
+
+        with patch("server.services.recommendation_service.train_recommendation_model", side_effect=train):
+            run_training_job(job_id, session_opener(test_session))
+
+        job = get_training_job(test_session, job_id)
+        assert job["status"] == "failed"
+        assert job["model_version"] is None
+
+    def test_heartbeat(self, test_session):
+        """Test the heartbeat refreshes running jobs and reports jobs that lost the slot"""
+        job = create_training_job(test_session, {})
+        row = test_session.get(TrainingJobModel, job["job_id"])
+        row.status = "running"
+        row.created_at = row.heartbeat_at = datetime.now() - STALE_JOB_AFTER - timedelta(minutes=1)
+        test_session.commit()
+        heartbeat = _Heartbeat(job["job_id"], session_opener(test_session))
+
+        assert heartbeat.beat(test_session) is True
+        assert create_training_job(test_session, {}) is None
+
+        row.status = "failed"
+        row.active_slot = None
+        test_session.commit()
+        assert heartbeat.beat(test_session) is False
+        assert heartbeat.lost is True
+
+
+class TestCancelTrainingJob:
+    """Test cancelling jobs"""
+
+    def test_cancel_queued_job(self, test_session):
+        """Test a queued job is cancelled immediately"""
+        job = create_training_job(test_session, {})
+
+        job = cancel_training_job(test_session, job["job_id"])
+
+        assert job["status"] == "cancelled"
+        assert job["cancel_requested"] is True
+
+    def test_cancel_finished_job(self, test_session):
+        """Test a finished job can't be cancelled"""
+        job = create_training_job(test_session, {})
+        cancel_training_job(test_session, job["job_id"])
+
+        with pytest.raises(ValueError, match="already cancelled"):
+            cancel_training_job(test_session, job["job_id"])
+
+    def test_cancel_unknown_job(self, test_session):
+        """Test cancelling a job that doesn't exist"""
+        with pytest.raises(ValueError, match="Training job with ID 99 not found"):
+            cancel_training_job(test_session, 99)
+
+
+class TestGetTrainingStatus:
+    """Test training status read from the job table"""
+
+    def test_get_status_idle(self, test_session):
+        """Test status when no training has occurred"""
+        status = get_training_status(test_session)
+
+        assert status["status"] == "idle"
+        assert status["model_version"] is None
+        assert status["total_ratings"] is None
+
+    def test_status_of_latest_job(self, test_session, sample_users, sample_movies, sample_ratings, clean_models_dir):
+        """Test status reflects the most recent job"""
+        job = create_training_job(test_session, {})
+        assert get_training_status(test_session)["status"] == "training"
+
+        run_training_job(job["job_id"], session_opener(test_session))
+
+        status = get_training_status(test_session)
+        assert status["status"] == "completed"
+        assert status["job_id"] == job["job_id"]
+        assert status["total_ratings"] == 5
+        assert status["completed_at"] is not None
+        assert status["metrics"]["matrix"]["n_ratings"] == 5
@@ -0,0 +1,51 @@
+"""
+Service-level tests for training instrumentation
+Tests stage timing, matrix statistics and per-iteration errors
+"""
+
+import json
+
+import numpy as np
+import pytest
+from scipy import sparse
+from server.services.training_metrics import TrainingMetrics
+
+
+class TestTrainingMetrics:
+    """Test recording the metrics of one training run"""
+
+    def test_stages_in_order(self):
+        """Test each stage is closed when the next one starts"""
+        metrics = TrainingMetrics()
+
+        metrics.start_stage("extracting")
+        metrics.start_stage("factorizing")
+        result = metrics.finish()
+
+        assert [s["stage"] for s in result["stages"]] == ["extracting", "factorizing"]
+        assert all(s["seconds"] >= 0 and s["peak_rss_mb"] > 0 for s in result["stages"])
+        assert result["total_seconds"] >= sum(s["seconds"] for s in result["stages"]) - 0.01
+
+    def test_matrix_and_iterations(self):
+        """Test the rating matrix statistics and iteration errors are kept"""
+        metrics = TrainingMetrics()
+        matrix = sparse.csr_matrix(np.array([[1.0, 0.0, 0.0, 0.0], [0.0, 2.0, 3.0, 0.0]]))
+
+        metrics.record_matrix(matrix)
+        metrics.record_iteration(1, 2.5)
+        metrics.record_iteration(2, 1.5)
+        result = metrics.finish()
+
+        assert result["matrix"]["n_users"] == 2
+        assert result["matrix"]["n_movies"] == 4
+        assert result["matrix"]["n_ratings"] == 3
+        assert result["matrix"]["density"] == pytest.approx(3 / 8)
+        assert [i["error"] for i in result["iterations"]] == [2.5, 1.5]
+
+    def test_json_serializable(self):
+        """Test the metrics can be stored in the manifest directory and job row"""
+        metrics = TrainingMetrics()
+        metrics.start_stage("extracting")
+        metrics.record_matrix(sparse.csr_matrix(np.eye(3)))
+
+        assert json.loads(json.dumps(metrics.finish()))["matrix"]["n_ratings"] == 3
@@ -0,0 +1,117 @@
+"""
+Service-level tests for the training ratings snapshot
+Tests the ratings fingerprint and incremental refresh of the local snapshot
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+
+from server.models.ratings import RatingModel
+from server.services.rating_service import create_rating
+from server.services.training_snapshot import load_training_ratings, ratings_fingerprint
+
+
+def triples(ratings):
+    """Sorted (user, movie, rating) triples of loaded ratings"""
+    return sorted(zip(ratings["user_ids"].tolist(), ratings["movie_ids"].tolist(), ratings["ratings"].tolist()))
+
+
+class TestRatingsFingerprint:
+    """Test the summary used to detect changed ratings"""
+
+    def test_fingerprint_changes_on_insert_and_update(self, test_session, sample_ratings):
+        """Test new and updated ratings change the fingerprint"""
+        first = ratings_fingerprint(test_session)
+        assert first["count"] == 5
+        assert first["max_id"] == max(r.rating_id for r in sample_ratings)
+
+        create_rating(test_session, user_id=3, movie_id=1, rating=4.0)
+        second = ratings_fingerprint(test_session)
+        assert second["count"] == 6
+
+        create_rating(test_session, user_id=1, movie_id=1, rating=1.0)
+        third = ratings_fingerprint(test_session)
+        assert third["count"] == 6
+        assert third["max_id"] == second["max_id"]
+        assert third["max_timestamp"] > second["max_timestamp"]
+
+
+class TestLoadTrainingRatings:
+    """Test reading ratings through the snapshot"""
+
+    def test_first_load_reads_everything(self, test_session, sample_ratings, tmp_path):
+        """Test without a snapshot every rating is read and then saved"""
+        result = load_training_ratings(test_session, tmp_path)
+
+        assert result["stats"]["source"] == "full"
+        assert result["stats"]["rows_read"] == 5
+        assert triples(result) == [(1, 1, 4.5), (1, 2, 3.0), (2, 1, 5.0), (2, 3, 4.0), (3, 2, 2.5)]
+        assert (tmp_path / "snapshot.json").exists()
+
+    def test_unchanged_ratings_read_nothing(self, test_session, sample_ratings, tmp_path):
+        """Test an unchanged fingerprint serves the snapshot without reading rows"""
+        load_training_ratings(test_session, tmp_path)
+
+        with patch("server.services.training_snapshot.extract_ratings") as mock_extract:
+            result = load_training_ratings(test_session, tmp_path)
+
+        mock_extract.assert_not_called()
+        assert result["stats"]["source"] == "snapshot"
+        assert result["stats"]["rows"] == 5
+
+    def test_new_and_updated_ratings_read_as_delta(self, test_session, sample_ratings, tmp_path):
+        """Test only added and updated rows are read and merged"""
+        load_training_ratings(test_session, tmp_path)
+        create_rating(test_session, user_id=3, movie_id=1, rating=4.0)
+        create_rating(test_session, user_id=1, movie_id=1, rating=1.0)
+
+        result = load_training_ratings(test_session, tmp_path)
+
+        assert result["stats"]["source"] == "delta"
+        assert result["stats"]["rows_read"] == 2
+        assert triples(result) == [(1, 1, 1.0), (1, 2, 3.0), (2, 1, 5.0), (2, 3, 4.0), (3, 1, 4.0), (3, 2, 2.5)]
+
+    def test_deleted_ratings_trigger_full_read(self, test_session, sample_ratings, tmp_path):
+        """Test a deletion (count mismatch) falls back to reading everything"""
+        load_training_ratings(test_session, tmp_path)
+        test_session.delete(test_session.get(RatingModel, sample_ratings[0].rating_id))
+        test_session.commit()
+        create_rating(test_session, user_id=3, movie_id=1, rating=4.0)
+
+        result = load_training_ratings(test_session, tmp_path)
+
+        assert result["stats"]["source"] == "full"
+        assert triples(result) == [(1, 2, 3.0), (2, 1, 5.0), (2, 3, 4.0), (3, 1, 4.0), (3, 2, 2.5)]
+
+    def test_corrupt_snapshot_ignored(self, test_session, sample_ratings, tmp_path):
+        """Test a snapshot whose arrays don't match its metadata is rebuilt"""
+        load_training_ratings(test_session, tmp_path)
+        (tmp_path / "ratings.npy").write_bytes(b"garbage")
+
+        assert load_training_ratings(test_session, tmp_path)["stats"]["source"] == "full"
+
+    def test_refresh_streamed_in_chunks(self, test_session, sample_ratings, tmp_path):
+        """Test full reads and delta merges split into small chunks give the same ratings"""
+        with patch("server.services.training_snapshot.SNAPSHOT_CHUNK_ROWS", 2):
+            full = load_training_ratings(test_session, tmp_path)
+            create_rating(test_session, user_id=3, movie_id=1, rating=4.0)
+            create_rating(test_session, user_id=2, movie_id=3, rating=1.5)
+            delta = load_training_ratings(test_session, tmp_path)
+
+        assert full["stats"]["rows_read"] == 5
+        assert triples(full) == [(1, 1, 4.5), (1, 2, 3.0), (2, 1, 5.0), (2, 3, 4.0), (3, 2, 2.5)]
+        assert delta["stats"]["source"] == "delta"
+        assert triples(delta) == [(1, 1, 4.5), (1, 2, 3.0), (2, 1, 5.0), (2, 3, 1.5), (3, 1, 4.0), (3, 2, 2.5)]
+        assert np.all(np.diff(delta["rating_ids"]) > 0)
+        assert not list(tmp_path.glob(".*"))
+
+    def test_memory_mapped(self, test_session, sample_ratings, tmp_path):
+        """Test mmap returns the snapshot's arrays memory-mapped"""
+        first = load_training_ratings(test_session, tmp_path, mmap=True)
+        again = load_training_ratings(test_session, tmp_path, mmap=True)
+
+        assert isinstance(first["ratings"], np.memmap)
+        assert isinstance(again["user_ids"], np.memmap)
+        assert triples(again) == triples(first)
+        assert not isinstance(load_training_ratings(test_session, tmp_path)["ratings"], np.memmap)